@@ -0,0 +1,35 @@
+"""
+    Micro benchmarks of squad-client hot paths, run them with
+
+        python -m benchmarks [name ...]
+
+    Each `bench_<name>.py` module defines a `run()` function printing its results,
+    usually through `compare`
+"""
+
+import timeit
+
+
+def measure(func, repeat=5, number=None):
+    """
+        Best time, in seconds, of a single call to `func`
+    """
+
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def compare(title, candidates, repeat=5):
+    """
+        Time each of `candidates`, a list of (name, func), printing how much
+        faster than the first one each of them is
+    """
+
+    print(title)
+    baseline = None
+    for name, func in candidates:
+        elapsed = measure(func, repeat=repeat)
+        baseline = baseline or elapsed
+        print('  %-30s %10.3f ms  %6.2fx' % (name, elapsed * 1000, baseline / elapsed))
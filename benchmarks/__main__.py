@@ -0,0 +1,22 @@
+import importlib
+import os
+import sys
+
+
+def main(names):
+    here = os.path.dirname(__file__)
+    available = sorted(f[len('bench_'):-len('.py')] for f in os.listdir(here) if f.startswith('bench_') and f.endswith('.py'))
+
+    unknown = set(names) - set(available)
+    if unknown:
+        print('Unknown benchmarks: %s, options are: %s' % (', '.join(sorted(unknown)), ', '.join(available)))
+        return 1
+
+    for name in names or available:
+        importlib.import_module('benchmarks.bench_%s' % name).run()
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
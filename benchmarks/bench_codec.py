@@ -0,0 +1,24 @@
+import json
+
+from squad_client import codec
+from squad_client.utils import to_json
+
+from . import compare, data
+
+
+def run():
+    if codec.orjson is None:
+        print('orjson is not installed, squad_client.codec falls back to the standard library')
+
+    page = data.tests_page()
+    content = json.dumps(page).encode('utf-8')
+    compare('Decode a page of 1000 tests (%d KB)' % (len(content) // 1024), [
+        ('json.loads', lambda: json.loads(content)),
+        ('codec.loads', lambda: codec.loads(content)),
+    ])
+
+    tests, metrics, metadata = data.submission()
+    compare('Encode a submission of %d tests and %d metrics' % (len(tests), len(metrics)), [
+        ('json.dumps', lambda: (json.dumps(tests), json.dumps(metrics), json.dumps(metadata))),
+        ('to_json', lambda: (to_json(tests), to_json(metrics), to_json(metadata))),
+    ], repeat=3)
@@ -0,0 +1,35 @@
+import gc
+import json
+import tracemalloc
+
+from squad_client import codec
+from squad_client.core.models import SquadObject, Test
+
+from . import compare, data
+
+COUNT = 100000
+
+
+def run():
+    squad = SquadObject()
+    page = data.tests_page(COUNT)
+    content = json.dumps(page).encode('utf-8')
+
+    print('Memory held by %d tests, decoded and hydrated' % COUNT)
+    for name, filters in [('regular', {}), ('compact', {'compact': True}), ('compact, read-only', {'compact': True, 'readonly': True})]:
+        klass = squad.__compact__(Test, filters)
+        gc.collect()
+        tracemalloc.start()
+        objects = squad.__fill__(klass, codec.loads(content)['results'])
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print('  %-30s %10d KB  %6d bytes/test' % (name, held // 1024, held // len(objects)))
+        del objects
+
+    results = page['results']
+    compact = squad.__compact__(Test, {'compact': True})
+    compare('Hydrate %d tests' % COUNT, [
+        ('regular', lambda: squad.__fill__(Test, results)),
+        ('compact', lambda: squad.__fill__(compact, results)),
+    ], repeat=3)
@@ -0,0 +1,45 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+from squad_client import export
+from squad_client.core.models import SquadObject, Test
+from squad_client.utils import getid
+
+from . import compare, data
+
+COUNT = 200000
+
+
+def run():
+    results = data.tests_page(COUNT)['results']
+    build = SimpleNamespace(version='my_build')
+    environments = {i: SimpleNamespace(id=i, slug='env-%d' % i) for i in range(1, 5)}
+    suites = {i: SimpleNamespace(id=i, slug='suite-%d' % i) for i in range(1, 33)}
+    columns = export.Columns(build, environments, suites)
+    directory = tempfile.mkdtemp()
+
+    def text():
+        # What download_tests does: hydrate, resolve relations, format and sort lines
+        lines = []
+        for test in SquadObject().__fill__(Test, results).values():
+            test.environment = environments[getid(test.environment)]
+            lines.append('{test.environment.slug}/{test.name} {test.status}'.format(test=test))
+        lines.sort()
+        with open(os.path.join(directory, 'tests.txt'), 'w') as fp:
+            fp.write('\n'.join(lines))
+
+    def exporter(extension):
+        def write():
+            with export.EXPORTERS[extension](os.path.join(directory, 'tests.%s' % extension)) as exporter:
+                for batch in export.batches(results, 50000):
+                    exporter.write(columns(batch))
+        return write
+
+    candidates = [('text lines', text), ('csv', exporter('csv'))]
+    if export.pyarrow is not None:
+        candidates += [('arrow', exporter('arrow')), ('parquet', exporter('parquet'))]
+
+    compare('Export %d tests' % COUNT, candidates, repeat=3)
+    for name in sorted(os.listdir(directory)):
+        print('  %-30s %10d KB' % (name, os.path.getsize(os.path.join(directory, name)) // 1024))
@@ -0,0 +1,40 @@
+import timeit
+
+from squad_client.core.models import SquadObject, Test
+
+from . import data
+
+
+def legacy_fill(klass, results):
+    """
+        SquadObject.__fill__ as it used to be, setting attributes one by one
+    """
+
+    objects = {}
+    for result in results:
+        obj = klass()
+        attrs = obj.attrs if len(obj.attrs) else [attr for attr in result.keys()]
+        for attr in attrs:
+            if attr in result.keys():
+                setattr(obj, attr.replace(' ', '_').replace('/', '_').replace('-', '_'), result[attr])
+        objects[obj.__id__] = obj
+    return objects
+
+
+def objects_per_second(func, count, repeat=5):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return count * number / min(timer.repeat(repeat=repeat, number=number))
+
+
+def run():
+    squad = SquadObject()
+    results = data.tests_page()['results']
+    projected = [{'id': r['id'], 'name': r['name'], 'status': r['status']} for r in results]
+
+    for title, page in [('all fields', results), ('fields=id,name,status', projected)]:
+        print('Hydrate tests, %s' % title)
+        before = objects_per_second(lambda: legacy_fill(Test, page), len(page))
+        after = objects_per_second(lambda: squad.__fill__(Test, page), len(page))
+        print('  %-30s %10d objects/s' % ('before', before))
+        print('  %-30s %10d objects/s  %6.2fx' % ('after', after, after / before))
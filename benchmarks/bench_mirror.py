@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+from squad_client.core.compact import get_id
+from squad_client.core.mirror import Mirror
+
+from . import compare, data, measure
+
+COUNT = 200000
+
+
+def run():
+    results = data.tests_page(COUNT)['results']
+    directory = tempfile.mkdtemp()
+    mirror = Mirror(os.path.join(directory, 'mirror.sqlite3'))
+    insert = 'INSERT OR REPLACE INTO tests VALUES (?, ?, ?, ?, ?, ?, ?)'
+
+    def rows():
+        return ((t['id'], 1, get_id(t['environment']), get_id(t['suite']), get_id(t['test_run']), t['name'], t['status']) for t in results)
+
+    def one_by_one():
+        with mirror.connection:
+            for row in rows():
+                mirror.connection.execute(insert, row)
+
+    def bulk():
+        with mirror.connection:
+            mirror.connection.executemany(insert, rows())
+
+    compare('Mirror %d tests' % COUNT, [
+        ('execute per row', one_by_one),
+        ('executemany', bulk),
+    ], repeat=3)
+
+    query = "SELECT environment_id, count(*) FROM tests WHERE build_id = 1 AND status = 'fail' GROUP BY environment_id"
+    print('  %-30s %10.3f ms' % ('failures by environment', measure(lambda: mirror.query(query).fetchall(), repeat=3) * 1000))
+    mirror.close()
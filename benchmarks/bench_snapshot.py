@@ -0,0 +1,41 @@
+import json
+import os
+import tempfile
+import tracemalloc
+from types import SimpleNamespace
+
+from squad_client import codec
+from squad_client.core.snapshot import Snapshot
+from squad_client.core.table import TestsTable, MetricsTable
+
+from . import compare, data
+
+COUNT = 500000
+
+
+def run():
+    page = data.tests_page(COUNT)
+    content = json.dumps(page).encode('utf-8')
+    tests = TestsTable.from_results(page['results'])
+    metrics = MetricsTable.from_results([])
+
+    build = SimpleNamespace(id=1, version='v1', url='https://squad.example.com/api/builds/1/', finished=True)
+    environments = {i: SimpleNamespace(id=i, slug='env-%d' % i) for i in range(1, 5)}
+    filename = os.path.join(tempfile.mkdtemp(), 'snapshot.bin')
+    Snapshot.write(filename, build, tests, metrics, environments, {})
+    print('Snapshot of %d tests: %d KB, %d KB of JSON' % (COUNT, os.path.getsize(filename) // 1024, len(content) // 1024))
+
+    def open_snapshot():
+        with Snapshot(filename) as snapshot:
+            return snapshot.tests.count('environment', 'status')
+
+    for name, func in [('open', lambda: len(Snapshot(filename).tests)), ('open and count', open_snapshot)]:
+        tracemalloc.start()
+        func()
+        print('  %-30s %10d KB allocated at peak' % (name, tracemalloc.get_traced_memory()[1] // 1024))
+        tracemalloc.stop()
+
+    compare('Load %d tests and count them by environment and status' % COUNT, [
+        ('decode JSON into a table', lambda: TestsTable.from_results(codec.loads(content)['results']).count('environment', 'status')),
+        ('map snapshot', open_snapshot),
+    ], repeat=3)
@@ -0,0 +1,46 @@
+import json
+import tracemalloc
+
+from squad_client import codec
+
+from . import compare, data
+
+CHUNK_SIZE = 64 * 1024
+
+
+def peak_memory(func):
+    """
+        Peak of memory allocated while calling `func`, in bytes
+    """
+
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run():
+    page = data.tests_page()
+    for result in page['results']:
+        result['log'] = 'some test output\n' * 200
+    content = json.dumps(page).encode('utf-8')
+    chunks = [content[i:i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE)]
+
+    def buffered():
+        for result in codec.loads(b''.join(chunks))['results']:
+            pass
+
+    def streamed():
+        for result in codec.iterload(chunks, key='results'):
+            pass
+
+    print('Peak memory decoding a page of 1000 tests with logs (%d KB)' % (len(content) // 1024))
+    for name, func in [('buffered', buffered), ('streamed', streamed)]:
+        print('  %-30s %10d KB' % (name, peak_memory(func) // 1024))
+
+    compare('Decode a page of 1000 tests with logs', [
+        ('buffered', buffered),
+        ('streamed', streamed),
+    ])
@@ -0,0 +1,20 @@
+from collections import Counter
+
+from squad_client.core.table import TestsTable
+
+from . import compare, data, measure
+
+COUNT = 1000000
+
+
+def run():
+    results = data.tests_page(COUNT)['results']
+
+    print('Build a table of %d tests' % COUNT)
+    print('  %-30s %10.3f ms' % ('from_results', measure(lambda: TestsTable.from_results(results), repeat=1) * 1000))
+
+    tests = TestsTable.from_results(results)
+    compare('Count %d tests by environment, suite and status' % COUNT, [
+        ('python loop', lambda: Counter((r['environment'], r['suite'], r['status']) for r in results)),
+        ('table', lambda: tests.count('environment', 'suite', 'status')),
+    ], repeat=3)
@@ -0,0 +1,53 @@
+"""
+    Synthetic payloads shaped like what SQUAD serves and receives
+"""
+
+import random
+
+STATUSES = ['pass', 'fail', 'skip', 'xfail']
+
+
+def tests_page(count=1000, build_id=1):
+    """
+        A full page of /api/builds/<id>/tests/, as a python object
+    """
+
+    rng = random.Random(count)
+    results = []
+    for i in range(1, count + 1):
+        status = rng.choice(STATUSES)
+        results.append({
+            'id': i,
+            'url': 'https://squad.example.com/api/tests/%d/' % i,
+            'build': 'https://squad.example.com/api/builds/%d/' % build_id,
+            'environment': 'https://squad.example.com/api/environments/%d/' % (i % 4 + 1),
+            'test_run': 'https://squad.example.com/api/testruns/%d/' % (i % 16 + 1),
+            'suite': 'https://squad.example.com/api/suites/%d/' % (i % 32 + 1),
+            'metadata': 'https://squad.example.com/api/metadata/%d/' % i,
+            'name': 'suite-%d/test-%d' % (i % 32, i),
+            'short_name': 'test-%d' % i,
+            'status': status,
+            'result': status == 'pass',
+            'log': None,
+            'has_known_issues': False,
+            'known_issues': [],
+        })
+
+    return {
+        'count': count,
+        'next': None,
+        'previous': None,
+        'results': results,
+    }
+
+
+def submission(count=100000):
+    """
+        Tests, metrics and metadata of a large submission, as passed to `Squad.submit`
+    """
+
+    rng = random.Random(count)
+    tests = {'suite-%d/test-%d' % (i % 100, i): rng.choice(STATUSES) for i in range(count)}
+    metrics = {'suite-%d/metric-%d' % (i % 100, i): [rng.random() * 100 for _ in range(3)] for i in range(count // 10)}
+    metadata = {'job_id': 'job-%d' % count, 'kernel_version': '6.1.0', 'config': {'arch': 'arm64', 'toolchain': 'gcc-12'}}
+    return tests, metrics, metadata
@@ -27,7 +27,7 @@ setup(
     author='Charles Oliveira',
     author_email='charles.oliveira@linaro.org',
     url='https://github.com/Linaro/squad-client',
-    packages=find_packages(exclude=['test*']),
+    packages=find_packages(exclude=['test*', 'benchmarks*']),
     include_package_data=True,
     entry_points={
         'console_scripts': [
@@ -0,0 +1,20 @@
+"""
+    asyncio flavor of squad-client, requires aiohttp
+
+    Example:
+
+        from squad_client.aio import AsyncSquadApi, Squad
+
+        async def main():
+            await AsyncSquadApi.configure('https://qa-reports.linaro.org')
+            group = await Squad().group('lkft')
+            projects = await group.projects(count=ALL)
+            builds = await asyncio.gather(*[p.builds(count=1) for p in projects.values()])
+            await AsyncSquadApi.close()
+
+    Only Squad, Group, Project and Build fetchers are coroutines, other objects
+    are returned as plain data holders
+"""
+
+from .api import AsyncSquadApi  # noqa
+from .models import ALL, Squad, Group, Project, Build  # noqa
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import urllib
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from squad_client import codec
+from squad_client import logging
+from squad_client.core.api import ApiException, url_validator_regex
+from squad_client.version import __min_squad_version__ as min_squad_version
+
+
+logger = logging.getLogger(__name__)
+
+
+class Response:
+    """
+        Fully read aiohttp response, exposing the same bits of
+        `requests.Response` squad-client relies on
+    """
+
+    def __init__(self, status_code, headers, content, url=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return codec.loads(self.content)
+
+
+class AsyncSquadApi:
+    url = None
+    token = None
+    headers = None
+    version = None
+    session = None
+    loop = None
+    max_connections = 100
+
+    retries = 5
+    backoff_factor = 1
+    status_forcelist = [429, 500, 502, 503, 504]
+    allowed_methods = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+    @staticmethod
+    async def configure(url, token=None, max_connections=100):
+        if aiohttp is None:
+            raise ApiException('aiohttp is required by squad_client.aio, consider `pip install aiohttp`')
+
+        if url is None or url_validator_regex.match(url) is None:
+            raise ApiException('Malformed url: "%s"' % url)
+
+        token = token or os.getenv('SQUAD_TOKEN')
+        if token:
+            AsyncSquadApi.token = token
+            AsyncSquadApi.headers = {"Authorization": 'token %s' % token}
+
+        AsyncSquadApi.url = url if url[-1] == '/' else url + '/'
+        AsyncSquadApi.max_connections = max_connections
+        logger.debug('AsyncSquadApi: url = "%s" and token = "%s"' % (AsyncSquadApi.url, 'yes' if AsyncSquadApi.token else 'no'))
+
+        squad_server_version = await AsyncSquadApi.get('/api/version/')
+        if squad_server_version.status_code == 404:
+            logger.warning('Could not identify squad server version!')
+        else:
+            AsyncSquadApi.version = squad_server_version.text
+            if squad_server_version.text.split('.') < min_squad_version.split('.'):
+                logger.warning('You are running squad-client against and old (< %s) version of squad server, somethings might not work as expected!' % min_squad_version)
+
+    @staticmethod
+    async def get(endpoint, params={}):
+        return await AsyncSquadApi.__request__('GET', endpoint, params=params)
+
+    @staticmethod
+    async def post(endpoint, params={}, data={}, files={}):
+        return await AsyncSquadApi.__request__('POST', endpoint, params=params, data=data, files=files)
+
+    @staticmethod
+    async def patch(endpoint, params={}, data={}):
+        return await AsyncSquadApi.__request__('PATCH', endpoint, params=params, data=data)
+
+    @staticmethod
+    async def delete(endpoint, params={}, data={}):
+        return await AsyncSquadApi.__request__('DELETE', endpoint, params=params, data=data)
+
+    @staticmethod
+    def get_session():
+        # aiohttp sessions are bound to the event loop they were created in
+        loop = asyncio.get_running_loop()
+        if AsyncSquadApi.session is None or AsyncSquadApi.session.closed or AsyncSquadApi.loop is not loop:
+            connector = aiohttp.TCPConnector(limit=AsyncSquadApi.max_connections)
+            AsyncSquadApi.session = aiohttp.ClientSession(connector=connector)
+            AsyncSquadApi.loop = loop
+        return AsyncSquadApi.session
+
+    @staticmethod
+    async def close():
+        if AsyncSquadApi.session is not None and not AsyncSquadApi.session.closed:
+            await AsyncSquadApi.session.close()
+        AsyncSquadApi.session = None
+        AsyncSquadApi.loop = None
+
+    @staticmethod
+    def __params__(params):
+        # aiohttp only takes strings and numbers as query values
+        query = []
+        for key, value in params.items():
+            values = value if type(value) is list else [value]
+            for v in values:
+                query.append((key, v if type(v) in [str, int, float] else str(v)))
+        return query
+
+    @staticmethod
+    def __form__(data, files):
+        form = aiohttp.FormData()
+        for key, value in (data or {}).items():
+            form.add_field(key, value if type(value) in [str, bytes] else str(value))
+        for name, (filename, content) in files:
+            form.add_field(name, content, filename=filename)
+        return form
+
+    @staticmethod
+    async def __request__(method, endpoint, params=None, data=None, files=None):
+        if AsyncSquadApi.url is None:
+            raise ApiException('Missing "url" in AsyncSquadApi configuration. Example: `await AsyncSquadApi.configure("http://qa-reports.linaro.org")`')
+
+        params = dict(params or {})
+        if endpoint.startswith('http'):
+
+            parsed_url = urllib.parse.urlparse(endpoint)
+            tmp_url = '%s://%s/' % (parsed_url.scheme, parsed_url.netloc)
+            if AsyncSquadApi.url != tmp_url:
+                raise ApiException('Given url (%s) is does not match pre-configured one!' % tmp_url)
+
+            endpoint = parsed_url.path
+            params.update(urllib.parse.parse_qs(parsed_url.query))
+
+        if endpoint[-1] != '/':
+            endpoint += '/'
+
+        url = '%s%s' % (AsyncSquadApi.url, endpoint if endpoint[0] != '/' else endpoint[1:])
+        logger.debug('%s %s (%s)' % (method, url, params))
+
+        kwargs = {'params': AsyncSquadApi.__params__(params)}
+        if data or files:
+            kwargs['data'] = AsyncSquadApi.__form__(data, files or [])
+
+        if AsyncSquadApi.headers:
+            kwargs['headers'] = AsyncSquadApi.headers
+
+        attempt = 0
+        while True:
+            try:
+                session = AsyncSquadApi.get_session()
+                async with session.request(method, url, **kwargs) as r:
+                    response = Response(r.status, r.headers, await r.read(), url=str(r.url))
+            except asyncio.TimeoutError as e:
+                raise ApiException('Timeout Error: %s' % e)
+            except aiohttp.ClientConnectionError as e:
+                raise ApiException('Error Connecting: %s' % e)
+            except aiohttp.ClientError as e:
+                raise ApiException('Oops: Something unexpected happened while requesting the API: %s' % e)
+
+            if response.status_code not in AsyncSquadApi.status_forcelist or attempt >= AsyncSquadApi.retries:
+                break
+
+            # Like urllib3's Retry, never replay non-idempotent requests, e.g. POST submissions
+            if method not in AsyncSquadApi.allowed_methods:
+                break
+
+            # Mirror urllib3's Retry(backoff_factor=1) used by SquadApi
+            attempt += 1
+            delay = AsyncSquadApi.backoff_factor * (2 ** (attempt - 1)) if attempt > 1 else 0
+            logger.debug('Retrying %s %s in %ds (got %d)' % (method, url, delay, response.status_code))
+            await asyncio.sleep(delay)
+
+        if response.status_code == 401:
+            msg = 'Unauthorized access to "%s"' % url
+            if AsyncSquadApi.token is None:
+                raise ApiException('%s. Consider `export SQUAD_TOKEN=your-squad-token`' % msg)
+        elif response.status_code == 403:
+            raise ApiException('%s %s is forbidden' % (method, endpoint))
+        elif response.status_code == 500:
+            logger.error(response.text)
+            logger.error('You hit a bug in SQUAD, please report it at https://github.com/Linaro/squad/issues/new so we can get it fixed.')
+
+        return response
@@ -0,0 +1,312 @@
+import asyncio
+from collections import OrderedDict
+
+from squad_client.core import models
+from squad_client.core.pagination import Pagination
+from squad_client.core.models import ALL, DEFAULT_COUNT, SquadObjectException
+from squad_client.utils import first
+from squad_client import codec
+from squad_client import settings
+from squad_client import logging
+
+from .api import AsyncSquadApi
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSquadObject:
+    """
+        Mixin turning SquadObject fetchers into coroutines running on
+        AsyncSquadApi. Objects can't be loaded by id on construction,
+        use `await obj.get(_id)` instead
+    """
+
+    def __init__(self, _id=None):
+        if _id:
+            raise SquadObjectException('%s can not be fetched on construction, use `await %s().get(%s)`' % (type(self).__name__, type(self).__name__, _id))
+        super().__init__()
+
+    async def __fetch__(self, klass=None, filters=None, count=DEFAULT_COUNT, endpoint=None):
+        if klass is None:
+            response = await AsyncSquadApi.get(endpoint or self.endpoint)
+            self.__fill_object__(codec.loads(response.content))
+            return
+
+        klass = self.__compact__(klass, filters)
+        objects = {}
+        async for results in self.__pages__(klass, filters, count, endpoint):
+            objects.update(self.__fill__(klass, results))
+
+        if len(objects) > settings.MAX_NUM_OF_OBJECTS:
+            logger.warn('Maximum number of objects reached [%d]!' % len(objects))
+
+        return objects
+
+    async def __iterate__(self, klass, filters, count=ALL, endpoint=None):
+        klass = self.__compact__(klass, filters)
+        async for results in self.__pages__(klass, filters, count, endpoint):
+            for obj in self.__fill__(klass, results).values():
+                yield obj
+
+    async def __pages__(self, klass, filters, count, endpoint=None):
+        # Responses are read whole and not cached, `stream` and `immutable` make no difference here
+        pagination = Pagination(endpoint or klass.endpoint, filters, count)
+        request = pagination.request()
+        while request is not None:
+            url, params = request
+            response = await AsyncSquadApi.get(url, params)
+            envelope = Pagination.envelope(codec.loads(response.content))
+            yield envelope['results']
+
+            pagination.advance(envelope)
+            request = pagination.request()
+
+        if pagination.offsets:
+            async for results in self.__concurrent_pages__(pagination):
+                yield results
+
+    async def __concurrent_pages__(self, pagination):
+        offsets = pagination.offsets
+
+        async def fetch_page(offset):
+            url, params = pagination.page(offset)
+            response = await AsyncSquadApi.get(url, params)
+            return codec.loads(response.content)['results']
+
+        # Request `workers` pages at a time, keeping at most that many in memory
+        workers = pagination.workers
+        for i in range(0, len(offsets), workers):
+            for results in await asyncio.gather(*[fetch_page(offset) for offset in offsets[i:i + workers]]):
+                yield results
+
+    async def get(self, _id):
+        result = await self.__fetch__(self.__class__, {'id': _id}, 1)
+        return first(result) if len(result) else None
+
+
+class Squad(AsyncSquadObject, models.Squad):
+
+    async def fetch(self, klass, count=ALL, **filters):
+        return await self.__fetch__(klass, filters, count)
+
+    def iter(self, klass, count=ALL, **filters):
+        return self.__iterate__(klass, filters, count)
+
+    async def groups(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(Group, filters, count)
+
+    async def group(self, slug, **filters):
+        filters.update({'slug': slug})
+        objects = await self.groups(count=1, **filters)
+        return first(objects)
+
+    async def projects(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(Project, filters, count)
+
+    async def builds(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(Build, filters, count)
+
+    async def testjobs(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(TestJob, filters, count)
+
+    async def testruns(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(TestRun, filters, count)
+
+    async def tests(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(Test, filters, count)
+
+    async def metrics(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(Metric, filters, count)
+
+    async def suites(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(Suite, filters, count)
+
+    async def environments(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(Environment, filters, count)
+
+    async def backends(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(models.Backend, filters, count)
+
+    async def emailtemplates(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(models.EmailTemplate, filters, count)
+
+    async def knownissues(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(models.KnownIssue, filters, count)
+
+    async def suitemetadata(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(models.SuiteMetadata, filters, count)
+
+    async def annotations(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(models.Annotation, filters, count)
+
+    async def metricthresholds(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(models.MetricThreshold, filters, count)
+
+    async def reports(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(models.Report, filters, count)
+
+    async def statuses(self, count=DEFAULT_COUNT, **filters):
+        return await self.__fetch__(models.TestRunStatus, filters, count)
+
+    async def submit(self, group=None, project=None, build=None, environment=None,
+                     tests=None, metrics=None, metadata=None, log=None, attachments=None):
+
+        path, data, files = self.__submission__(group, project, build, environment, tests, metrics, metadata, log, attachments)
+        response = await AsyncSquadApi.post(path, data=data, files=files)
+        status_code = response.status_code
+        if status_code not in [200, 201, 500]:
+            logger.error('Failed to submit results: %s' % response.text)
+        return response.ok, response.text
+
+
+class Group(AsyncSquadObject, models.Group):
+
+    async def projects(self, count=DEFAULT_COUNT, **filters):
+        filters.update({'group': self.id})
+        return await self.__fetch__(Project, filters, count)
+
+    async def project(self, slug):
+        filters = {'slug': slug}
+        objects = await self.projects(count=1, **filters)
+        return first(objects)
+
+
+class Project(AsyncSquadObject, models.Project):
+
+    async def builds(self, count=DEFAULT_COUNT, **filters):
+        filters.update({'project': self.id})
+        return await self.__fetch__(Build, filters, count)
+
+    def iter_builds(self, count=ALL, **filters):
+        filters.update({'project': self.id})
+        return self.__iterate__(Build, filters, count)
+
+    async def build(self, version):
+        filters = {'version': version}
+        objects = await self.builds(count=1, **filters)
+        return first(objects)
+
+    async def environments(self, count=DEFAULT_COUNT, **filters):
+        filters.update({'project': self.id})
+        return await self.__fetch__(Environment, filters, count)
+
+    async def environment(self, slug):
+        filters = {'slug': slug}
+        objects = await self.environments(count=1, **filters)
+        return first(objects)
+
+    async def suites(self, count=DEFAULT_COUNT, **filters):
+        filters.update({'project': self.id})
+        return await self.__fetch__(Suite, filters, count)
+
+    async def suite(self, suite_slug):
+        filters = {'slug': suite_slug}
+        objects = await self.suites(count=1, **filters)
+        return first(objects)
+
+    async def thresholds(self, count=DEFAULT_COUNT, **filters):
+        filters.update({'project': self.id})
+        return await self.__fetch__(models.MetricThreshold, filters, count)
+
+
+class Build(AsyncSquadObject, models.Build):
+
+    async def testruns(self, count=ALL, prefetch_metadata=False, **filters):
+        filters.update({'build': self.id})
+        testruns = await self.__fetch__(TestRun, filters, count)
+
+        if prefetch_metadata:
+            endpoint = '%s%d/metadata_by_testrun' % (self.endpoint, self.id)
+            response = await AsyncSquadApi.get(endpoint)
+            if response.text != "None":
+                metadata_by_testrun = codec.loads(response.content)
+                for testrun_id in testruns.keys():
+                    testruns[testrun_id].metadata = metadata_by_testrun[str(testrun_id)]
+
+        return testruns
+
+    def iter_testruns(self, count=ALL, **filters):
+        filters.update({'build': self.id})
+        return self.__iterate__(TestRun, filters, count)
+
+    async def testjobs(self, count=ALL, **filters):
+        if self.__testjobs__ is None:
+            self.__testjobs__ = {}
+
+        filters['count'] = count
+        filters_str = str(OrderedDict(filters))
+        if self.__testjobs__.get(filters_str) is None:
+            endpoint = '%s%d/testjobs/' % (self.endpoint, self.id)
+            self.__testjobs__[filters_str] = await self.__fetch__(TestJob, filters, count, endpoint=endpoint)
+        return self.__testjobs__[filters_str]
+
+    async def tests(self, count=ALL, **filters):
+        if self.__tests__ is None:
+            self.__tests__ = {}
+
+        filters['count'] = count
+        filters_str = str(OrderedDict(filters))
+        if self.__tests__.get(filters_str) is None:
+            endpoint = '%s%d/tests/' % (self.endpoint, self.id)
+            self.__tests__[filters_str] = await self.__fetch__(Test, filters, count, endpoint=endpoint)
+        return self.__tests__[filters_str]
+
+    def iter_tests(self, count=ALL, **filters):
+        endpoint = '%s%d/tests/' % (self.endpoint, self.id)
+        return self.__iterate__(Test, filters, count, endpoint=endpoint)
+
+    async def metrics(self, count=ALL, **filters):
+        if self.__metrics__ is None:
+            self.__metrics__ = {}
+
+        filters['count'] = count
+        filters_str = str(OrderedDict(filters))
+        if self.__metrics__.get(filters_str) is None:
+            endpoint = '%s%d/metrics/' % (self.endpoint, self.id)
+            self.__metrics__[filters_str] = await self.__fetch__(Metric, filters, count, endpoint=endpoint)
+        return self.__metrics__[filters_str]
+
+    def iter_metrics(self, count=ALL, **filters):
+        endpoint = '%s%d/metrics/' % (self.endpoint, self.id)
+        return self.__iterate__(Metric, filters, count, endpoint=endpoint)
+
+    async def metadata(self):
+        if self.__metadata__ is None:
+            endpoint = '%s%d/metadata' % (self.endpoint, self.id)
+            response = await AsyncSquadApi.get(endpoint)
+            objects = self.__fill__(models.BuildMetadata, [codec.loads(response.content)])
+            self.__metadata__ = first(objects)
+        return self.__metadata__
+
+    async def status(self):
+        if self.__status__ is None:
+            endpoint = '%s%d/status' % (self.endpoint, self.id)
+            response = await AsyncSquadApi.get(endpoint)
+            objects = self.__fill__(models.BuildStatus, [codec.loads(response.content)])
+            self.__status__ = first(objects)
+        return self.__status__
+
+
+class TestJob(AsyncSquadObject, models.TestJob):
+    pass
+
+
+class TestRun(AsyncSquadObject, models.TestRun):
+    pass
+
+
+class Test(AsyncSquadObject, models.Test):
+    pass
+
+
+class Metric(AsyncSquadObject, models.Metric):
+    pass
+
+
+class Suite(AsyncSquadObject, models.Suite):
+    pass
+
+
+class Environment(AsyncSquadObject, models.Environment):
+    pass
@@ -0,0 +1,111 @@
+import asyncio
+from collections import defaultdict
+
+from squad_client import logging
+from squad_client.core.models import ALL, Metric, Test
+from squad_client.shortcuts import build_testrun, tests_projection, uses
+from squad_client.utils import split_build_url, getid
+
+from .models import Squad
+
+
+squad = Squad()
+logger = logging.getLogger(__name__)
+
+
+async def retrieve_build_results(build_url):
+    group_slug, project_slug, build_version = split_build_url(build_url)
+    group = await squad.group(group_slug)
+    project = await group.project(project_slug)
+    environments, suites, build = await asyncio.gather(
+        project.environments(count=ALL),
+        project.suites(count=ALL),
+        project.build(build_version),
+    )
+
+    if not build:
+        return None
+
+    results = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(dict))))
+
+    tests, metrics = await asyncio.gather(
+        build.tests(fields=Test.projection('short_name', 'status', 'suite', 'environment')),
+        build.metrics(fields=Metric.projection('short_name', 'result', 'suite', 'environment')),
+    )
+
+    for test in tests.values():
+        env = environments[getid(test.environment)]
+        suite = suites[getid(test.suite)]
+        results[env]['tests'][suite][test.short_name] = test.status
+
+    for metric in metrics.values():
+        env = environments[getid(metric.environment)]
+        suite = suites[getid(metric.suite)]
+        results[env]['metrics'][suite][metric.short_name] = metric.result
+
+    return results
+
+
+async def submit_results(group_project_slug=None, build_version=None, env_slug=None, tests={}, metrics={}, log=None, metadata={}, attachments=None):
+    testrun = build_testrun(group_project_slug, build_version, env_slug, tests, metrics, log, metadata, attachments)
+    return await squad.submit(
+        group=testrun.build.project.group,
+        project=testrun.build.project,
+        build=testrun.build,
+        environment=testrun.environment,
+        tests=testrun.tests(),
+        metrics=testrun.metrics(),
+        metadata=testrun.metadata,
+        log=testrun.log,
+        attachments=testrun.attachments)
+
+
+async def download_tests(project, build, filter_envs=None, filter_suites=None, format_string=None, output_filename=None):
+    if format_string is None:
+        format_string = '{test.environment.slug}/{test.name} {test.status}'
+
+    # Only fields and relations used in format_string are fetched
+    paths, fields = tests_projection(format_string)
+    filters = {
+        'count': ALL,
+        'fields': fields,
+    }
+
+    envs = None
+    if filter_envs:
+        filters['environment__id__in'] = ','.join([str(e.id) for e in filter_envs])
+        envs = ','.join([e.slug for e in filter_envs])
+
+    suites = None
+    if filter_suites:
+        filters['suite__id__in'] = ','.join([str(s.id) for s in filter_suites])
+        suites = ','.join([s.slug for s in filter_suites])
+
+    filename = output_filename or f'{build.version}.txt'
+    logger.info(f'Downloading test results for {project.slug}/{build.version}/{envs or "(all envs)"}/{suites or "(all suites)"} to {filename}')
+
+    all_environments, all_suites, all_testruns, tests = await asyncio.gather(
+        project.environments(count=ALL),
+        project.suites(count=ALL),
+        build.testruns(count=ALL, prefetch_metadata=uses(paths, 'test_run.metadata')),
+        build.tests(**filters),
+    )
+
+    output = []
+    for test in tests.values():
+        test.build = build
+        if uses(paths, 'environment'):
+            test.environment = all_environments[getid(test.environment)]
+        if uses(paths, 'suite'):
+            test.suite = all_suites[getid(test.suite)]
+        if uses(paths, 'test_run'):
+            test.test_run = all_testruns[getid(test.test_run)]
+        output.append(format_string.format(test=test))
+
+    output.sort()
+
+    with open(filename, 'w') as fp:
+        for line in output:
+            fp.write(line + '\n')
+
+    return True
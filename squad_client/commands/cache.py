@@ -0,0 +1,149 @@
+import re
+import urllib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from squad_client import logging
+from squad_client import settings
+from squad_client.core import cache as cache_backends
+from squad_client.core.api import SquadApi
+from squad_client.core.command import SquadClientCommand
+from squad_client.core.models import Squad, ALL
+
+
+logger = logging.getLogger(__name__)
+
+DURATION_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+
+def duration(value):
+    """
+        Parse durations like "90", "90s", "15m", "12h", "7d" or "2w", seconds if no unit is given
+    """
+
+    matches = re.match(r'^(\d+)([smhdw]?)$', value)
+    if matches is None:
+        raise ValueError(value)
+    amount, unit = matches.groups()
+    return timedelta(**{DURATION_UNITS[unit or 's']: int(amount)})
+
+
+def latest_builds(value):
+    """
+        Parse "latest-N" (or just "N") into N
+    """
+
+    matches = re.match(r'^(?:latest-)?(\d+)$', value)
+    if matches is None:
+        raise ValueError(value)
+    return int(matches.group(1))
+
+
+def human_size(size):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024 or unit == 'GB':
+            break
+        size /= 1024
+    return '%.1f %s' % (size, unit)
+
+
+class CacheCommand(SquadClientCommand):
+    command = "cache"
+    help_text = "inspect, warm up and prune the cache enabled with --cache"
+
+    def register(self, subparser):
+        parser = super(CacheCommand, self).register(subparser)
+        cache_parser = parser.add_subparsers(help='cache operations', dest='cache_command')
+
+        cache_parser.add_parser('stats', help='show number of cached responses, per endpoint, and their size')
+
+        warm_parser = cache_parser.add_parser('warm', help='fetch results of the latest builds of a group or project into the cache')
+        warm_parser.add_argument('--group', help='SQUAD group', required=True)
+        warm_parser.add_argument('--project', help='SQUAD project, all projects in the group if not given')
+        warm_parser.add_argument('--builds', type=latest_builds, default=1, help='Number of builds per project, as "latest-N". Defaults to latest-1')
+        warm_parser.add_argument('--workers', type=int, default=4, help='Number of builds fetched concurrently. Defaults to 4')
+
+        prune_parser = cache_parser.add_parser('prune', help='drop expired responses, plus old ones or least recently used ones')
+        prune_parser.add_argument('--older-than', type=duration, help='Drop responses cached more than this long ago, e.g. 12h, 7d')
+        prune_parser.add_argument('--max-size', type=int, help='Drop least recently used responses until the cache fits in N megabytes')
+
+    def local(self, args):
+        return args.cache_command in ['stats', 'prune']
+
+    def run(self, args):
+        if self.local(args):
+            # Only the cache is read, it's there whether the server is up or not
+            enabled = int(args.cache) > 0 or args.offline or args.prefer_cache
+            cache = cache_backends.get_backend(args.cache_backend, args.cache_path or settings.CACHE_PATH) if enabled else None
+        else:
+            client = SquadApi.get_client()
+            cache = client.get_session().cache if client.cache > 0 else None
+
+        if cache is None:
+            logger.error('Cache is disabled, enable it with `--cache N`')
+            return False
+
+        if args.cache_command is None:
+            logger.error('Missing cache operation, options are: stats, warm and prune')
+            return False
+
+        return getattr(self, args.cache_command)(cache, args)
+
+    def stats(self, cache, args):
+        endpoints = Counter()
+        expired = 0
+        for response in cache.filter():
+            path = urllib.parse.urlparse(response.url).path
+            endpoints[re.sub(r'/\d+/', '/*/', path)] += 1
+            expired += response.is_expired
+
+        print('Cache: %s (%s)' % (cache.cache_name, type(cache).__name__))
+        print('Responses: %d (%d expired)' % (sum(endpoints.values()), expired))
+        print('Size: %s' % human_size(cache.responses.size()))
+        for endpoint, count in sorted(endpoints.items()):
+            print('  %s: %d' % (endpoint, count))
+        return True
+
+    def warm(self, cache, args):
+        group = Squad().group(args.group)
+        if group is None:
+            logger.error('Group "%s" not found' % args.group)
+            return False
+
+        if args.project:
+            project = group.project(args.project)
+            if project is None:
+                logger.error('Project "%s/%s" not found' % (group.slug, args.project))
+                return False
+            projects = [project]
+        else:
+            projects = group.projects(count=ALL).values()
+
+        # Results are fetched once used, len() is enough
+        def warm_build(build):
+            len(build.tests())
+            len(build.metrics())
+            len(build.testruns(prefetch_metadata=True))
+            build.metadata
+            build.status
+
+        num_builds = 0
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            for project in projects:
+                len(project.environments(count=ALL))
+                len(project.suites(count=ALL))
+                builds = project.builds(count=args.builds, ordering='-id').values()
+                num_builds += len(list(executor.map(warm_build, builds)))
+
+        logger.info('Cached results of %d builds of %d projects' % (num_builds, len(projects)))
+        return True
+
+    def prune(self, cache, args):
+        before = len(cache.responses)
+        cache.delete(expired=True, older_than=args.older_than)
+        if args.max_size is not None:
+            cache.evict(args.max_size * 1024 * 1024)
+
+        logger.info('Dropped %d responses, %d left' % (before - len(cache.responses), len(cache.responses)))
+        return True
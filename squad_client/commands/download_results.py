@@ -1,7 +1,8 @@
 from squad_client import logging
 from squad_client.core.command import SquadClientCommand
 from squad_client.core.models import Squad
-from squad_client.shortcuts import download_tests, get_build
+from squad_client.export import EXPORTERS
+from squad_client.shortcuts import download_tests, export_results, get_build
 
 
 logger = logging.getLogger(__name__)
@@ -34,6 +35,17 @@ class DownloadResultsCommand(SquadClientCommand):
         parser.add_argument(
             "--format", help="Format of the output line", default='{test.environment.slug}/{test.name} {test.status}'
         )
+        parser.add_argument(
+            "--output-format",
+            help="Format of the output file: text lines (see --format), or a table streamed into a csv, arrow or parquet file",
+            choices=['text'] + list(EXPORTERS),
+            default='text',
+        )
+        parser.add_argument(
+            "--metrics",
+            action='store_true',
+            help="Export metrics instead of tests, with --output-format csv, arrow or parquet"
+        )
         parser.add_argument(
             "--debug",
             action='store_true',
@@ -67,6 +79,25 @@ class DownloadResultsCommand(SquadClientCommand):
         if args.suites:
             suites = [project.suite(s) for s in args.suites.split(",")]
 
+        if args.output_format != 'text':
+            try:
+                return export_results(
+                    project,
+                    build,
+                    'metrics' if args.metrics else 'tests',
+                    output_format=args.output_format,
+                    filter_envs=environments,
+                    filter_suites=suites,
+                    output_filename=args.filename,
+                )
+            except ImportError as e:
+                logger.error(str(e))
+                return False
+
+        if args.metrics:
+            logger.error("--metrics needs --output-format csv, arrow or parquet")
+            return False
+
         return download_tests(
             project,
             build,
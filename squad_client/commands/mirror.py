@@ -0,0 +1,79 @@
+import sqlite3
+
+from squad_client import logging
+from squad_client import settings
+from squad_client.commands.cache import latest_builds
+from squad_client.core.command import SquadClientCommand
+from squad_client.core.mirror import Mirror
+from squad_client.core.models import Squad, ALL
+from squad_client.exceptions import InvalidMirror
+
+
+logger = logging.getLogger(__name__)
+
+
+class MirrorCommand(SquadClientCommand):
+    command = "mirror"
+    help_text = "keep a local SQLite mirror of projects' results and query it"
+
+    def register(self, subparser):
+        parser = super(MirrorCommand, self).register(subparser)
+        parser.add_argument('--database', default=settings.MIRROR_PATH, help='Mirror database. Defaults to "%s"' % settings.MIRROR_PATH)
+        mirror_parser = parser.add_subparsers(help='mirror operations', dest='mirror_command')
+
+        sync_parser = mirror_parser.add_parser('sync', help='mirror results of the latest builds of a group or project, skipping finished builds mirrored already')
+        sync_parser.add_argument('--group', help='SQUAD group', required=True)
+        sync_parser.add_argument('--project', help='SQUAD project, all projects in the group if not given')
+        sync_parser.add_argument('--builds', type=latest_builds, default=10, help='Number of builds per project, as "latest-N". Defaults to latest-10')
+
+        sql_parser = mirror_parser.add_parser('sql', help='run a query against the mirror, printing rows separated by tabs')
+        sql_parser.add_argument('query', help='SQL query, e.g. "SELECT name FROM tests WHERE status = \'fail\'"')
+
+    def local(self, args):
+        return args.mirror_command == 'sql'
+
+    def run(self, args):
+        if args.mirror_command is None:
+            logger.error('Missing mirror operation, options are: sync and sql')
+            return False
+
+        with Mirror(args.database) as mirror:
+            return getattr(self, args.mirror_command)(mirror, args)
+
+    def sync(self, mirror, args):
+        group = Squad().group(args.group)
+        if group is None:
+            logger.error('Group "%s" not found' % args.group)
+            return False
+
+        if args.project:
+            project = group.project(args.project)
+            if project is None:
+                logger.error('Project "%s/%s" not found' % (group.slug, args.project))
+                return False
+            projects = [project]
+        else:
+            projects = group.projects(count=ALL).values()
+
+        try:
+            mirror.sync_group(group)
+            num_builds = sum(mirror.sync(project, count=args.builds) for project in projects)
+        except InvalidMirror as e:
+            logger.error(str(e))
+            return False
+
+        logger.info('Mirrored results of %d builds of %d projects into %s' % (num_builds, len(projects), mirror.path))
+        return True
+
+    def sql(self, mirror, args):
+        try:
+            cursor = mirror.query(args.query)
+        except sqlite3.Error as e:
+            logger.error('Query failed: %s' % e)
+            return False
+
+        if cursor.description:
+            print('\t'.join(column[0] for column in cursor.description))
+        for row in cursor:
+            print('\t'.join('' if value is None else str(value) for value in row))
+        return True
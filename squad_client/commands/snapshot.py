@@ -0,0 +1,56 @@
+from squad_client import logging
+from squad_client.core.command import SquadClientCommand
+from squad_client.core.models import Squad
+from squad_client.shortcuts import get_build
+
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotCommand(SquadClientCommand):
+    command = "snapshot"
+    help_text = "save tests and metrics of a build into a binary snapshot, which later runs map instead of downloading them"
+
+    def register(self, subparser):
+        parser = super(SnapshotCommand, self).register(subparser)
+        parser.add_argument(
+            "build", help="group/project/build, where build is a version or an alias like latest-finished (see download-results)"
+        )
+        parser.add_argument(
+            "--output", help="Snapshot file, defaults to the build's directory in the store (see --store-path)"
+        )
+
+    def run(self, args):
+        try:
+            group_slug, project_slug, version = args.build.split('/', 2)
+        except ValueError:
+            logger.error(f"Build \"{args.build}\" is not in the group/project/build format")
+            return False
+
+        group = Squad().group(group_slug)
+        if group is None:
+            logger.error(f"Group \"{group_slug}\" not found")
+            return False
+
+        project = group.project(project_slug)
+        if project is None:
+            logger.error(f"Project \"{group_slug}/{project_slug}\" not found")
+            return False
+
+        build = get_build(version, project)
+        if build is None:
+            logger.error(f"Build \"{group_slug}/{project_slug}/{version}\" not found")
+            return False
+
+        if not build.immutable:
+            logger.error(f"Build \"{build.version}\" is not finished, only finished builds have snapshots")
+            return False
+
+        try:
+            filename = build.save_snapshot(args.output)
+        except ImportError as e:
+            logger.error(str(e))
+            return False
+
+        logger.info(f"Saved snapshot of {group_slug}/{project_slug}/{build.version} to {filename}")
+        return True
@@ -1,12 +1,19 @@
+import hashlib
 import os
 import requests
 import requests_cache
+import threading
 import urllib
 import re
 
+from concurrent.futures import Future
 from requests.adapters import HTTPAdapter, Retry
 
 from squad_client import logging
+from squad_client import settings
+from squad_client.core import cache as cache_backends
+from squad_client.core.identity import IdentityMap
+from squad_client.core.store import BuildStore
 from squad_client.version import __min_squad_version__ as min_squad_version
 
 
@@ -46,77 +53,152 @@ class ApiException(requests.exceptions.RequestException):
     pass
 
 
-class SquadApi:
-    url = None
-    token = None
-    headers = None
-    version = None
-    session = None
-
-    @staticmethod
-    def configure(url, token=None, cache=0):
+class SquadClient:
+    """
+        Connection to a SQUAD instance. Each client holds its own url, token,
+        pooled session, retry policy and cache, so several of them can be used
+        from different threads, or against different servers, within one process.
+        Bind models to a client with `Squad(client=client)`
+
+        With `cache` > 0, GET responses are cached in `cache_path` for `cache`
+        seconds, unless the url matches one of `cache_rules` (see settings.CACHE_RULES)
+        or the request is immutable. Only this client's session is cached.
+        `cache_backend` is either one of cache.BACKENDS, which can be shared
+        by concurrent processes, or a requests_cache backend. Least recently
+        used responses are dropped once they add up to `cache_max_size` bytes
+
+        With `revalidate` on and no `cache`, responses carrying ETag or Last-Modified
+        headers are kept in memory and revalidated with If-None-Match/If-Modified-Since,
+        a 304 is then answered with the stored body. It is off by default, as nothing
+        bounds that memory and SQUAD itself sends no validators
+
+        With `offline` on, GETs are only answered from the cache, expired responses
+        included, and cache misses raise ApiException right away. With `prefer_cache`
+        on, any cached response is used and only misses go to the server. Both
+        enable the cache if `cache` is not given
+
+        With `store` set to a path (or True for settings.STORE_PATH), results of
+        finished builds are kept there and never requested again, a BuildStore
+        can also be given
+
+        Groups, projects, builds, environments and suites fetched through a client
+        are kept in its `identity` map, see squad_client.core.identity
+    """
+
+    def __init__(self, url, token=None, cache=0, pool_maxsize=10, retries=5, backoff_factor=1, coalesce=True, revalidate=False,
+                 cache_path=None, cache_rules=None, cache_backend=None, cache_max_size=None, store=None, offline=False, prefer_cache=False):
         if url is None or url_validator_regex.match(url) is None:
             raise ApiException('Malformed url: "%s"' % url)
 
-        token = token or os.getenv('SQUAD_TOKEN')
-        if token:
-            SquadApi.token = token
-            SquadApi.headers = {"Authorization": 'token %s' % token}
-
-        SquadApi.url = url if url[-1] == '/' else url + '/'
-        logger.debug('SquadApi: url = "%s" and token = "%s"' % (SquadApi.url, 'yes' if SquadApi.token else 'no'))
-
-        squad_server_version = SquadApi.get('/api/version/')
+        self.url = url if url[-1] == '/' else url + '/'
+        self.token = token or os.getenv('SQUAD_TOKEN')
+        self.headers = {"Authorization": 'token %s' % self.token} if self.token else None
+        self.version = None
+        self.cache = int(cache)
+        self.cache_path = cache_path or settings.CACHE_PATH
+        self.cache_rules = settings.CACHE_RULES if cache_rules is None else cache_rules
+        self.cache_backend = cache_backend or settings.CACHE_BACKEND
+        self.cache_max_size = cache_max_size
+        if not isinstance(self.cache_backend, requests_cache.BaseCache) and self.cache_backend not in cache_backends.BACKENDS:
+            raise ApiException('Unknown cache backend "%s", options are: %s' % (self.cache_backend, ', '.join(cache_backends.BACKENDS)))
+        self.offline = offline
+        self.prefer_cache = prefer_cache
+        if (offline or prefer_cache) and self.cache <= 0:
+            self.cache = settings.OFFLINE_CACHE_EXPIRATION
+        self.revalidate = revalidate
+        self.store = store or None
+        if store and not isinstance(store, BuildStore):
+            self.store = BuildStore(self.url, token=self.token, path=None if store is True else store)
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.session = None
+        self.lock = threading.Lock()
+        self.identity = IdentityMap()
+
+        # Identical GETs issued while one is still in flight wait for its response
+        self.coalesce = coalesce
+        self.inflight = {}
+        logger.debug('SquadClient: url = "%s" and token = "%s"' % (self.url, 'yes' if self.token else 'no'))
+
+    def check_version(self):
+        squad_server_version = self.get('/api/version/')
         if squad_server_version.status_code == 404:
             logger.warning('Could not identify squad server version!')
         else:
-            SquadApi.version = squad_server_version.text
+            self.version = squad_server_version.text
             if squad_server_version.text.split('.') < min_squad_version.split('.'):
                 logger.warning('You are running squad-client against and old (< %s) version of squad server, somethings might not work as expected!' % min_squad_version)
-
-        if cache > 0:
-            logger.debug('Caching results in "squad_client_cache.sqlite" for %d seconds' % cache)
-            requests_cache.install_cache('squad_client_cache', expire_after=cache)
-
-    @staticmethod
-    def get(endpoint, params={}):
-        return SquadApi.__request__('GET', endpoint, params=params)
-
-    @staticmethod
-    def post(endpoint, params={}, data={}, files={}):
-        return SquadApi.__request__('POST', endpoint, params=params, data=data, files=files)
-
-    @staticmethod
-    def patch(endpoint, params={}, data={}):
-        return SquadApi.__request__('PATCH', endpoint, params=params, data=data)
-
-    @staticmethod
-    def delete(endpoint, params={}, data={}):
-        return SquadApi.__request__('DELETE', endpoint, params=params, data=data)
-
-    @staticmethod
-    def get_session():
-        if SquadApi.session is None:
-            retry_strategy = Retry(
-                total=5,
-                backoff_factor=1,
-                status_forcelist=[429, 500, 502, 503, 504])
-            adapter = HTTPAdapter(max_retries=retry_strategy)
-            SquadApi.session = requests.Session()
-            SquadApi.session.mount('http://', adapter)
-            SquadApi.session.mount('https://', adapter)
-        return SquadApi.session
-
-    @staticmethod
-    def __request__(method, endpoint, **kwargs):
-        if SquadApi.url is None:
-            raise ApiException('Missing "url" in SquadApi configuration. Example: `export SQUAD_HOST=http://qa-reports.linaro.org`')
-
+        return self.version
+
+    def get(self, endpoint, params={}, immutable=False, stream=False):
+        """
+            immutable: response is not expected to change ever, e.g. tests of a finished build,
+                       so it is kept in cache (if enabled) without expiration
+            stream: body is not read upfront, but through `response.iter_content()`.
+                    Streamed GETs are never coalesced, as a body can only be read once
+        """
+        kwargs = {'stream': True} if stream else {}
+        if immutable and self.cache > 0:
+            kwargs['expire_after'] = requests_cache.NEVER_EXPIRE
+        return self.__request__('GET', endpoint, params=params, **kwargs)
+
+    def post(self, endpoint, params={}, data={}, files={}):
+        return self.__request__('POST', endpoint, params=params, data=data, files=files)
+
+    def patch(self, endpoint, params={}, data={}):
+        return self.__request__('PATCH', endpoint, params=params, data=data)
+
+    def delete(self, endpoint, params={}, data={}):
+        return self.__request__('DELETE', endpoint, params=params, data=data)
+
+    def __cache_key__(self, request, **kwargs):
+        # Responses depend on who is asking, keep entries of each token apart
+        key = requests_cache.create_key(request, **kwargs)
+        if self.token is None:
+            return key
+        return '%s-%s' % (key, hashlib.sha256(self.token.encode()).hexdigest()[:16])
+
+    def get_session(self):
+        with self.lock:
+            if self.session is None:
+                retry_strategy = self.retries
+                if not isinstance(retry_strategy, Retry):
+                    retry_strategy = Retry(
+                        total=self.retries,
+                        backoff_factor=self.backoff_factor,
+                        status_forcelist=[429, 500, 502, 503, 504])
+                adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=self.pool_maxsize)
+
+                # Expired responses with validators are revalidated by requests_cache
+                if self.cache > 0:
+                    logger.debug('Caching results in "%s" (%s) for %d seconds' % (self.cache_path, self.cache_backend, self.cache))
+                    session = requests_cache.CachedSession(
+                        backend=cache_backends.get_backend(self.cache_backend, self.cache_path, max_size=self.cache_max_size),
+                        expire_after=self.cache,
+                        urls_expire_after=self.cache_rules,
+                        only_if_cached=self.offline,
+                        stale_if_error=self.offline or self.prefer_cache,
+                        key_fn=self.__cache_key__)
+                elif self.revalidate:
+                    session = requests_cache.CachedSession(
+                        backend='memory',
+                        expire_after=requests_cache.EXPIRE_IMMEDIATELY,
+                        key_fn=self.__cache_key__)
+                else:
+                    session = requests.Session()
+
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.session = session
+        return self.session
+
+    def __request__(self, method, endpoint, **kwargs):
         if endpoint.startswith('http'):
 
             parsed_url = urllib.parse.urlparse(endpoint)
             tmp_url = '%s://%s/' % (parsed_url.scheme, parsed_url.netloc)
-            if SquadApi.url != tmp_url:
+            if self.url != tmp_url:
                 raise ApiException('Given url (%s) is does not match pre-configured one!' % tmp_url)
 
             endpoint = parsed_url.path
@@ -128,20 +210,57 @@ class SquadApi:
         if endpoint[-1] != '/':
             endpoint += '/'
 
-        url = '%s%s' % (SquadApi.url, endpoint if endpoint[0] != '/' else endpoint[1:])
+        url = '%s%s' % (self.url, endpoint if endpoint[0] != '/' else endpoint[1:])
         logger.debug('%s %s (%s)' % (method, url, kwargs))
 
-        if SquadApi.headers:
-            kwargs['headers'] = SquadApi.headers
+        if self.headers:
+            kwargs['headers'] = self.headers
+
+        if method != 'GET' or not self.coalesce or kwargs.get('stream'):
+            return self.__send__(method, url, endpoint, **kwargs)
+
+        key = (url, tuple(sorted((k, str(v)) for k, v in kwargs.get('params', {}).items())))
+        with self.lock:
+            future = self.inflight.get(key)
+            in_flight = future is not None
+            if not in_flight:
+                future = self.inflight[key] = Future()
+
+        if in_flight:
+            logger.debug('Waiting for in-flight GET %s' % url)
+            return future.result()
 
         try:
-            session = SquadApi.get_session()
-            response = session.request(method, url, auth=NullAuth(), **kwargs)
+            response = self.__send__(method, url, endpoint, **kwargs)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.inflight[key]
+
+    def __send__(self, method, url, endpoint, **kwargs):
+        if self.offline and method != 'GET':
+            raise ApiException('Can not %s %s while offline' % (method, endpoint))
 
-            if response.status_code == 401:
+        try:
+            session = self.get_session()
+
+            # requests_cache answers 504 when only cached responses are allowed and there's none
+            response = None
+            if self.prefer_cache and method == 'GET':
+                response = session.request(method, url, auth=NullAuth(), only_if_cached=True, **kwargs)
+            if response is None or (response.status_code == 504 and not self.offline):
+                response = session.request(method, url, auth=NullAuth(), **kwargs)
+
+            if self.offline and response.status_code == 504:
+                raise ApiException('"%s" is not cached, can not fetch it while offline' % url)
+            elif response.status_code == 401:
                 msg = 'Unauthorized access to "%s"' % url
                 # logger.error(msg)
-                if SquadApi.token is None:
+                if self.token is None:
                     raise ApiException('%s. Consider `export SQUAD_TOKEN=your-squad-token`' % msg)
             elif response.status_code == 403:
                 raise ApiException('%s %s is forbidden' % (method, endpoint))
@@ -151,9 +270,73 @@ class SquadApi:
 
             return response
 
+        except ApiException:
+            # Already explained above, ApiException is a RequestException too
+            raise
         except requests.exceptions.ConnectionError as e:
             raise ApiException('Error Connecting: %s' % e)
         except requests.exceptions.Timeout as e:
             raise ApiException('Timeout Error: %s' % e)
         except requests.exceptions.RequestException as e:
             raise ApiException('Oops: Something unexpected happened while requesting the API: %s' % e)
+
+
+class SquadApi:
+    """
+        Process-wide default SquadClient, used by models that are not bound to any client
+    """
+
+    client = None
+    url = None
+    token = None
+    headers = None
+    version = None
+    session = None
+    store = None
+    identity = None
+
+    @staticmethod
+    def configure(url, token=None, cache=0, **kwargs):
+        # A token configured earlier is kept unless a new one is given
+        token = token or os.getenv('SQUAD_TOKEN') or SquadApi.token
+        client = SquadClient(url, token=token, cache=cache, **kwargs)
+
+        SquadApi.client = client
+        SquadApi.url = client.url
+        SquadApi.token = client.token
+        SquadApi.headers = client.headers
+        SquadApi.session = None
+        SquadApi.store = client.store
+        SquadApi.identity = client.identity
+
+        # Offline and prefer-cache modes should work while the server is unreachable
+        if not (client.offline or client.prefer_cache):
+            client.check_version()
+        SquadApi.version = client.version
+
+    @staticmethod
+    def get_client():
+        if SquadApi.client is None:
+            raise ApiException('Missing "url" in SquadApi configuration. Example: `export SQUAD_HOST=http://qa-reports.linaro.org`')
+        return SquadApi.client
+
+    @staticmethod
+    def get(endpoint, params={}, immutable=False, stream=False):
+        return SquadApi.get_client().get(endpoint, params=params, immutable=immutable, stream=stream)
+
+    @staticmethod
+    def post(endpoint, params={}, data={}, files={}):
+        return SquadApi.get_client().post(endpoint, params=params, data=data, files=files)
+
+    @staticmethod
+    def patch(endpoint, params={}, data={}):
+        return SquadApi.get_client().patch(endpoint, params=params, data=data)
+
+    @staticmethod
+    def delete(endpoint, params={}, data={}):
+        return SquadApi.get_client().delete(endpoint, params=params, data=data)
+
+    @staticmethod
+    def get_session():
+        SquadApi.session = SquadApi.get_client().get_session()
+        return SquadApi.session
@@ -0,0 +1,305 @@
+"""
+    requests_cache backends that can be shared by several squad-client processes,
+    e.g. parallel CI jobs pointing `--cache-path` to the same volume
+
+        sqlite: single database in WAL mode, so readers don't block writers. SQLite
+                locking is only reliable for processes in the same host
+        directory: one file per response, written to a temporary file and renamed
+                   in place, with an flock(2) lock file serializing writers. Its LRU
+                   index and redirects databases don't use WAL, which needs memory
+                   shared among readers, so it works on volumes shared among hosts
+                   as long as they honour flock
+
+    Both evict least recently used responses once `max_size` bytes are cached
+"""
+
+import atexit
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
+from time import time_ns
+
+from requests_cache.backends.base import BaseCache
+from requests_cache.backends.filesystem import FileCache, FileDict, LRUFileDict
+from requests_cache.backends.sqlite import SQLiteCache, SQLiteDict
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from squad_client import logging
+from squad_client import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Milliseconds to wait on a database locked by another process
+BUSY_TIMEOUT = 30000
+
+# Reads done while scanning the whole cache (stats, prune) are not accesses
+scanning = threading.local()
+
+
+@contextmanager
+def scan():
+    scanning.active = True
+    try:
+        yield
+    finally:
+        scanning.active = False
+
+
+class ScanMixin:
+
+    def filter(self, *args, **kwargs):
+        with scan():
+            yield from super().filter(*args, **kwargs)
+
+
+class FileLock:
+    """
+        Re-entrant lock shared among threads of this process and, through flock(2)
+        on `path`, with other processes. Where flock is not available (Windows),
+        it only guards threads
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.fd = None
+
+    def acquire(self, *args, **kwargs):
+        self.lock.acquire()
+        if self.depth == 0 and fcntl is not None:
+            try:
+                self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self.fd, fcntl.LOCK_EX)
+            except FileNotFoundError:
+                pass  # cache directory is gone, there is nothing left to guard
+        self.depth += 1
+        return True
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0 and self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
+        self.lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class DirectoryDict(FileDict):
+    """
+        FileDict writing entries atomically, so readers never see half written files
+    """
+
+    def __setitem__(self, key, value):
+        with self._try_io(key):
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb' if self.is_binary else 'w') as fp:
+                    fp.write(self.serialize(value))
+                os.replace(tmp, self._key2path(key))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+
+class LRUDirectoryDict(LRUFileDict, DirectoryDict):
+
+    def __getitem__(self, key):
+        if getattr(scanning, 'active', False):
+            return DirectoryDict.__getitem__(self, key)
+        return super().__getitem__(key)
+
+
+class DirectoryCache(ScanMixin, FileCache):
+
+    def __init__(self, cache_name, max_size=None, **kwargs):
+        BaseCache.__init__(self, cache_name=str(cache_name), **kwargs)
+        os.makedirs(cache_name, exist_ok=True)
+
+        # Responses, LRU index and redirects are all guarded by the same lock file
+        # Access times are tracked even without a size cap, so the cache can be pruned later on
+        # WAL doesn't work on network filesystems, the lock file already keeps writers apart
+        kwargs.update({'lock': FileLock(os.path.join(cache_name, 'lock')), 'wal': False, 'busy_timeout': BUSY_TIMEOUT})
+        self.responses = LRUDirectoryDict(cache_name, max_cache_bytes=max_size or sys.maxsize, **kwargs)
+
+        kwargs.pop('serializer', None)
+        self.redirects = SQLiteDict(self.cache_dir / 'redirects.sqlite', 'redirects', serializer=None, **kwargs)
+
+    def evict(self, max_size):
+        """
+            Delete least recently used responses until the remaining ones fit in `max_size` bytes
+        """
+
+        with self.lock:
+            excess = self.responses.lru_index.total_size() - max_size
+            if excess > 0:
+                self.responses.bulk_delete(self.responses.lru_index.get_lru(excess))
+            self._prune_redirects()
+
+
+# LRUSQLiteDicts alive in this process by id (mappings aren't hashable), their
+# pending access times are recorded at exit
+lru_dicts = weakref.WeakValueDictionary()
+
+
+@atexit.register
+def flush_access_times():
+    for lru_dict in list(lru_dicts.values()):
+        if not lru_dict.accessed:
+            continue
+        try:
+            lru_dict.flush()
+        except sqlite3.Error as e:
+            logger.debug('Could not record cache access times: %s' % e)
+
+
+class LRUSQLiteDict(SQLiteDict):
+    """
+        SQLiteDict keeping track of when each entry was last read or written,
+        dropping the oldest ones once values add up to more than `max_size` bytes.
+        Access times of reads are recorded in batches, flushed on close and at exit,
+        and the size of the table is only counted every few writes, adding up sizes
+        of values written in between
+    """
+
+    def __init__(self, *args, max_size=None, **kwargs):
+        self.max_size = max_size
+        self.accessed = {}
+        self.values_size = None
+        self.writes = 0
+        super().__init__(*args, **kwargs)
+        lru_dicts[id(self)] = self
+
+    def init_db(self):
+        super().init_db()
+        with self.connection(commit=True) as con:
+            columns = [row[1] for row in con.execute('PRAGMA table_info(%s)' % self.table_name)]
+            if 'accessed' not in columns:
+                con.execute('ALTER TABLE %s ADD COLUMN accessed INTEGER NOT NULL DEFAULT 0' % self.table_name)
+            con.execute('CREATE INDEX IF NOT EXISTS accessed_idx ON %s(accessed)' % self.table_name)
+
+    def touch(self, con):
+        accessed, self.accessed = self.accessed, {}
+        if accessed:
+            con.executemany('UPDATE %s SET accessed = ? WHERE key = ?' % self.table_name,
+                            [(value, key) for key, value in accessed.items()])
+
+    def flush(self):
+        """
+            Record access times of reads not recorded yet
+        """
+
+        with self.connection(commit=True) as con:
+            self.touch(con)
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if not getattr(scanning, 'active', False):
+            self.accessed[key] = time_ns()
+            if len(self.accessed) >= settings.CACHE_ACCESS_BATCH_SIZE:
+                self.flush()
+        return value
+
+    def _write(self, key, value):
+        # Same as SQLiteDict._write, with the access time set by the same statement
+        expires = getattr(value, 'expires_unix', None)
+        value = self.serialize(value)
+        with self.connection(commit=True) as con:
+            self.touch(con)
+            con.execute(
+                'INSERT OR REPLACE INTO %s (key, value, expires, accessed) VALUES (?, ?, ?, ?)' % self.table_name,
+                (key, value, expires, time_ns()),
+            )
+
+        if self.max_size:
+            # Other processes write to the same table, the size is counted again every now and then
+            self.writes += 1
+            if self.values_size is None or self.writes % settings.CACHE_SIZE_CHECK_INTERVAL == 0:
+                self.values_size = self.total_size()
+            else:
+                self.values_size += len(value)
+
+            if self.values_size > self.max_size:
+                self.evict(self.max_size)
+                self.values_size = None
+
+    def total_size(self):
+        with self.connection() as con:
+            return con.execute('SELECT COALESCE(SUM(LENGTH(value)), 0) FROM %s' % self.table_name).fetchone()[0]
+
+    def close(self):
+        if self._connection is not None:
+            self.flush()
+        super().close()
+
+    def evict(self, max_size):
+        """
+            Delete least recently used entries until the remaining ones fit in `max_size` bytes
+        """
+
+        with self.connection(commit=True) as con:
+            self.touch(con)
+            con.execute(
+                '''
+                DELETE FROM {table} WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, LENGTH(value) AS size, SUM(LENGTH(value)) OVER (ORDER BY accessed, key) AS running_total
+                        FROM {table}
+                    )
+                    WHERE running_total - size < (SELECT SUM(LENGTH(value)) FROM {table}) - ?
+                )
+                '''.format(table=self.table_name), (max_size,))
+
+
+class SQLiteLRUCache(ScanMixin, SQLiteCache):
+
+    def __init__(self, db_path, max_size=None, **kwargs):
+        BaseCache.__init__(self, cache_name=str(db_path), **kwargs)
+        kwargs.setdefault('wal', True)
+        kwargs.setdefault('busy_timeout', BUSY_TIMEOUT)
+        self.responses = LRUSQLiteDict(db_path, table_name='responses', max_size=max_size, **kwargs)
+
+        kwargs.pop('serializer', None)
+        self.redirects = SQLiteDict(db_path, table_name='redirects', lock=self.responses._lock, serializer=None, **kwargs)
+
+    def evict(self, max_size):
+        """
+            Delete least recently used responses until the remaining ones fit in `max_size`
+            bytes, shrinking the database file afterwards
+        """
+
+        self.responses.evict(max_size)
+        self._prune_redirects()
+        self.responses.vacuum()
+
+
+BACKENDS = {
+    'sqlite': SQLiteLRUCache,
+    'directory': DirectoryCache,
+}
+
+
+def get_backend(backend, path, max_size=None):
+    """
+        Return `backend` if it's already a requests_cache backend, otherwise
+        instantiate the one named `backend` in `path`
+    """
+
+    if isinstance(backend, BaseCache):
+        return backend
+    return BACKENDS[backend](path, max_size=max_size)
@@ -14,6 +14,14 @@ class SquadClientCommand:
     def process(args):
         return SquadClientCommand.klasses[args.command].run(args)
 
+    def local(self, args):
+        """
+            Whether running with `args` only works on local files, in which case
+            SquadApi is not configured and the server is not reached
+        """
+
+        return False
+
     def register(self, subparser):
         return subparser.add_parser(self.command, help=self.help_text)
 
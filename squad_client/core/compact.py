@@ -0,0 +1,177 @@
+"""
+    Compact representation of SquadObjects, meant for holding whole builds in memory
+
+    Compact objects keep attributes in __slots__ instead of a __dict__. Urls of related
+    objects (see `relations` of each model) are kept as integer ids, e.g. `test_run_id`,
+    and rebuilt on access, as is the object's own `url`. Values repeated across
+    objects, like statuses and test names, are interned
+
+    Only attributes are compatible with the regular models, methods (e.g. TestRun.tests())
+    are not available on compact objects
+"""
+
+import sys
+from types import SimpleNamespace
+
+from squad_client.core.hydration import attribute_name
+
+# Attributes whose values repeat a lot, e.g. the same test name in every environment
+INTERNED = {'status', 'name', 'short_name', 'unit', 'job_status'}
+
+# Server part of urls, e.g. "https://qa-reports.linaro.org/"
+servers = {}
+
+compact_classes = {}
+
+# Hydrators of compact classes, by class, see SquadObject.__hydrator__
+hydrators = {}
+
+
+def get_id(url):
+    if url is None:
+        return None
+    return int(url.rstrip('/').rsplit('/', 1)[-1])
+
+
+def get_ids(urls):
+    return tuple(get_id(url) for url in urls) if urls else ()
+
+
+def relation(slot, endpoint, many=False):
+    path = endpoint.lstrip('/')
+
+    def url(self):
+        value = getattr(self, slot)
+        if many:
+            return ['%s%s%d/' % (self.__server__, path, _id) for _id in value]
+        return None if value is None else '%s%s%d/' % (self.__server__, path, value)
+    return property(url)
+
+
+class CompactObject:
+    __slots__ = ('__server__',)
+
+    # SquadObject class this is the compact version of
+    model = None
+    readonly = False
+    __client__ = None
+
+    @property
+    def __id__(self):
+        return self.id
+
+    @property
+    def url(self):
+        # The server is only known from urls in results, which `fields=` may have left out
+        server = getattr(self, '__server__', None)
+        if server is None:
+            return None
+        return '%s%s%d/' % (server, self.endpoint.lstrip('/'), self.id)
+
+    def __str__(self):
+        attrs_str = ['%s: "%s"' % (attr, getattr(self, attr, None)) for attr in self.model.attrs]
+        return '%s(%s)' % (type(self).__name__, ', '.join(attrs_str))
+
+    def __repr__(self):
+        return self.model.__repr__(self) if '__repr__' in vars(self.model) else self.__str__()
+
+    @classmethod
+    def __hydrator__(cls):
+        return hydrators[cls]
+
+
+class ReadOnly:
+    """
+        Mixin of read-only compact classes. Objects are built as their writable
+        counterparts, then turned into read-only ones
+    """
+
+    __slots__ = ()
+    readonly = True
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is read-only' % type(self).__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError('%s is read-only' % type(self).__name__)
+
+
+def compact_class(model, readonly=False):
+    """
+        Compact version of `model`, generated once per model
+    """
+
+    klass = compact_classes.get((model, readonly))
+    if klass is not None:
+        return klass
+
+    if readonly:
+        writable = compact_class(model)
+        klass = type('ReadOnly%s' % writable.__name__, (ReadOnly, writable), {'__slots__': ()})
+
+        def build(result, client=None, build=hydrators[writable].build, set_class=object.__setattr__):
+            obj = build(result)
+            set_class(obj, '__class__', klass)
+            return obj
+    else:
+        slots = []
+        namespace = {'model': model, 'endpoint': model.endpoint}
+        for attr in model.attrs:
+            name = attribute_name(attr)
+            if attr == 'url':
+                continue
+            elif attr in model.relations:
+                many = attr in model.many_relations
+                slots.append('%s_%s' % (name, 'ids' if many else 'id'))
+                namespace[name] = relation(slots[-1], model.relations[attr], many)
+            else:
+                slots.append(name)
+
+        namespace['__slots__'] = tuple(slots)
+        klass = type('Compact%s' % model.__name__, (CompactObject,), namespace)
+        build = compile_build(klass)
+
+    hydrators[klass] = SimpleNamespace(build=build)
+    compact_classes[(model, readonly)] = klass
+    return klass
+
+
+def compile_build(klass):
+    """
+        Generate a function building objects of `klass` out of results, with one
+        line per attribute. Lookups of servers and interned strings are inlined,
+        function calls are what costs most
+    """
+
+    model = klass.model
+    urls = [attr for attr in ['url'] + list(model.relations) if attr in model.attrs and attr not in model.many_relations]
+    lines = [
+        'def build(result, client=None):',
+        '    obj = new(klass)',
+        '    value = %s' % ' or '.join('result.get(%r)' % attr for attr in urls) if urls else '    value = None',
+        '    if value:',
+        '        value = value[:value.find("/api/") + 1]',
+        '        obj.__server__ = servers_get(value) or servers_setdefault(value, value)',
+    ]
+    namespace = {'klass': klass, 'new': object.__new__, 'get_id': get_id, 'get_ids': get_ids,
+                 'servers_get': servers.get, 'servers_setdefault': servers.setdefault, 'intern': sys.intern}
+
+    for attr in model.attrs:
+        name = attribute_name(attr)
+        if attr == 'url':
+            continue
+        elif attr in model.many_relations:
+            name, value = '%s_ids' % name, 'get_ids(value)'
+        elif attr in model.relations:
+            name, value = '%s_id' % name, 'get_id(value)'
+        elif attr in INTERNED:
+            value = 'intern(value) if value.__class__ is str else value'
+        else:
+            value = 'value'
+        lines.append('    if %r in result:' % attr)
+        lines.append('        value = result[%r]' % attr)
+        lines.append('        obj.%s = %s' % (name, value))
+
+    lines.append('    return obj')
+    exec(compile('\n'.join(lines), '<%s hydrator>' % klass.__name__, 'exec'), namespace)
+    return namespace['build']
@@ -0,0 +1,69 @@
+"""
+    Heavy fields loaded on first access
+
+    Fields like Test.log or TestJob.definition are `deferred`: when a listing requests
+    `fields=` without them (e.g. QuerySet.profile()), objects of the same page share
+    a Batch, and the first access to one of those fields on any of them requests
+    the page again, with just ids and that field
+
+        tests = build.tests(count=ALL).profile()
+        for test in tests.values():
+            if test.status == 'fail':
+                print(test.log)  # logs of the whole page are fetched here, once
+"""
+
+import urllib.parse
+
+from squad_client import codec
+from squad_client import logging
+from squad_client.core.hydration import attribute_name
+
+logger = logging.getLogger(__name__)
+
+
+class Batch:
+    """
+        Objects of `klass` fetched together. `fetch(field)` returns raw results
+        holding the ids of the objects and their `field`, e.g. see page_fetch()
+    """
+
+    def __init__(self, klass, fetch):
+        self.klass = klass
+        self.fetch = fetch
+        self.objects = []
+
+    def add(self, obj):
+        obj.__dict__['__batch__'] = self
+        self.objects.append(obj)
+
+    def load(self, field):
+        """
+            Set `field` on objects of the batch which don't have it yet, None if the API didn't return it
+        """
+
+        name = attribute_name(field)
+        pending = [obj for obj in self.objects if name not in obj.__dict__]
+        if not pending:
+            return
+
+        logger.debug('Loading %s of %d %s objects' % (field, len(pending), self.klass.__name__))
+        values = {result.get('id'): result.get(field) for result in self.fetch(field)}
+        for obj in pending:
+            obj.__dict__[name] = values.get(obj.__dict__.get('id'))
+
+
+def page_fetch(owner, url, params):
+    """
+        `fetch` of a Batch of the objects of a page, requesting the page again
+        (`url` with `params`, as `owner` did) with just the id and the field
+    """
+
+    # Urls of following pages carry the parameters of the first one, fields included
+    parts = urllib.parse.urlsplit(url)
+    query = [(key, value) for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if key != 'fields']
+    url = urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+    def fetch(field):
+        response = owner.__api__.get(url, dict(params, fields='id,%s' % field))
+        return codec.loads(response.content)['results']
+    return fetch
@@ -0,0 +1,77 @@
+"""
+    Building SquadObjects out of API results
+
+    For each class, a `build` and a `fill` function are generated once, with one
+    line per attribute in `klass.attrs`, so hydrating an object costs a lookup and
+    a store per attribute instead of going through setattr and sanitizing names
+    every time. Classes with no `attrs` (e.g. metadata) take whatever keys come in
+"""
+
+# Names of attributes (valid python identifiers) of keys in results, e.g. "boot-time" -> "boot_time"
+attribute_names = {}
+
+
+def attribute_name(key):
+    name = attribute_names.get(key)
+    if name is None:
+        name = attribute_names[key] = key.replace(' ', '_').replace('/', '_').replace('-', '_')
+    return name
+
+
+def is_descriptor(klass, name):
+    # Properties (e.g. TestRun.attachments) must be set through their setter
+    return hasattr(getattr(klass, name, None), '__set__')
+
+
+class Hydrator:
+    """
+        Builds and fills objects of `klass`. With `initialize` off, objects are
+        created without calling `klass.__init__`, which must not do anything
+        besides what's done here (i.e. binding the client)
+    """
+
+    def __init__(self, klass, initialize=True):
+        self.klass = klass
+        self.initialize = initialize
+
+        # Specialized versions take over the generic build and fill below
+        if klass.attrs:
+            self.build, self.fill = self.__compile__()
+
+    def __compile__(self):
+        lines = []
+        for attr in self.klass.attrs:
+            name = attribute_name(attr)
+            if is_descriptor(self.klass, name):
+                lines.append('    if %r in result: setattr(obj, %r, result[%r])' % (attr, name, attr))
+            else:
+                lines.append('    if %r in result: attrs[%r] = result[%r]' % (attr, name, attr))
+        body = '\n'.join(lines)
+
+        source = '\n'.join([
+            'def build(result, client=None):',
+            '    obj = klass() if initialize else new(klass)',
+            '    attrs = obj.__dict__',
+            '    if client is not None: attrs["__client__"] = client',
+            body,
+            '    return obj',
+            '',
+            'def fill(obj, result):',
+            '    attrs = obj.__dict__',
+            body,
+        ])
+
+        namespace = {'klass': self.klass, 'initialize': self.initialize, 'new': object.__new__}
+        exec(compile(source, '<%s hydrator>' % self.klass.__name__, 'exec'), namespace)
+        return namespace['build'], namespace['fill']
+
+    def build(self, result, client=None):
+        obj = self.klass() if self.initialize else object.__new__(self.klass)
+        if client is not None:
+            obj.__client__ = client
+        self.fill(obj, result)
+        return obj
+
+    def fill(self, obj, result):
+        for key, value in result.items():
+            setattr(obj, attribute_name(key), value)
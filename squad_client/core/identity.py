@@ -0,0 +1,41 @@
+"""
+    Identity map of SquadObjects, one per client
+
+    Groups, projects, builds, environments and suites (models with `mapped` on) are
+    kept by id as they're fetched whole, i.e. without `fields=`, the latest fetch of
+    an object replaces earlier ones. Objects streamed with Squad.iter() or
+    QuerySet.iterator() are left out, the map would end up holding all of them. Relations come back from the API as urls, e.g.
+    `test.environment`, and are resolved through the map with SquadObject.related(),
+    so each referenced object is fetched once
+
+        tests = build.tests(count=ALL).prefetch_related('environment', 'suite')
+        for test in tests.values():
+            print(test.related('environment').slug, test.name)
+"""
+
+
+class IdentityMap:
+
+    def __init__(self):
+        self.objects = {}
+
+    def __len__(self):
+        return len(self.objects)
+
+    def get(self, klass, _id):
+        return self.objects.get((klass, _id))
+
+    def put(self, obj):
+        _id = obj.__dict__.get('id')
+        if _id is not None:
+            self.objects[(type(obj), _id)] = obj
+
+    def missing(self, klass, ids):
+        """
+            Ids among `ids` with no object of `klass` in the map
+        """
+
+        return [_id for _id in ids if (klass, _id) not in self.objects]
+
+    def clear(self):
+        self.objects.clear()
@@ -0,0 +1,185 @@
+"""
+    Local SQLite mirror of SQUAD projects, for querying results across many builds
+    without going through the API
+
+        mirror = Mirror()
+        mirror.sync(project, count=90)
+        mirror.query("SELECT name, count(*) FROM tests JOIN environments e ON e.id = environment_id "
+                     "WHERE e.slug = 'arm64' AND status = 'fail' GROUP BY name")
+
+    Syncs are incremental: until a build is seen finished, only tests and metrics of its
+    test runs which were not mirrored completed yet are requested. The sync that sees it
+    finished replaces all of its results, from then on it's skipped. Related objects are
+    kept as their ids, e.g. tests.environment_id
+"""
+
+import os
+import sqlite3
+
+from squad_client import logging
+from squad_client import settings
+from squad_client.core.compact import get_id
+from squad_client.core.models import ALL, Metric, Test, TestRun
+from squad_client.exceptions import InvalidMirror
+from squad_client.utils import chunk_ids
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS mirror (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS groups (id INTEGER PRIMARY KEY, slug TEXT, name TEXT);
+CREATE TABLE IF NOT EXISTS projects (id INTEGER PRIMARY KEY, group_id INTEGER, slug TEXT, name TEXT);
+CREATE TABLE IF NOT EXISTS environments (id INTEGER PRIMARY KEY, project_id INTEGER, slug TEXT, name TEXT);
+CREATE TABLE IF NOT EXISTS suites (id INTEGER PRIMARY KEY, project_id INTEGER, slug TEXT, name TEXT);
+CREATE TABLE IF NOT EXISTS builds (id INTEGER PRIMARY KEY, project_id INTEGER, version TEXT, created_at TEXT, datetime TEXT,
+                                   finished INTEGER, synced INTEGER NOT NULL DEFAULT 0);
+CREATE TABLE IF NOT EXISTS testruns (id INTEGER PRIMARY KEY, build_id INTEGER, environment_id INTEGER, job_id TEXT, job_status TEXT,
+                                     job_url TEXT, completed INTEGER, created_at TEXT);
+CREATE TABLE IF NOT EXISTS tests (id INTEGER PRIMARY KEY, build_id INTEGER, environment_id INTEGER, suite_id INTEGER, test_run_id INTEGER,
+                                  name TEXT, status TEXT);
+CREATE TABLE IF NOT EXISTS metrics (id INTEGER PRIMARY KEY, build_id INTEGER, environment_id INTEGER, suite_id INTEGER, test_run_id INTEGER,
+                                    name TEXT, result REAL, unit TEXT);
+CREATE INDEX IF NOT EXISTS builds_project ON builds (project_id, id);
+CREATE INDEX IF NOT EXISTS testruns_build ON testruns (build_id);
+CREATE INDEX IF NOT EXISTS tests_build ON tests (build_id, environment_id, status);
+CREATE INDEX IF NOT EXISTS tests_name ON tests (name, build_id);
+CREATE INDEX IF NOT EXISTS metrics_build ON metrics (build_id, environment_id);
+CREATE INDEX IF NOT EXISTS metrics_name ON metrics (name, build_id);
+'''
+
+
+class Mirror:
+
+    def __init__(self, path=None):
+        self.path = path or settings.MIRROR_PATH
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.execute('PRAGMA synchronous = NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def query(self, sql, parameters=()):
+        """
+            Run `sql` against the mirror, returning a cursor over its rows
+        """
+
+        return self.connection.execute(sql, parameters)
+
+    def check_server(self, url):
+        """
+            A mirror holds results of a single server, ids of different servers would clash
+        """
+
+        with self.connection:
+            self.connection.execute('INSERT OR IGNORE INTO mirror VALUES (?, ?)', ('url', url))
+        mirrored, = self.connection.execute("SELECT value FROM mirror WHERE key = 'url'").fetchone()
+        if mirrored != url:
+            raise InvalidMirror('%s mirrors %s, not %s' % (self.path, mirrored, url))
+
+    def sync(self, project, count=ALL):
+        """
+            Mirror `project`, its environments and suites, and results of its latest
+            `count` builds. Return how many builds had their results mirrored
+        """
+
+        self.check_server(project.__api__.url)
+
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?)',
+                                    (project.id, get_id(project.group), project.slug, project.name))
+            self.connection.executemany('INSERT OR REPLACE INTO environments VALUES (?, ?, ?, ?)',
+                                        [(e.id, project.id, e.slug, e.name) for e in project.environments(count=ALL).values()])
+            self.connection.executemany('INSERT OR REPLACE INTO suites VALUES (?, ?, ?, ?)',
+                                        [(s.id, project.id, s.slug, s.name) for s in project.suites(count=ALL).values()])
+
+        builds = list(project.builds(count=count, ordering='-id').values())
+        synced = self.synced([build.id for build in builds])
+
+        num_builds = 0
+        for build in builds:
+            if build.id not in synced:
+                self.sync_build(build, project.id)
+                num_builds += 1
+
+        logger.debug('Mirrored %d builds of %s, %d were mirrored already' % (num_builds, project.slug, len(builds) - num_builds))
+        return num_builds
+
+    def sync_group(self, group):
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO groups VALUES (?, ?, ?)', (group.id, group.slug, group.name))
+
+    def synced(self, build_ids):
+        """
+            Ids among `build_ids` whose results were mirrored once they were finished
+        """
+
+        synced = set()
+        for start in range(0, len(build_ids), settings.MIRROR_BATCH_SIZE):
+            batch = build_ids[start:start + settings.MIRROR_BATCH_SIZE]
+            rows = self.connection.execute('SELECT id FROM builds WHERE synced = 1 AND id IN (%s)' % ','.join('?' * len(batch)), batch)
+            synced.update(_id for _id, in rows)
+        return synced
+
+    def sync_build(self, build, project_id):
+        """
+            Mirror results of `build`, in a single transaction. Results of finished builds are
+            all replaced, those of others only for test runs not mirrored completed yet
+        """
+
+        def results(name, klass, fields, **filters):
+            endpoint = '%s%d/%s/' % (build.endpoint, build.id, name)
+            return build.__results__(name, klass, dict(filters, fields=fields), ALL, endpoint)
+
+        finished = build.immutable
+        testruns = [(t['id'], build.id, get_id(t.get('environment')), t.get('job_id'), t.get('job_status'), t.get('job_url'),
+                     t.get('completed'), t.get('created_at'))
+                    for t in results('testruns', TestRun, 'id,environment,job_id,job_status,job_url,completed,created_at')]
+
+        # Results of a test run don't change once it's completed, SQUAD can't filter them by id
+        chunks = [{}]
+        if not finished:
+            completed = self.completed_testruns(build.id)
+            pending = [t[0] for t in testruns if t[0] not in completed]
+            chunks = [{'test_run__id__in': chunk} for chunk in chunk_ids(pending, settings.MAX_IDS_LENGTH, settings.MIRROR_BATCH_SIZE)]
+
+        tests = ((t['id'], build.id, get_id(t.get('environment')), get_id(t.get('suite')), get_id(t.get('test_run')),
+                  t.get('name'), t.get('status'))
+                 for filters in chunks for t in results('tests', Test, 'id,name,status,environment,suite,test_run', **filters))
+        metrics = ((m['id'], build.id, get_id(m.get('environment')), get_id(m.get('suite')), get_id(m.get('test_run')),
+                    m.get('name'), m.get('result'), m.get('unit'))
+                   for filters in chunks for m in results('metrics', Metric, 'id,name,result,unit,environment,suite,test_run', **filters))
+
+        with self.connection:
+            if finished:
+                for table in ['testruns', 'tests', 'metrics']:
+                    self.connection.execute('DELETE FROM %s WHERE build_id = ?' % table, (build.id,))
+            else:
+                for filters in chunks:
+                    ids = filters['test_run__id__in'].split(',')
+                    for table in ['tests', 'metrics']:
+                        self.connection.execute('DELETE FROM %s WHERE test_run_id IN (%s)' % (table, ','.join('?' * len(ids))), ids)
+
+            self.connection.executemany('INSERT OR REPLACE INTO testruns VALUES (?, ?, ?, ?, ?, ?, ?, ?)', testruns)
+            self.connection.executemany('INSERT OR REPLACE INTO tests VALUES (?, ?, ?, ?, ?, ?, ?)', tests)
+            self.connection.executemany('INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)', metrics)
+            self.connection.execute('INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                    (build.id, project_id, build.version, getattr(build, 'created_at', None),
+                                     getattr(build, 'datetime', None), finished, finished))
+
+    def completed_testruns(self, build_id):
+        """
+            Ids of test runs of `build_id` which were completed when mirrored
+        """
+
+        return {_id for _id, in self.connection.execute('SELECT id FROM testruns WHERE build_id = ? AND completed = 1', (build_id,))}
@@ -1,12 +1,24 @@
+import functools
 import json
+import os
 import uuid
-from itertools import groupby
-from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, groupby, islice
+from collections import OrderedDict, deque
 
 
 from .api import SquadApi, ApiException
-from squad_client.exceptions import InvalidSquadObject, InvalidSquadLookup
-from squad_client.utils import first, parse_test_name, parse_metric_name, to_json, get_class_name
+from .compact import compact_class
+from .deferred import Batch, page_fetch
+from .hydration import Hydrator, attribute_name
+from .pagination import Pagination
+from .queryset import QuerySet
+from .snapshot import Snapshot
+from .store import BuildStore
+from .table import TestsTable, MetricsTable
+from squad_client.exceptions import InvalidSquadObject, InvalidSquadLookup, SquadObjectException
+from squad_client.utils import chunk_ids, first, getid, parse_test_name, parse_metric_name, to_json, get_class_name
+from squad_client import codec
 from squad_client import settings
 from squad_client import logging
 
@@ -17,8 +29,18 @@ DEFAULT_COUNT = settings.DEFAULT_NUM_OF_OBJECTS
 ALL = -1
 
 
-class SquadObjectException(Exception):
-    pass
+class instance_or_class_method:
+    """
+        Method of objects also callable on the class, with an object bound to the
+        default client, e.g. both project.compare_builds() and Project.compare_builds()
+    """
+
+    def __init__(self, method):
+        self.method = method
+        functools.update_wrapper(self, method)
+
+    def __get__(self, obj, klass=None):
+        return functools.partial(self.method, obj if obj is not None else klass())
 
 
 class SquadObjectJSONEncoder(json.JSONEncoder):
@@ -26,7 +48,7 @@ class SquadObjectJSONEncoder(json.JSONEncoder):
         if isinstance(o, uuid.UUID):
             return str(o)
         elif isinstance(o, TestRunMetadata):
-            d = {k: v for k, v in o.__dict__.items() if k != "id"}
+            d = {k: v for k, v in o.__dict__.items() if k not in ["id", "__client__"]}
             return d
         else:
             return json.JSONEncoder.default(self, o)
@@ -36,12 +58,56 @@ class SquadObject:
     endpoint = None
     attrs = []
     types = None
+    hydrators = {}
+
+    # Named subsets of attrs to request instead of all of them, e.g. {'list': [...]}
+    # leaving out heavy fields when listing objects, see SquadObject.projection()
+    profiles = {}
+
+    # Heavy attributes which, when left out of `fields=`, are loaded on first access
+    # for all objects of the same page, see squad_client.core.deferred
+    deferred = ()
+
+    # Filter selecting objects by a list of ids, None where the endpoint has none
+    # (unknown filters are ignored by the API), see Squad.get_many
+    id_lookup = None
+
+    # Listings of the class use cursor pagination, which doesn't tell the number of objects
+    cursor_pagination = False
+
+    # Attributes holding urls of related objects, and their endpoints.
+    # Values of the ones in `many_relations` are lists of urls
+    relations = {}
+    many_relations = ()
+
+    # Objects of mapped classes are kept in the client's identity map, and relations
+    # to them can be resolved with SquadObject.related(), see squad_client.core.identity
+    mapped = False
+    mapped_classes = None
+
+    # SquadClient this object is bound to, SquadApi's default one is used when None
+    __client__ = None
+
+    def __init__(self, _id=None, client=None):
+        if client is not None:
+            self.__client__ = client
 
-    def __init__(self, _id=None):
         if _id:
             endpoint = f'{self.endpoint}{_id}'
             self.__fetch__(endpoint=endpoint)
 
+    @property
+    def __api__(self):
+        return self.__client__ or SquadApi
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set, deferred ones are loaded once for the whole batch
+        batch = self.__dict__.get('__batch__')
+        if batch is None or name not in self.deferred:
+            raise AttributeError("'%s' object has no attribute '%s'" % (get_class_name(self), name))
+        batch.load(name)
+        return self.__dict__[name]
+
     @classmethod
     def get_type(cls, _type):
         if SquadObject.types is None:
@@ -53,6 +119,92 @@ class SquadObject:
 
         return returned_type
 
+    @classmethod
+    def relation_class(cls, name):
+        """
+            Mapped class the `name` relation refers to
+        """
+
+        if SquadObject.mapped_classes is None:
+            SquadObject.mapped_classes = {c.endpoint: c for c in SquadObject.__subclasses__() if c.mapped}
+
+        klass = SquadObject.mapped_classes.get(cls.relations.get(name))
+        if klass is None:
+            raise SquadObjectException('%s.%s is not a relation to a mapped class' % (cls.__name__, name))
+        return klass
+
+    def related(self, name):
+        """
+            Object the `name` relation (e.g. "environment") refers to, taken from the client's
+            identity map and only fetched if it's not there yet. None if the relation is not set
+        """
+
+        value = getattr(self, name, None)
+        if value is None or isinstance(value, SquadObject):
+            return value
+
+        _id = getid(value)
+        return self.__resolve__(type(self).relation_class(name), [_id]).get(_id)
+
+    def resolve_relations(self, objects, *names):
+        """
+            Fetch what relations `names` of `objects` refer to and is not in the identity
+            map yet, at once for each related class, so that `related()` finds them all
+        """
+
+        objects = list(objects)
+        if not objects:
+            return
+
+        wanted = {}
+        for name in names:
+            klass = type(objects[0]).relation_class(name)
+            ids = wanted.setdefault(klass, set())
+            ids.update(getid(value) for value in (getattr(obj, name, None) for obj in objects) if isinstance(value, str))
+
+        for klass, ids in wanted.items():
+            self.__resolve__(klass, sorted(ids))
+
+    def __resolve__(self, klass, ids):
+        """
+            Objects of `klass` with `ids` by id, fetching the ones missing in the identity map at once
+        """
+
+        identity = self.__api__.identity
+        missing = identity.missing(klass, ids)
+        if missing:
+            Squad(client=self.__client__).get_many(klass, missing)
+        return {_id: identity.get(klass, _id) for _id in ids if identity.get(klass, _id) is not None}
+
+    def __register__(self, klass, filters, objects):
+        # Objects missing some fields would be handed out as if they were whole
+        if not getattr(klass, 'mapped', False) or 'fields' in filters:
+            return
+
+        identity = getattr(self.__api__, 'identity', None)
+        if identity is not None:
+            for obj in objects:
+                identity.put(obj)
+
+    @classmethod
+    def projection(cls, *attributes, profile=None):
+        """
+            Value of `fields=` requesting only `attributes` (plus the id), or the ones
+            of `profile`. Names which are not attributes of this class are left out
+        """
+
+        if profile is not None:
+            attributes = cls.profiles[profile]
+        wanted = set(attributes) | {'id'}
+        return ','.join(attr for attr in cls.attrs if attr in wanted)
+
+    @classmethod
+    def __hydrator__(cls):
+        hydrator = SquadObject.hydrators.get(cls)
+        if hydrator is None:
+            hydrator = SquadObject.hydrators[cls] = Hydrator(cls, initialize=cls.__init__ is not SquadObject.__init__)
+        return hydrator
+
     @property
     def __id__(self):
         if not hasattr(self, 'id'):
@@ -68,17 +220,26 @@ class SquadObject:
         if obj is None:
             obj = self
 
-        attrs = obj.attrs if len(obj.attrs) else [attr for attr in result.keys()]
-        for attr in attrs:
-            if attr in result.keys():
-                setattr(obj, attr.replace(' ', '_').replace('/', '_').replace('-', '_'), result[attr])
+        type(obj).__hydrator__().fill(obj, result)
+
+        # Hydrators only know attrs of the class, instances may add their own, e.g. Project.pre_save
+        attrs = obj.__dict__.get('attrs')
+        if attrs is not None:
+            for attr in attrs:
+                if attr in result and attr not in type(obj).attrs:
+                    setattr(obj, attribute_name(attr), result[attr])
+
+    def __object__(self, klass, result):
+        return klass.__hydrator__().build(result, self.__client__)
 
     def __fill__(self, klass, results):
 
+        build = klass.__hydrator__().build
+        client = self.__client__
+
         objects = {}
         for result in results:
-            obj = klass()
-            self.__fill_object__(result, obj)
+            obj = build(result, client)
             objects[obj.__id__] = obj
 
         return objects
@@ -87,7 +248,9 @@ class SquadObject:
         class_name = get_class_name(self)
         attrs_str = []
         for attr in self.attrs:
-            attrs_str.append('%s: "%s"' % (attr, getattr(self, attr) if hasattr(self, attr) else None))
+            # Printing objects should not load their deferred attributes
+            loaded = attr not in self.deferred or attr in self.__dict__
+            attrs_str.append('%s: "%s"' % (attr, getattr(self, attr) if loaded and hasattr(self, attr) else None))
 
         return '%s(%s)' % (class_name, ', '.join(attrs_str))
 
@@ -96,31 +259,162 @@ class SquadObject:
             Generic get method to retrieve objects from API
             count: number of objects to fetch, defaults to 50,
                       -1 (ALL) means follow pagination
+            workers: (passed in filters) number of threads fetching pages
+                     concurrently, defaults to 1 (follow "next" sequentially)
+            keyset: (passed in filters) walk results ordered by id, requesting
+                    `id__gt=<last id>` instead of growing offsets
+            immutable: (passed in filters) results will not change anymore and
+                       can be cached without expiration
+            stream: (passed in filters) decode results one at a time while reading
+                    each page, instead of decoding whole pages at once
+            compact: (passed in filters) return compact objects, see squad_client.core.compact,
+                     which can't be modified if `readonly` is also passed
         """
 
         if klass is None:
-            response = SquadApi.get(endpoint or self.endpoint)
-            result = response.json()
+            response = self.__api__.get(endpoint or self.endpoint)
+            result = codec.loads(response.content)
             self.__fill_object__(result)
+            self.__register__(type(self), {}, [self])
             return
 
-        if count == ALL:
-            count = settings.MAX_NUM_OF_OBJECTS
-
-        filters['limit'] = count if count < settings.SQUAD_MAX_PAGE_LIMIT else settings.SQUAD_MAX_PAGE_LIMIT
+        klass = self.__compact__(klass, filters)
         objects = {}
-        url = endpoint or klass.endpoint
-        while url and len(objects) < count:
-            response = SquadApi.get(url, filters)
-            result = response.json()
-            url = result['next']
-            objects.update(self.__fill__(klass, result['results']))
+        requests = []
+        for results in self.__pages__(klass, filters, count, endpoint, requests):
+            page = self.__fill__(klass, results)
+            self.__defer__(klass, filters, page.values(), page_fetch(self, *requests[-1]))
+            self.__register__(klass, filters, page.values())
+            objects.update(page)
 
         if len(objects) > settings.MAX_NUM_OF_OBJECTS:
             logger.warn('Maximum number of objects reached [%d]!' % len(objects))
 
         return objects
 
+    def __iterate__(self, klass, filters, count=ALL, endpoint=None):
+        """
+            Same as __fetch__, but yield objects as they are decoded instead
+            of collecting all of them in memory. Pages are streamed unless
+            `stream=False` is given. Objects are not kept in the identity map,
+            which would end up holding all of them
+        """
+
+        filters.setdefault('stream', True)
+        klass = self.__compact__(klass, filters)
+        requests = []
+        for results in self.__pages__(klass, filters, count, endpoint, requests):
+            batch = self.__defer__(klass, filters, [], page_fetch(self, *requests[-1]))
+            for result in results:
+                obj = self.__object__(klass, result)
+                if batch is not None:
+                    batch.add(obj)
+                yield obj
+
+    def __defer__(self, klass, filters, objects, fetch):
+        """
+            Batch of `objects`, fetched with `filters`, if their `fields` left out deferred
+            attributes of `klass`, loading them through `fetch`, see squad_client.core.deferred.
+            Objects added to it later join the same batch
+        """
+
+        fields = filters.get('fields')
+        if fields is None or not issubclass(klass, SquadObject):
+            return None
+
+        requested = fields.split(',') if isinstance(fields, str) else fields
+        if all(attr in requested for attr in klass.deferred):
+            return None
+
+        batch = Batch(klass, fetch)
+        for obj in objects:
+            batch.add(obj)
+        return batch
+
+    def __compact__(self, klass, filters):
+        """
+            Compact version of `klass` if asked for in `filters`, `klass` itself otherwise
+        """
+
+        compact = filters.pop('compact', False)
+        readonly = filters.pop('readonly', False)
+        if not compact:
+            return klass
+        if not klass.attrs:
+            raise SquadObjectException('There is no compact version of %s' % klass.__name__)
+        return compact_class(klass, readonly=readonly)
+
+    def __pages__(self, klass, filters, count, endpoint=None, requests=None):
+        """
+            Generator of pages of raw results from `endpoint` (or `klass.endpoint`),
+            streamed pages are iterators of results, see squad_client.core.pagination.
+            The url and parameters of each page are appended to `requests`, if given,
+            before it's yielded
+        """
+
+        pagination = Pagination(endpoint or klass.endpoint, filters, count)
+        request = pagination.request()
+        while request is not None:
+            url, params = request
+            if requests is not None:
+                requests.append(request)
+            response = self.__api__.get(url, params, immutable=pagination.immutable, stream=pagination.stream)
+            if pagination.stream:
+                # Consumers may stop early, the connection goes back to the pool either way
+                try:
+                    envelope = {}
+                    page = self.__stream_page__(response, envelope)
+                    yield page
+                    deque(page, maxlen=0)  # whatever was left unread, "next" may come after it
+                finally:
+                    response.close()
+            else:
+                envelope = Pagination.envelope(codec.loads(response.content))
+                yield envelope['results']
+
+            pagination.advance(envelope)
+            request = pagination.request()
+
+        if pagination.offsets:
+            yield from self.__concurrent_pages__(pagination, requests)
+
+    def __stream_page__(self, response, envelope):
+        """
+            Yield results of a page as they're decoded from `response`. Once done, `envelope`
+            holds the other keys of the page ("count", "next", ...), the number of results
+            and the last one
+        """
+
+        envelope.update({'num_results': 0, 'last': None})
+        chunks = response.iter_content(settings.STREAM_CHUNK_SIZE)
+        for result in codec.iterload(chunks, key='results', envelope=envelope):
+            envelope['num_results'] += 1
+            envelope['last'] = result
+            yield result
+
+    def __concurrent_pages__(self, pagination, requests=None):
+        """
+            Fetch the pages left by `pagination` using its number of workers as threads,
+            yielding pages in order. At most that many pages are held at a time
+        """
+
+        offsets = iter(pagination.offsets)
+        yielded = iter(pagination.offsets)
+
+        def fetch_page(offset):
+            url, params = pagination.page(offset)
+            return codec.loads(self.__api__.get(url, params, immutable=pagination.immutable).content)['results']
+
+        with ThreadPoolExecutor(max_workers=pagination.workers) as executor:
+            pending = deque(executor.submit(fetch_page, offset) for offset in islice(offsets, pagination.workers))
+            while pending:
+                results = pending.popleft().result()
+                for offset in islice(offsets, 1):
+                    pending.append(executor.submit(fetch_page, offset))
+                if requests is not None:
+                    requests.append(pagination.page(next(yielded)))
+                yield results
+
     def get(self, _id):
         count = 1
         result = self.__fetch__(self.__class__, {'id': _id}, count)
@@ -159,17 +453,17 @@ class SquadObject:
                 data[attr] = value
 
         endpoint = self.endpoint
-        request = SquadApi.post
+        request = self.__api__.post
         if hasattr(self, 'id') and type(self.id) is not uuid.UUID:
             endpoint = '%s%s/' % (endpoint, self.id)
-            request = SquadApi.patch
+            request = self.__api__.patch
 
         try:
             response = request(endpoint, data=data)
             if response.status_code in [400, 401, 405]:
                 raise SquadObjectException('Failed to save %s: %s' % (class_name, response.text))
 
-            self.__fill_object__(response.json())
+            self.__fill_object__(codec.loads(response.content))
             self.post_save()
 
         except ApiException as e:
@@ -185,7 +479,7 @@ class SquadObject:
         endpoint = '%s%s/' % (self.endpoint, self.id)
 
         try:
-            response = SquadApi.delete(endpoint)
+            response = self.__api__.delete(endpoint)
             if response.status_code in [400, 401, 405]:
                 raise SquadObjectException('Failed to delete %s: %s' % (class_name, response.text))
 
@@ -197,10 +491,43 @@ class SquadObject:
 class Squad(SquadObject):
 
     def fetch(self, klass, count=ALL, **filters):
-        return self.__fetch__(klass, filters, count)
+        return QuerySet(self, klass, filters, count)
+
+    def iter(self, klass, count=ALL, **filters):
+        return self.__iterate__(klass, filters, count)
+
+    def get_many(self, klass, ids, workers=None, **filters):
+        """
+            Objects of `klass` with the given `ids`, in the same order, leaving out ids with
+            no object. Ids are requested in chunks of "id__in" filters short enough to fit in
+            urls, `workers` (defaults to settings.GET_MANY_WORKERS) chunks at a time. Other
+            `filters` (e.g. fields, compact) apply to every chunk
+        """
+
+        lookup = klass.id_lookup
+        if lookup is None:
+            raise SquadObjectException('%s can not be fetched by id, there is no id filter of %s' % (klass.__name__, klass.endpoint))
+
+        ids = list(OrderedDict.fromkeys(int(_id) for _id in ids))
+        chunks = chunk_ids(ids, settings.MAX_IDS_LENGTH, settings.SQUAD_MAX_PAGE_LIMIT)
+
+        def fetch(chunk):
+            chunk_filters = dict(filters)
+            chunk_filters[lookup] = chunk
+            objects = self.__fetch__(klass, chunk_filters, chunk.count(',') + 1)
+            if not set(objects) <= set(int(_id) for _id in chunk.split(',')):
+                raise SquadObjectException('%s ignored the %s filter' % (klass.endpoint, lookup))
+            return objects
+
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=workers or settings.GET_MANY_WORKERS) as executor:
+            for objects in executor.map(fetch, chunks):
+                fetched.update(objects)
+
+        return OrderedDict((_id, fetched[_id]) for _id in ids if _id in fetched)
 
     def groups(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(Group, filters, count)
+        return QuerySet(self, Group, filters, count)
 
     def group(self, slug, **filters):
         filters.update({'slug': slug})
@@ -208,56 +535,66 @@ class Squad(SquadObject):
         return first(objects)
 
     def projects(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(Project, filters, count)
+        return QuerySet(self, Project, filters, count)
 
     def builds(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(Build, filters, count)
+        return QuerySet(self, Build, filters, count)
 
     def testjobs(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(TestJob, filters, count)
+        return QuerySet(self, TestJob, filters, count)
 
     def testruns(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(TestRun, filters, count)
+        return QuerySet(self, TestRun, filters, count)
 
     def tests(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(Test, filters, count)
+        return QuerySet(self, Test, filters, count)
 
     def metrics(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(Metric, filters, count)
+        return QuerySet(self, Metric, filters, count)
 
     def suites(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(Suite, filters, count)
+        return QuerySet(self, Suite, filters, count)
 
     def environments(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(Environment, filters, count)
+        return QuerySet(self, Environment, filters, count)
 
     def backends(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(Backend, filters, count)
+        return QuerySet(self, Backend, filters, count)
 
     def emailtemplates(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(EmailTemplate, filters, count)
+        return QuerySet(self, EmailTemplate, filters, count)
 
     def knownissues(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(KnownIssue, filters, count)
+        return QuerySet(self, KnownIssue, filters, count)
 
     def suitemetadata(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(SuiteMetadata, filters, count)
+        return QuerySet(self, SuiteMetadata, filters, count)
 
     def annotations(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(Annotation, filters, count)
+        return QuerySet(self, Annotation, filters, count)
 
     def metricthresholds(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(MetricThreshold, filters, count)
+        return QuerySet(self, MetricThreshold, filters, count)
 
     def reports(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(Report, filters, count)
+        return QuerySet(self, Report, filters, count)
 
     def statuses(self, count=DEFAULT_COUNT, **filters):
-        return self.__fetch__(TestRunStatus, filters, count)
+        return QuerySet(self, TestRunStatus, filters, count)
 
     def submit(self, group=None, project=None, build=None, environment=None,
                tests=None, metrics=None, metadata=None, log=None, attachments=None):
 
+        path, data, files = self.__submission__(group, project, build, environment, tests, metrics, metadata, log, attachments)
+        response = self.__api__.post(path, data=data, files=files)
+        status_code = response.status_code
+        if status_code not in [200, 201, 500]:
+            logger.error('Failed to submit results: %s' % response.text)
+        return response.ok, response.text
+
+    def __submission__(self, group=None, project=None, build=None, environment=None,
+                       tests=None, metrics=None, metadata=None, log=None, attachments=None):
+
         path = '/api/submit/%s/%s/%s/%s' % (group.slug, project.slug, build.version, environment.slug)
         num_tests = 0
         num_metrics = 0
@@ -279,7 +616,7 @@ class Squad(SquadObject):
             num_metrics = len(metrics_dict)
             data['metrics'] = to_json(metrics_dict)
         if metadata:
-            data['metadata'] = json.dumps(metadata, cls=SquadObjectJSONEncoder)
+            data['metadata'] = codec.dumps(metadata, default=SquadObjectJSONEncoder().default)
         if log:
             data['log'] = log
 
@@ -290,11 +627,7 @@ class Squad(SquadObject):
                 filename = attachment.filename
                 files.append(('attachment', (filename, open(filename, 'rb').read())))
 
-        response = SquadApi.post(path, data=data, files=files)
-        status_code = response.status_code
-        if status_code not in [200, 201, 500]:
-            logger.error('Failed to submit results: %s' % response.text)
-        return response.ok, response.text
+        return path, data, files
 
     def submitjob(self, group=None, project=None, build=None, environment=None,
                   backend=None, definition=None):
@@ -308,7 +641,7 @@ class Squad(SquadObject):
 
         logger.info('Submitting job request %s' % (path))
 
-        response = SquadApi.post(path, data=data)
+        response = self.__api__.post(path, data=data)
         status_code = response.status_code
         if status_code not in [200, 201, 500]:
             logger.error('Failed to submit job request: %s' % response.text)
@@ -332,7 +665,7 @@ class Squad(SquadObject):
         if delay_fetch:
             params['delay_fetch'] = 'true'
 
-        response = SquadApi.post(path, params=params, data=data)
+        response = self.__api__.post(path, params=params, data=data)
         status_code = response.status_code
         if status_code not in [200, 201, 500]:
             logger.error('Failed to watch job: %s' % response.text)
@@ -342,11 +675,13 @@ class Squad(SquadObject):
 class Group(SquadObject):
 
     endpoint = '/api/groups/'
+    id_lookup = 'id__in'
     attrs = ['id', 'url', 'slug', 'name', 'description']
+    mapped = True
 
     def projects(self, count=DEFAULT_COUNT, **filters):
         filters.update({'group': self.id})
-        return self.__fetch__(Project, filters, count)
+        return QuerySet(self, Project, filters, count)
 
     def project(self, slug):
         filters = {'slug': slug}
@@ -354,7 +689,7 @@ class Group(SquadObject):
         return first(objects)
 
     def create_project(self, slug=None, plugins_list=None):
-        new_project = Project()
+        new_project = Project(client=self.__client__)
         new_project.slug = slug
         new_project.group = self
         new_project.enabled_plugins_list = plugins_list or ['linux-log-parser']
@@ -367,15 +702,22 @@ class Group(SquadObject):
 class Project(SquadObject):
 
     endpoint = '/api/projects/'
+    id_lookup = 'id__in'
     attrs = ['id', 'custom_email_template', 'data_retention_days', 'description',
              'enabled_plugins_list', 'full_name', 'group', 'html_mail', 'important_metadata_keys',
              'is_archived', 'is_public', 'moderate_notifications', 'name', 'notification_timeout',
              'slug', 'url', 'wait_before_notification', 'force_finishing_builds_on_timeout',
              'build_confidence_count', 'build_confidence_threshold', 'datetime']
+    relations = {'group': '/api/groups/'}
+    mapped = True
 
     def builds(self, count=DEFAULT_COUNT, **filters):
         filters.update({'project': self.id})
-        return self.__fetch__(Build, filters, count)
+        return QuerySet(self, Build, filters, count)
+
+    def iter_builds(self, count=ALL, **filters):
+        filters.update({'project': self.id})
+        return self.__iterate__(Build, filters, count)
 
     def build(self, version):
         filters = {'version': version}
@@ -384,7 +726,7 @@ class Project(SquadObject):
 
     def environments(self, count=DEFAULT_COUNT, **filters):
         filters.update({'project': self.id})
-        return self.__fetch__(Environment, filters, count)
+        return QuerySet(self, Environment, filters, count)
 
     def environment(self, slug):
         filters = {'slug': slug}
@@ -393,7 +735,7 @@ class Project(SquadObject):
 
     def suites(self, count=DEFAULT_COUNT, **filters):
         filters.update({'project': self.id})
-        return self.__fetch__(Suite, filters, count)
+        return QuerySet(self, Suite, filters, count)
 
     def suite(self, suite_slug):
         filters = {'slug': suite_slug}
@@ -402,32 +744,34 @@ class Project(SquadObject):
 
     def thresholds(self, count=DEFAULT_COUNT, **filters):
         filters.update({'project': self.id})
-        return self.__fetch__(MetricThreshold, filters, count)
+        return QuerySet(self, MetricThreshold, filters, count)
 
     def __repr__(self):
         return self.slug
 
-    @staticmethod
-    def compare_builds(baseline_id, build_id, by="tests", force=False):
+    @instance_or_class_method
+    def compare_builds(self, baseline_id, build_id, by="tests", force=False):
         try:
-            int(baseline_id)
-            int(build_id)
+            ids = [int(baseline_id), int(build_id)]
         except ValueError:
             raise ValueError("IDs must be valid integers")
-        baseline = Build(baseline_id)
-        to_compare = Build(build_id)
-        if baseline.id and to_compare.id:
-            proj_id = baseline.project.split("/")[-2]
-            if proj_id != to_compare.project.split("/")[-2]:
-                raise InvalidSquadLookup("Argument builds must belong to same project")
-            url = ''.join([Project.endpoint, str(proj_id), '/compare_builds'])
-            params = {'baseline': baseline_id, 'to_compare': build_id, 'by': by}
-            if force:
-                params['force'] = '1'
-            return SquadApi.get(url, params).json()
+        builds = self.__fetch__(Build, {'id__in': ','.join(str(_id) for _id in ids), 'fields': 'id,project'}, len(ids))
+        for _id in ids:
+            if _id not in builds:
+                raise InvalidSquadLookup("There is no build with id %s" % _id)
+        proj_id = builds[ids[0]].project.split("/")[-2]
+        if proj_id != builds[ids[1]].project.split("/")[-2]:
+            raise InvalidSquadLookup("Argument builds must belong to same project")
+        url = ''.join([Project.endpoint, str(proj_id), '/compare_builds'])
+        params = {'baseline': baseline_id, 'to_compare': build_id, 'by': by}
+        if force:
+            params['force'] = '1'
+        return codec.loads(self.__api__.get(url, params).content)
 
     def pre_save(self):
-        self.attrs.append('project_settings')
+        # copy class-level attrs so other instances are unaffected
+        if 'project_settings' not in self.attrs:
+            self.attrs = self.attrs + ['project_settings']
 
         if not hasattr(self, 'enabled_plugins_list'):
             # TODO: make enabled_plugins_list optional
@@ -439,8 +783,8 @@ class Project(SquadObject):
     def basic_settings(self):
         if self.__basic_settings__ is None:
             endpoint = '%s%d/basic_settings' % (self.endpoint, self.id)
-            response = SquadApi.get(endpoint)
-            objects = self.__fill__(ProjectBasicSettings, [response.json()])
+            response = self.__api__.get(endpoint)
+            objects = self.__fill__(ProjectBasicSettings, [codec.loads(response.content)])
             self.__basic_settings__ = first(objects)
         return self.__basic_settings__
 
@@ -452,28 +796,170 @@ class ProjectBasicSettings(SquadObject):
 class Build(SquadObject):
 
     endpoint = '/api/builds/'
+    id_lookup = 'id__in'
     attrs = ['url', 'id', 'finished', 'is_release',
              'version', 'created_at', 'datetime', 'patch_id', 'keep_data', 'project',
              'patch_source', 'patch_baseline']
+    relations = {'project': '/api/projects/'}
+    mapped = True
+
+    @property
+    def immutable(self):
+        # Results of finished builds are not expected to change
+        return getattr(self, 'finished', False) is True
+
+    def __stored__(self, key, fetch):
+        """
+            Results of finished builds are read from the client's store, if any,
+            `fetch` is only called when `key` is not stored yet
+        """
+
+        store = self.__api__.store if self.immutable else None
+        if store is None:
+            return fetch()
+
+        value = store.get(self.id, key)
+        if value is None:
+            value = fetch()
+            if value is not None:
+                store.put(self.id, key, value)
+        return value
+
+    def __fetch_stored__(self, name, klass, filters, count, endpoint=None):
+        klass = self.__compact__(klass, filters)
+        if not self.immutable or self.__api__.store is None:
+            return self.__fetch__(klass, filters, count, endpoint=endpoint)
+
+        fetch = self.__stored_fields__(name, klass, filters, count, endpoint)
+        objects = self.__fill__(klass, self.__results__(name, klass, filters, count, endpoint))
+        self.__defer__(klass, filters, objects.values(), fetch)
+        return objects
+
+    def __stored_fields__(self, name, klass, filters, count, endpoint=None):
+        # There are no pages to request again, deferred fields are read (and stored) the same way
+        given = dict(filters)
+
+        def fetch(field):
+            return self.__results__(name, klass, dict(given, fields='id,%s' % field), count, endpoint)
+        return fetch
+
+    def __iterate_stored__(self, name, klass, filters, count, endpoint=None):
+        if not self.immutable or self.__api__.store is None:
+            return self.__iterate__(klass, filters, count, endpoint=endpoint)
+
+        klass = self.__compact__(klass, filters)
+        fetch = self.__stored_fields__(name, klass, filters, count, endpoint)
+
+        def iterate(results):
+            # A batch per page worth of results, as __iterate__ does, so iterated objects can be freed
+            batch = None
+            for n, result in enumerate(results):
+                if n % settings.SQUAD_MAX_PAGE_LIMIT == 0:
+                    batch = self.__defer__(klass, filters, [], fetch)
+                obj = self.__object__(klass, result)
+                if batch is not None:
+                    batch.add(obj)
+                yield obj
+        return iterate(self.__results__(name, klass, filters, count, endpoint))
+
+    def __stored_fetch__(self, name):
+        """
+            __fetch__ of QuerySets of `name` (e.g. "tests"), reading from the store for finished builds
+        """
+
+        def fetch(klass, filters, count, endpoint=None):
+            return self.__fetch_stored__(name, klass, filters, count, endpoint=endpoint)
+        return fetch
+
+    def __stored_iterate__(self, name):
+        """
+            __iterate__ of QuerySets of `name`, same as __stored_fetch__
+        """
+
+        def iterate(klass, filters, count, endpoint=None):
+            return self.__iterate_stored__(name, klass, filters, count, endpoint=endpoint)
+        return iterate
+
+    def __results__(self, name, klass, filters, count, endpoint=None):
+        """
+            Generator of raw results, read from the store for finished builds,
+            or streamed from `endpoint` otherwise
+        """
+
+        if not self.immutable or self.__api__.store is None:
+            filters.setdefault('stream', True)
+            for page in self.__pages__(klass, filters, count, endpoint):
+                yield from page
+            return
+
+        key = BuildStore.key(name, dict(filters, count=count))
+        yield from self.__stored__(key, lambda: [r for page in self.__pages__(klass, filters, count, endpoint) for r in page])
+
+    def results(self, name, count=ALL, **filters):
+        """
+            Generator of raw results (dicts, as the API returns them) of `name`, "tests" or
+            "metrics", without building objects. Results of finished builds are read from
+            the store, if any
+        """
+
+        klass = {'tests': Test, 'metrics': Metric}[name]
+        endpoint = '%s%d/%s/' % (self.endpoint, self.id, name)
+        filters.setdefault('immutable', self.immutable)
+        return self.__results__(name, klass, filters, count, endpoint)
 
     def testruns(self, count=ALL, bucket_suites=False, prefetch_metadata=False, **filters):
         filters.update({'build': self.id})
-        testruns = self.__fetch__(TestRun, filters, count)
+        filters.setdefault('immutable', self.immutable)
+
+        def fetch(klass, filters, count, endpoint=None):
+            return self.__testruns__(klass, filters, count, bucket_suites, prefetch_metadata)
+        return QuerySet(self, TestRun, filters, count, fetch=fetch)
+
+    def __testruns__(self, klass, filters, count, bucket_suites, prefetch_metadata):
+        testruns = self.__fetch_stored__('testruns', klass, filters, count)
 
         if bucket_suites:
             for _id in testruns.keys():
                 testruns[_id].bucket_metric_and_test_suites()
 
         if prefetch_metadata:
-            endpoint = '%s%d/metadata_by_testrun' % (self.endpoint, self.id)
-            response = SquadApi.get(endpoint)
-            if response.text != "None":
-                metadata_by_testrun = response.json()
-                for testrun_id in testruns.keys():
-                    testruns[testrun_id].metadata = metadata_by_testrun[str(testrun_id)]
+            for testrun_id, metadata in self.__metadata_by_testrun__():
+                testrun = testruns.get(int(testrun_id))
+                if testrun is not None:
+                    testrun.metadata = metadata
 
         return testruns
 
+    def __metadata_by_testrun__(self):
+        """
+            Pairs of (testrun id, metadata) of this build. Unless they come from
+            the store, they're decoded one testrun at a time as the response is read
+        """
+
+        endpoint = '%s%d/metadata_by_testrun' % (self.endpoint, self.id)
+        if self.immutable and self.__api__.store is not None:
+            def fetch():
+                response = self.__api__.get(endpoint, immutable=self.immutable)
+                return codec.loads(response.content) if response.text != "None" else None
+
+            return (self.__stored__('metadata_by_testrun', fetch) or {}).items()
+
+        def stream():
+            response = self.__api__.get(endpoint, immutable=self.immutable, stream=True)
+            try:
+                chunks = response.iter_content(settings.STREAM_CHUNK_SIZE)
+                first_chunk = next(chunks, b'')
+                if first_chunk.strip() != b'None':
+                    yield from codec.iterload(chain([first_chunk], chunks))
+            finally:
+                response.close()
+        return stream()
+
+    def iter_testruns(self, count=ALL, **filters):
+        filters.update({'build': self.id})
+        filters.setdefault('immutable', self.immutable)
+        return self.__iterate__(TestRun, filters, count)
+
     # this _ testjobs__ attribute is for getting the TestJob objects for this Build
     __testjobs__ = None
 
@@ -485,7 +971,7 @@ class Build(SquadObject):
         filters_str = str(OrderedDict(filters))
         if self.__testjobs__.get(filters_str) is None:
             endpoint = '%s%d/testjobs/' % (self.endpoint, self.id)
-            self.__testjobs__[filters_str] = self.__fetch__(TestJob, filters, count, endpoint=endpoint)
+            self.__testjobs__[filters_str] = QuerySet(self, TestJob, filters, count, endpoint=endpoint)
         return self.__testjobs__[filters_str]
 
     __tests__ = None
@@ -498,9 +984,71 @@ class Build(SquadObject):
         filters_str = str(OrderedDict(filters))
         if self.__tests__.get(filters_str) is None:
             endpoint = '%s%d/tests/' % (self.endpoint, self.id)
-            self.__tests__[filters_str] = self.__fetch__(Test, filters, count, endpoint=endpoint)
+            filters.setdefault('immutable', self.immutable)
+            self.__tests__[filters_str] = QuerySet(self, Test, filters, count, endpoint=endpoint, fetch=self.__stored_fetch__('tests'),
+                                                   iterate=self.__stored_iterate__('tests'))
         return self.__tests__[filters_str]
 
+    def iter_tests(self, count=ALL, **filters):
+        endpoint = '%s%d/tests/' % (self.endpoint, self.id)
+        filters.setdefault('immutable', self.immutable)
+        return self.__iterate_stored__('tests', Test, filters, count, endpoint=endpoint)
+
+    def snapshot(self, filename=None):
+        """
+            Snapshot of this build saved in `filename`, or by default where `squad-client snapshot`
+            saves it, None if there is none. Snapshots of builds which are not finished are
+            not trusted, results may have changed since. See squad_client.core.snapshot
+        """
+
+        if not self.immutable:
+            return None
+
+        filename = filename or self.__snapshot_path__()
+        if not os.path.exists(filename):
+            return None
+        return Snapshot(filename)
+
+    def save_snapshot(self, filename=None):
+        """
+            Save tests and metrics of this build into a snapshot at `filename`, by default
+            in the client's store (or the default one). Return where it was saved.
+            Only finished builds have snapshots, results of others may still change
+        """
+
+        if not self.immutable:
+            raise SquadObjectException('Build %s is not finished, its results may still change' % self.version)
+
+        filename = filename or self.__snapshot_path__()
+
+        project = {'project': getid(self.project)}
+        environments = self.__fetch__(Environment, dict(project), ALL)
+        suites = self.__fetch__(Suite, dict(project), ALL)
+        # Any filter keeps tables from being read from an existing snapshot
+        tests = self.tests_table(immutable=self.immutable)
+        metrics = self.metrics_table(immutable=self.immutable)
+        Snapshot.write(filename, self, tests, metrics, environments, suites)
+        return filename
+
+    def __snapshot_path__(self):
+        store = self.__api__.store or BuildStore(self.__api__.url, token=self.__api__.token)
+        return store.snapshot_path(self.id)
+
+    def tests_table(self, **filters):
+        """
+            All tests of this build as a TestsTable, see squad_client.core.table. Needs numpy.
+            Without filters, they're mapped from the build's snapshot when it's finished and has one
+        """
+
+        snapshot = None if filters else self.snapshot()
+        if snapshot is not None:
+            return snapshot.tests
+
+        endpoint = '%s%d/tests/' % (self.endpoint, self.id)
+        filters.setdefault('fields', ','.join(TestsTable.fields))
+        filters.setdefault('immutable', self.immutable)
+        return TestsTable.from_results(self.__results__('tests', Test, filters, ALL, endpoint))
+
     __metrics__ = None
 
     def metrics(self, count=ALL, **filters):
@@ -511,9 +1059,31 @@ class Build(SquadObject):
         filters_str = str(OrderedDict(filters))
         if self.__metrics__.get(filters_str) is None:
             endpoint = '%s%d/metrics/' % (self.endpoint, self.id)
-            self.__metrics__[filters_str] = self.__fetch__(Metric, filters, count, endpoint=endpoint)
+            filters.setdefault('immutable', self.immutable)
+            self.__metrics__[filters_str] = QuerySet(self, Metric, filters, count, endpoint=endpoint, fetch=self.__stored_fetch__('metrics'),
+                                                     iterate=self.__stored_iterate__('metrics'))
         return self.__metrics__[filters_str]
 
+    def iter_metrics(self, count=ALL, **filters):
+        endpoint = '%s%d/metrics/' % (self.endpoint, self.id)
+        filters.setdefault('immutable', self.immutable)
+        return self.__iterate_stored__('metrics', Metric, filters, count, endpoint=endpoint)
+
+    def metrics_table(self, **filters):
+        """
+            All metrics of this build as a MetricsTable, see squad_client.core.table. Needs numpy.
+            Without filters, they're mapped from the build's snapshot when it's finished and has one
+        """
+
+        snapshot = None if filters else self.snapshot()
+        if snapshot is not None:
+            return snapshot.metrics
+
+        endpoint = '%s%d/metrics/' % (self.endpoint, self.id)
+        filters.setdefault('fields', ','.join(MetricsTable.fields))
+        filters.setdefault('immutable', self.immutable)
+        return MetricsTable.from_results(self.__results__('metrics', Metric, filters, ALL, endpoint))
+
     __metadata__ = None
     __status__ = None
 
@@ -521,8 +1091,8 @@ class Build(SquadObject):
     def metadata(self):
         if self.__metadata__ is None:
             endpoint = '%s%d/metadata' % (self.endpoint, self.id)
-            response = SquadApi.get(endpoint)
-            objects = self.__fill__(BuildMetadata, [response.json()])
+            metadata = self.__stored__('metadata', lambda: codec.loads(self.__api__.get(endpoint, immutable=self.immutable).content))
+            objects = self.__fill__(BuildMetadata, [metadata])
             self.__metadata__ = first(objects)
         return self.__metadata__
 
@@ -530,8 +1100,8 @@ class Build(SquadObject):
     def status(self):
         if self.__status__ is None:
             endpoint = '%s%d/status' % (self.endpoint, self.id)
-            response = SquadApi.get(endpoint)
-            objects = self.__fill__(BuildStatus, [response.json()])
+            response = self.__api__.get(endpoint)
+            objects = self.__fill__(BuildStatus, [codec.loads(response.content)])
             self.__status__ = first(objects)
         return self.__status__
 
@@ -539,7 +1109,7 @@ class Build(SquadObject):
         logger.info('Registering callback "%s" to build %s (record response: %s)' % (url, self.version, record_response))
 
         endpoint = '%s%d/callbacks/' % (self.endpoint, self.id)
-        response = SquadApi.post(endpoint, data={
+        response = self.__api__.post(endpoint, data={
             'callback_url': url,
             'callback_record_response': record_response,
         })
@@ -563,14 +1133,17 @@ class BuildStatus(SquadObject):
 class TestJob(SquadObject):
 
     endpoint = '/api/testjobs/'
+    id_lookup = 'id__in'
+    cursor_pagination = True
     attrs = ['url', 'id', 'external_url', 'definition', 'name', 'environment', 'created_at',
              'submitted_at', 'fetched_at', 'submitted', 'fetched', 'fetch_attempts',
              'last_fetch_attempt', 'failure', 'can_resubmit', 'resubmitted_count',
              'job_id', 'job_status', 'backend', 'testrun', 'target', 'target_build',
              'parent_job', 'started_at', 'ended_at']
+    deferred = ('definition',)
 
     def submit(self):
-        squad = Squad()
+        squad = Squad(client=self.__client__)
         return squad.submitjob(
             group=self.target.group,
             project=self.target,
@@ -580,7 +1153,7 @@ class TestJob(SquadObject):
             definition=self.definition,)
 
     def watch(self, delay_fetch=False):
-        squad = Squad()
+        squad = Squad(client=self.__client__)
         return squad.watchjob(
             group=self.target.group,
             project=self.target,
@@ -596,7 +1169,7 @@ class TestJob(SquadObject):
 
     def cancel(self):
         endpoint = '%s%d/cancel/' % (self.endpoint, self.id)
-        response = SquadApi.post(endpoint)
+        response = self.__api__.post(endpoint)
         return response.status_code == 200
 
 
@@ -616,11 +1189,17 @@ class MetricSuite:
 
 class Metric(SquadObject):
     endpoint = '/api/metrics/'
+    cursor_pagination = True
     attrs = ['url', 'id', 'name', 'short_name', 'measurement_list', 'result', 'unit', 'is_outlier', 'test_run', 'suite', 'metadata', 'build', 'environment']
+    relations = {'test_run': '/api/testruns/', 'suite': '/api/suites/', 'metadata': '/api/suitemetadata/',
+                 'build': '/api/builds/', 'environment': '/api/environments/'}
+    profiles = {'list': ['url', 'id', 'name', 'short_name', 'result', 'unit', 'is_outlier', 'test_run', 'suite', 'build', 'environment']}
+    deferred = ('measurement_list',)
 
 
 class TestRunStatus(SquadObject):
     endpoint = '/api/statuses/'
+    cursor_pagination = True
     attrs = ['url', 'id', 'tests_pass', 'tests_fail', 'tests_xfail',
              'tests_skip', 'metrics_summary', 'has_metrics',
              'suite']
@@ -645,7 +1224,8 @@ class TestRunAttachment(SquadObject):
 
     attrs = ['download_url', 'filename', 'length', 'mimetype']
 
-    def __init__(self, attachment):
+    def __init__(self, attachment, client=None):
+        super().__init__(client=client)
 
         # this class can be used for both uploading and loading attachments
         # for uploading, `attachment` is a string with the file path to be uploaded
@@ -660,7 +1240,7 @@ class TestRunAttachment(SquadObject):
             return None
 
         logger.info('Downloading attachment from %s' % self.download_url)
-        response = SquadApi.get(self.download_url)
+        response = self.__api__.get(self.download_url)
         if response.status_code != 200:
             return None
         return response.content
@@ -669,22 +1249,25 @@ class TestRunAttachment(SquadObject):
 class TestRun(SquadObject):
 
     endpoint = '/api/testruns/'
+    id_lookup = 'id__in'
+    cursor_pagination = True
     attrs = ['url', 'id', 'metadata_file', 'log_file',
              'created_at', 'completed', 'datetime', 'build_url',
              'job_id', 'job_status', 'job_url', 'resubmit_url',
              'data_processed', 'status_recorded', 'build',
              'environment', 'attachments']
+    relations = {'build': '/api/builds/', 'environment': '/api/environments/'}
 
     log = None
 
-    def __init__(self, _id=None):
+    def __init__(self, _id=None, client=None):
         self.__attachments__ = []
         self.__metadata__ = None
         self.__metrics__ = None
         self.__tests__ = None
         self.test_suites = None
         self.metric_suites = None
-        super().__init__(_id)
+        super().__init__(_id, client=client)
 
     def add_test(self, test):
         if self.__tests__ is None:
@@ -711,12 +1294,12 @@ class TestRun(SquadObject):
     @property
     def metadata(self):
         if self.__metadata__ is None:
-            response = SquadApi.get(self.metadata_file)
+            response = self.__api__.get(self.metadata_file)
 
             if response.text == "None":
                 self.__metadata__ = None
             else:
-                objects = self.__fill__(TestRunMetadata, [response.json()])
+                objects = self.__fill__(TestRunMetadata, [codec.loads(response.content)])
                 self.__metadata__ = first(objects)
 
         return self.__metadata__
@@ -734,7 +1317,7 @@ class TestRun(SquadObject):
     def attachments(self, attachments):
         if attachments:
             for attachment in attachments:
-                self.__attachments__.append(TestRunAttachment(attachment))
+                self.__attachments__.append(TestRunAttachment(attachment, client=self.__client__))
 
     def bucket_metric_and_test_suites(self):
         all_tests = self.tests()
@@ -757,7 +1340,7 @@ class TestRun(SquadObject):
                 self.metric_suites.append(metric_suite)
 
     def submit_results(self):
-        squad = Squad()
+        squad = Squad(client=self.__client__)
         return squad.submit(
             group=self.build.project.group,
             project=self.build.project,
@@ -777,15 +1360,21 @@ class TestRun(SquadObject):
         return self.__summary__
 
     def statuses(self, count=ALL, **filters):
-        TestRunStatus.endpoint = '/'.join([TestRun.endpoint[:-1], str(self.id), 'status'])
-        return self.__fetch__(TestRunStatus, filters, count)
+        endpoint = '%s%d/status/' % (self.endpoint, self.id)
+        return self.__fetch__(TestRunStatus, filters, count, endpoint=endpoint)
 
 
 class Test(SquadObject):
 
     endpoint = '/api/tests/'
+    cursor_pagination = True
     attrs = ['url', 'id', 'name', 'short_name', 'status', 'result', 'test_run', 'log', 'has_known_issues',
              'suite', 'known_issues', 'build', 'environment', 'metadata']
+    relations = {'test_run': '/api/testruns/', 'suite': '/api/suites/', 'known_issues': '/api/knownissues/',
+                 'build': '/api/builds/', 'environment': '/api/environments/', 'metadata': '/api/suitemetadata/'}
+    many_relations = ('known_issues',)
+    profiles = {'list': ['url', 'id', 'name', 'short_name', 'status', 'result', 'test_run', 'has_known_issues', 'suite', 'build', 'environment']}
+    deferred = ('log',)
 
     def __repr__(self):
         return self.short_name
@@ -794,7 +1383,10 @@ class Test(SquadObject):
 class Suite(SquadObject):
 
     endpoint = '/api/suites/'
+    id_lookup = 'id__in'
     attrs = ['url', 'id', 'slug', 'name', 'project']
+    relations = {'project': '/api/projects/'}
+    mapped = True
 
     __tests__ = None
 
@@ -816,7 +1408,10 @@ class Suite(SquadObject):
 class Environment(SquadObject):
 
     endpoint = '/api/environments/'
+    id_lookup = 'id__in'
     attrs = ['url', 'id', 'slug', 'name', 'expected_test_runs', 'description', 'project']
+    relations = {'project': '/api/projects/'}
+    mapped = True
 
     def __repr__(self):
         return self.slug
@@ -838,12 +1433,15 @@ class EmailTemplate(SquadObject):
 class KnownIssue(SquadObject):
 
     endpoint = '/api/knownissues/'
+    id_lookup = 'id__in'
     attrs = ['url', 'id', 'title', 'test_name', 'notes', 'active', 'intermittent', 'environments']
 
 
 class SuiteMetadata(SquadObject):
 
     endpoint = '/api/suitemetadata/'
+    id_lookup = 'id__in'
+    cursor_pagination = True
     attrs = ['url', 'id', 'name', 'suite', 'kind', 'description', 'instructions_to_reproduce']
 
 
@@ -856,6 +1454,7 @@ class Annotation(SquadObject):
 class MetricThreshold(SquadObject):
 
     endpoint = '/api/metricthresholds/'
+    id_lookup = 'id__in'
     attrs = ['url', 'id', 'name', 'value', 'is_higher_better', 'environment', 'project']
 
 
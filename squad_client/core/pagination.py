@@ -0,0 +1,106 @@
+"""
+    Walking paginated endpoints, shared by SquadObject and its asyncio version
+
+    Pagination only decides which pages to request: callers do the requests, in
+    whichever way their client does, and tell what each page said
+
+        pagination = Pagination(url, filters, count)
+        request = pagination.request()
+        while request is not None:
+            url, params = request
+            page = Pagination.envelope(get(url, params))
+            ...
+            pagination.advance(page)
+            request = pagination.request()
+
+        # Pages at pagination.offsets are left, to be requested concurrently with pagination.page(offset)
+"""
+
+from squad_client import settings
+from squad_client.exceptions import SquadObjectException
+
+
+class Pagination:
+    """
+        Pages of up to `count` (-1 for all) results of `url` matching `filters`.
+        Options of SquadObject.__fetch__ (workers, keyset, immutable, stream) are
+        taken out of `filters`, what's left are the query parameters
+    """
+
+    def __init__(self, url, filters, count):
+        self.count = settings.MAX_NUM_OF_OBJECTS if count == -1 else count
+        self.workers = filters.pop('workers', settings.DEFAULT_NUM_OF_WORKERS)
+        self.keyset = filters.pop('keyset', False)
+        self.immutable = filters.pop('immutable', False)
+        self.stream = filters.pop('stream', False)
+        if self.keyset:
+            filters['ordering'] = 'id'
+            if 'fields' in filters and 'id' not in filters['fields'].split(','):
+                filters['fields'] += ',id'
+
+        filters['limit'] = self.count if self.count < settings.SQUAD_MAX_PAGE_LIMIT else settings.SQUAD_MAX_PAGE_LIMIT
+        self.filters = filters
+        self.url = url
+        self.num_results = 0
+
+        # Offsets of the pages left once they can be requested concurrently, and their url
+        self.offsets = ()
+        self.offsets_url = None
+
+    @staticmethod
+    def envelope(page):
+        """
+            Add the number of results and the last one to a decoded `page`, as streamed pages have them
+        """
+
+        page['num_results'] = len(page['results'])
+        page['last'] = page['results'][-1] if page['results'] else None
+        return page
+
+    def request(self):
+        """
+            Url and query parameters of the next page, None once done
+        """
+
+        if not self.url or self.num_results >= self.count:
+            return None
+        return self.url, dict(self.filters)
+
+    def page(self, offset):
+        """
+            Url and query parameters of the page at `offset`, one of `offsets`
+        """
+
+        return self.offsets_url, dict(self.filters, offset=offset)
+
+    def advance(self, envelope):
+        """
+            Move past the page last requested, given its "next", "count" (only endpoints
+            using offset pagination tell it), number of results and last result
+        """
+
+        self.num_results += envelope['num_results']
+        next_url = envelope['next']
+
+        # Endpoints using cursor pagination are already walked by id,
+        # for the ones using offset pagination, the next page is whatever comes after the last id
+        if self.keyset and next_url and 'count' in envelope:
+            last_id = envelope['last']['id']
+            if last_id <= int(self.filters.get('id__gt', -1)):
+                raise SquadObjectException('%s does not support keyset pagination' % self.url)
+            # A given offset only applies to the first page, the next ones start after its last id
+            self.filters.pop('offset', None)
+            self.filters['id__gt'] = last_id
+            return
+
+        # Endpoints using offset pagination tell how many objects there are,
+        # so all remaining pages can be requested at once
+        if self.workers > 1 and next_url and 'count' in envelope:
+            limit = self.filters['limit']
+            start = int(self.filters.get('offset', 0))
+            self.offsets = range(start + limit, min(envelope['count'], start + self.count), limit)
+            self.offsets_url = self.url
+            self.url = None
+            return
+
+        self.url = next_url
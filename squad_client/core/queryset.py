@@ -0,0 +1,168 @@
+"""
+    Lazy queries of SquadObjects
+
+    Accessors like Squad.tests() or Project.builds() return a QuerySet instead of
+    fetching right away. Nothing is requested until results are used, and queries can
+    be refined before that
+
+        builds = project.builds(count=ALL).filter(version__startswith='v5').order_by('-id')
+        builds.count()                  # a single request, with limit=1
+        builds.only('id', 'version')    # requests fields=id,version
+        builds.prefetch_related('project')  # projects of all builds, in one request
+        for build in builds.iterator():
+            ...
+
+    A QuerySet is a read-only mapping of ids to objects, like the dicts accessors used
+    to return: using it that way fetches all results once and keeps them
+"""
+
+import inspect
+from collections.abc import Mapping
+
+from squad_client import codec
+from squad_client.utils import first
+
+# Filters which are options of SquadObject.__fetch__, not query parameters
+OPTIONS = ('workers', 'keyset', 'immutable', 'stream', 'compact', 'readonly')
+
+
+class QuerySet(Mapping):
+    """
+        Up to `count` (-1 for all) objects of `klass` matching `filters`, read
+        from `endpoint` (or `klass.endpoint`) on behalf of `owner`, the object whose
+        client is used. `fetch` and `iterate` take over `owner.__fetch__` and
+        `owner.__iterate__` for accessors with extra steps, e.g. reading results of
+        finished builds from the store
+    """
+
+    def __init__(self, owner, klass, filters=None, count=-1, endpoint=None, fetch=None, iterate=None):
+        self.owner = owner
+        self.klass = klass
+        self.filters = dict(filters or {})
+        self.limit = count
+        self.endpoint = endpoint
+        self.custom = fetch is not None
+        self.fetch = fetch or owner.__fetch__
+        if inspect.iscoroutinefunction(self.fetch):
+            raise TypeError('%s fetches asynchronously, QuerySets are not awaitable' % type(owner).__name__)
+        self.iterate = iterate or owner.__iterate__
+        self.prefetch = ()
+        self.__objects__ = None
+
+    def __clone__(self, **filters):
+        clone = QuerySet(self.owner, self.klass, dict(self.filters, **filters), self.limit, self.endpoint,
+                         self.fetch if self.custom else None, self.iterate)
+        clone.prefetch = self.prefetch
+        return clone
+
+    def __evaluate__(self):
+        if self.__objects__ is None:
+            self.__objects__ = self.fetch(self.klass, dict(self.filters), self.limit, endpoint=self.endpoint)
+            if self.prefetch:
+                self.owner.resolve_relations(self.__objects__.values(), *self.prefetch)
+        return self.__objects__
+
+    def __getitem__(self, _id):
+        return self.__evaluate__()[_id]
+
+    def __iter__(self):
+        return iter(self.__evaluate__())
+
+    def __len__(self):
+        return len(self.__evaluate__())
+
+    def __repr__(self):
+        return repr(self.__evaluate__())
+
+    def all(self):
+        return self.__clone__()
+
+    def filter(self, **filters):
+        """
+            QuerySet further filtered by `filters`, e.g. `filter(environment=1, status='fail')`
+        """
+
+        return self.__clone__(**filters)
+
+    def only(self, *fields):
+        """
+            QuerySet requesting just `fields` of each object, the id is always included
+        """
+
+        fields = list(fields) + (['id'] if 'id' not in fields else [])
+        return self.__clone__(fields=','.join(fields))
+
+    def profile(self, name='list'):
+        """
+            QuerySet requesting the fields of one of the model's profiles, see SquadObject.profiles
+        """
+
+        return self.__clone__(fields=self.klass.projection(profile=name))
+
+    def order_by(self, *fields):
+        """
+            QuerySet ordered by `fields`, prefixed with "-" for descending order
+        """
+
+        return self.__clone__(ordering=','.join(fields))
+
+    def prefetch_related(self, *names):
+        """
+            QuerySet resolving relations `names` (e.g. "environment") of all results once they're
+            fetched, see SquadObject.resolve_relations. Not done by iterator()
+        """
+
+        clone = self.__clone__()
+        clone.prefetch = self.prefetch + names
+        return clone
+
+    def iterator(self):
+        """
+            Yield objects as they're decoded, without keeping them, see SquadObject.__iterate__
+        """
+
+        if self.__objects__ is not None:
+            return iter(self.__objects__.values())
+        return self.iterate(self.klass, dict(self.filters), self.limit, endpoint=self.endpoint)
+
+    def first(self):
+        """
+            First object, fetching a single one if results were not fetched yet. None if there's none
+        """
+
+        if self.__objects__ is not None:
+            return first(self.__objects__)
+        return first(self.fetch(self.klass, dict(self.filters), 1, endpoint=self.endpoint))
+
+    def count(self):
+        """
+            Number of objects, read from the "count" of a page of a single result. Endpoints
+            which don't tell it (i.e. using cursor pagination) and accessors with their own
+            `fetch` have all objects fetched instead
+        """
+
+        if self.__objects__ is None:
+            total = self.__total__()
+            if total is not None:
+                return total if self.limit < 0 else min(total, self.limit)
+        return len(self.__evaluate__())
+
+    def exists(self):
+        if self.__objects__ is not None:
+            return len(self.__objects__) > 0
+        total = self.__total__()
+        if total is not None:
+            return total > 0 and self.limit != 0
+        if self.custom:
+            return len(self.__evaluate__()) > 0
+        return self.first() is not None
+
+    def __total__(self):
+        # Objects of custom fetches may not come from the API at all, e.g. stored results
+        if self.custom or self.klass.cursor_pagination:
+            return None
+
+        params = {name: value for name, value in self.filters.items() if name not in OPTIONS}
+        params['limit'] = 1
+        response = self.owner.__api__.get(self.endpoint or self.klass.endpoint, params, immutable=self.filters.get('immutable', False))
+        return codec.loads(response.content).get('count')
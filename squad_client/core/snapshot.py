@@ -0,0 +1,222 @@
+"""
+    Binary snapshots of build results, read through mmap without copying
+
+    A snapshot holds the tests and metrics tables of a build (see squad_client.core.table),
+    plus slugs of its project's environments and suites. The layout is
+
+        b"SQSNAP01" | header length (uint64, little endian) | JSON header | arrays
+
+    The header describes each array: its dtype, offset in the file and number of items.
+    Arrays are 8 bytes aligned, so opening a snapshot maps the file and wraps arrays
+    around it, nothing is read until used. Pages of a mapped file are shared with the
+    page cache rather than private to the process. Strings (test names, statuses,
+    slugs) are kept as string tables: utf-8 bytes plus offsets, decoded on demand
+
+        squad-client snapshot my_group/my_project/my_build
+
+        snapshot = build.snapshot()
+        snapshot.tests.count('environment', 'status')
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from squad_client import codec
+from squad_client.core.table import TestsTable, MetricsTable
+
+MAGIC = b'SQSNAP01'
+HEADER_LENGTH = struct.Struct('<Q')
+ALIGNMENT = 8
+
+
+class StringTable:
+    """
+        Sequence of strings stored as utf-8 `data` and `offsets` into it, one more
+        than there are strings. Indexing with an array of codes returns an object array
+        like numpy vocabularies do. `null` is the index standing for None, if any
+    """
+
+    def __init__(self, offsets, data, null=-1):
+        self.offsets = offsets
+        self.data = data
+        self.null = null
+        self.strings = None
+
+    @classmethod
+    def encode(cls, strings):
+        encoded = [b'' if string is None else string.encode('utf-8') for string in strings]
+        offsets = numpy.zeros(len(encoded) + 1, dtype=numpy.int64)
+        numpy.cumsum([len(string) for string in encoded], out=offsets[1:])
+        null = next((index for index, string in enumerate(strings) if string is None), -1)
+        return offsets, numpy.frombuffer(b''.join(encoded), dtype=numpy.uint8), null
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, numpy.integer)):
+            if index == self.null:
+                return None
+            return self.data[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+        return self.decode()[index]
+
+    def __eq__(self, other):
+        return self.decode() == other
+
+    __hash__ = None
+
+    def decode(self):
+        if self.strings is None:
+            data = self.data.tobytes()
+            offsets = self.offsets.tolist()
+            strings = numpy.empty(len(self), dtype=object)
+            strings[:] = [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+            if self.null >= 0:
+                strings[self.null] = None
+            self.strings = strings
+        return self.strings
+
+    def tolist(self):
+        return self.decode().tolist()
+
+
+def narrow(column):
+    # Ids fit in 32 bits on most servers, -1 stands for missing relations
+    if column.dtype == numpy.int64 and len(column) and -2 ** 31 <= column.min() and column.max() < 2 ** 31:
+        return column.astype(numpy.int32)
+    return column
+
+
+class Snapshot:
+
+    def __init__(self, filename):
+        if numpy is None:
+            raise ImportError('Snapshots need numpy, install it with `pip install numpy`')
+
+        self.filename = filename
+        with open(filename, 'rb') as fp:
+            self.mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError('%s is not a squad-client snapshot' % filename)
+
+        start = len(MAGIC) + HEADER_LENGTH.size
+        length, = HEADER_LENGTH.unpack_from(self.mmap, len(MAGIC))
+        self.header = codec.loads(self.mmap[start:start + length])
+        self.build = self.header['build']
+        self.environments = self.__slugs__('environments')
+        self.suites = self.__slugs__('suites')
+
+    def __load__(self, name):
+        array = self.header['arrays'][name]
+        return numpy.frombuffer(self.mmap, dtype=array['dtype'], count=array['length'], offset=array['offset'])
+
+    def __strings__(self, name):
+        return StringTable(self.__load__(name + '.offsets'), self.__load__(name + '.data'), self.header['nulls'].get(name, -1))
+
+    def __slugs__(self, name):
+        return dict(zip(self.__load__(name + '.id').tolist(), self.__strings__(name + '.slug').tolist()))
+
+    def __table__(self, name, klass):
+        columns = {field: self.__load__('%s.%s' % (name, field)) for field in klass.fields}
+        vocabularies = {field: self.__strings__('%s.%s.vocabulary' % (name, field)) for field in klass.categories}
+        return klass(columns, vocabularies)
+
+    @property
+    def tests(self):
+        return self.__table__('tests', TestsTable)
+
+    @property
+    def metrics(self):
+        return self.__table__('metrics', MetricsTable)
+
+    def close(self):
+        try:
+            self.mmap.close()
+        except BufferError:
+            pass  # arrays of tables still in use keep the file mapped until they're gone
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def write(filename, build, tests, metrics, environments, suites):
+        """
+            Write a snapshot of `build`, out of its `tests` and `metrics` tables,
+            and `environments` and `suites` of its project, as returned by Project
+        """
+
+        if numpy is None:
+            raise ImportError('Snapshots need numpy, install it with `pip install numpy`')
+
+        arrays = {}
+        nulls = {}
+
+        def add_strings(name, strings):
+            offsets, data, null = StringTable.encode(strings)
+            arrays[name + '.offsets'] = offsets
+            arrays[name + '.data'] = data
+            if null >= 0:
+                nulls[name] = null
+
+        for name, table in [('tests', tests), ('metrics', metrics)]:
+            for field, column in table.columns.items():
+                arrays['%s.%s' % (name, field)] = narrow(column)
+            for field, vocabulary in table.vocabularies.items():
+                add_strings('%s.%s.vocabulary' % (name, field), list(vocabulary))
+
+        for name, objects in [('environments', environments), ('suites', suites)]:
+            arrays[name + '.id'] = numpy.array([obj.id for obj in objects.values()], dtype=numpy.int64)
+            add_strings(name + '.slug', [obj.slug for obj in objects.values()])
+
+        # Offsets only depend on the header's length once arrays are laid out, so lay them out
+        # relative to the end of the header, then shift them by its padded length
+        layout = {}
+        position = 0
+        for name, array in arrays.items():
+            layout[name] = {'dtype': array.dtype.str, 'offset': position, 'length': len(array)}
+            position += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        build_info = {'id': build.id, 'version': build.version, 'url': build.url, 'finished': getattr(build, 'finished', None)}
+
+        def header_for(base):
+            arrays_info = {name: dict(info, offset=info['offset'] + base) for name, info in layout.items()}
+            return codec.dumps({'build': build_info, 'arrays': arrays_info, 'nulls': nulls}).encode('utf-8')
+
+        # Grow the base until the header fits before it, it only takes a couple of tries
+        base = 0
+        while True:
+            header = header_for(base)
+            needed = -(-(len(MAGIC) + HEADER_LENGTH.size + len(header)) // ALIGNMENT) * ALIGNMENT
+            if needed <= base:
+                break
+            base = needed
+
+        directory = os.path.dirname(os.path.abspath(filename))
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file first so readers never map half written snapshots
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(MAGIC)
+                fp.write(HEADER_LENGTH.pack(len(header)))
+                fp.write(header)
+                for name, array in arrays.items():
+                    fp.write(b'\0' * (base + layout[name]['offset'] - fp.tell()))
+                    fp.write(numpy.ascontiguousarray(array).tobytes())
+                fp.write(b'\0' * (base + position - fp.tell()))
+            os.replace(tmp, filename)
+        except BaseException:
+            os.unlink(tmp)
+            raise
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import tempfile
+import urllib
+
+from squad_client import codec
+from squad_client import logging
+from squad_client import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class BuildStore:
+    """
+        On-disk store of results of finished builds, which are not expected to change.
+        Entries are JSON files laid out as <path>/<server>/<build id>/<key>.json, where
+        <server> is the server url, suffixed with a hash of the token when there is one
+        so private results are only served back to whoever fetched them
+    """
+
+    def __init__(self, url, token=None, path=None):
+        self.path = path or settings.STORE_PATH
+        server = urllib.parse.quote(url.split('://')[-1].rstrip('/'), safe='')
+        if token:
+            server += '-%s' % hashlib.sha256(token.encode()).hexdigest()[:16]
+        self.root = os.path.join(self.path, server)
+
+    def __path__(self, build_id, key):
+        return os.path.join(self.root, str(build_id), '%s.json' % key)
+
+    def snapshot_path(self, build_id):
+        """
+            Where the snapshot of a build is kept, see squad_client.core.snapshot
+        """
+
+        return os.path.join(self.root, str(build_id), 'snapshot.bin')
+
+    def get(self, build_id, key):
+        try:
+            with open(self.__path__(build_id, key), 'rb') as fp:
+                return codec.loads(fp.read())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning('Ignoring corrupted entry "%s" of build %s in %s' % (key, build_id, self.root))
+            return None
+
+    def put(self, build_id, key, value):
+        path = self.__path__(build_id, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so readers never see half written entries
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                fp.write(codec.dumps(value))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @staticmethod
+    def key(name, filters):
+        """
+            Key of the results of `name` (e.g. "tests") fetched with `filters`
+        """
+
+        if not filters:
+            return name
+        query = json.dumps(sorted((k, str(v)) for k, v in filters.items()))
+        return '%s-%s' % (name, hashlib.sha256(query.encode()).hexdigest()[:16])
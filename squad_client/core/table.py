@@ -0,0 +1,245 @@
+"""
+    Columnar tables of build results, backed by numpy arrays
+
+    Results are never turned into objects: each field becomes a column. Urls of related
+    objects (environment, suite, test_run) are kept as their integer ids, -1 when missing.
+    Repeated strings (status, name) are categorical, i.e. small integer codes into a
+    vocabulary, so they can be grouped and compared without touching python strings.
+
+        table = build.tests_table()
+        table.count('environment', 'status')  # {(1, 'pass'): 1234, (1, 'fail'): 5, ...}
+        failures = table.where(status='fail', environment=[1, 2])
+        failures['name']  # array(['ltp-syscalls/accept01', ...], dtype=object)
+
+    numpy is an optional dependency, install it with `pip install numpy`
+"""
+
+import math
+from itertools import islice
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from squad_client.core.compact import get_id
+
+# Number of results turned into columns at a time
+BATCH_SIZE = 10000
+
+
+def factorize(values):
+    """
+        Sorted unique `values`, and the index of each value in them. Integers
+        spanning a narrow range, like ids of a build's environments or groups
+        of a few columns, are counted instead of sorted
+    """
+
+    if len(values) == 0:
+        return values[:0], numpy.zeros(0, dtype=numpy.int64)
+
+    low, high = int(values.min()), int(values.max())
+    if high - low > 2 * len(values) + 1024:
+        return numpy.unique(values, return_inverse=True)
+
+    offsets = values - low
+    present = numpy.flatnonzero(numpy.bincount(offsets))
+    positions = numpy.empty(high - low + 1, dtype=numpy.int64)
+    positions[present] = numpy.arange(len(present))
+    return present + low, positions[offsets]
+
+
+class Table:
+    """
+        Equally long numpy arrays, one per field. Subclasses tell which fields
+        are requested from the API and how each of them is kept
+    """
+
+    # Fields requested from the API, all other fields are kept as int64
+    fields = ()
+
+    # Fields holding urls of related objects, kept as their ids
+    relations = ()
+
+    # Fields kept as float64, missing values are NaN
+    floats = ()
+
+    # Categorical fields, and values known beforehand, which get the lowest codes
+    categories = {}
+
+    def __init__(self, columns, vocabularies):
+        self.columns = columns
+        self.vocabularies = vocabularies
+
+    @classmethod
+    def from_results(cls, results):
+        """
+            Build a table out of `results`, an iterable of raw results as returned by the API
+        """
+
+        if numpy is None:
+            raise ImportError('%s needs numpy, install it with `pip install numpy`' % cls.__name__)
+
+        chunks = {field: [] for field in cls.fields}
+        indexes = {field: {value: code for code, value in enumerate(values)} for field, values in cls.categories.items()}
+
+        results = iter(results)
+        while True:
+            batch = list(islice(results, BATCH_SIZE))
+            if not batch:
+                break
+
+            for field in cls.fields:
+                values = [result.get(field) for result in batch]
+                if field in cls.relations:
+                    column = numpy.array([-1 if url is None else get_id(url) for url in values], dtype=numpy.int64)
+                elif field in cls.floats:
+                    column = numpy.array(values, dtype=numpy.float64)
+                elif field in indexes:
+                    index = indexes[field]
+                    column = numpy.array([index.setdefault(value, len(index)) for value in values], dtype=numpy.int64)
+                else:
+                    column = numpy.array([-1 if value is None else value for value in values], dtype=numpy.int64)
+                chunks[field].append(column)
+
+        columns = {}
+        vocabularies = {}
+        for field, arrays in chunks.items():
+            column = numpy.concatenate(arrays) if arrays else numpy.empty(0, dtype=numpy.float64 if field in cls.floats else numpy.int64)
+            if field in indexes:
+                vocabularies[field] = numpy.empty(len(indexes[field]), dtype=object)
+                vocabularies[field][:] = list(indexes[field])
+                column = column.astype(numpy.min_scalar_type(max(len(indexes[field]) - 1, 0)))
+            columns[field] = column
+
+        return cls(columns, vocabularies)
+
+    def __len__(self):
+        return len(self.columns['id'])
+
+    def __getitem__(self, field):
+        """
+            Values of `field`, categorical ones are decoded
+        """
+
+        if field in self.vocabularies:
+            return self.vocabularies[field][self.columns[field]]
+        return self.columns[field]
+
+    def __repr__(self):
+        return '%s(%d rows: %s)' % (type(self).__name__, len(self), ', '.join(self.columns))
+
+    def code(self, field, value):
+        """
+            Code of `value` in the categorical `field`, -1 if no row has it
+        """
+
+        matches = numpy.flatnonzero(self.vocabularies[field] == value)
+        return int(matches[0]) if len(matches) else -1
+
+    def mask(self, field, value):
+        """
+            Boolean array of rows whose `field` is `value`, or any of `value` if it's a list, tuple or set
+        """
+
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        if field in self.vocabularies:
+            values = [self.code(field, v) for v in values]
+        return numpy.isin(self.columns[field], values)
+
+    def where(self, **conditions):
+        """
+            Table with the rows matching all `conditions`, e.g. `where(status='fail', environment=[1, 2])`
+        """
+
+        selected = numpy.ones(len(self), dtype=bool)
+        for field, value in conditions.items():
+            selected &= self.mask(field, value)
+        return type(self)({field: column[selected] for field, column in self.columns.items()}, self.vocabularies)
+
+    def group_by(self, *fields):
+        """
+            Group rows by their values of `fields`. Return the values of each group,
+            one array per field, and an array with the group of each row
+        """
+
+        codes = []
+        dims = []
+        uniques = []
+        for field in fields:
+            if field in self.vocabularies:
+                # Categorical columns are codes already
+                unique = numpy.arange(len(self.vocabularies[field]))
+                inverse = self.columns[field]
+            else:
+                unique, inverse = factorize(self.columns[field])
+            uniques.append(unique)
+            codes.append(inverse.astype(numpy.int64))
+            dims.append(max(len(unique), 1))
+
+        if not fields or len(self) == 0:
+            return [self.__values__(field, unique[:0]) for field, unique in zip(fields, uniques)], numpy.zeros(len(self), dtype=numpy.int64)
+
+        groups, inverse = factorize(numpy.ravel_multi_index(codes, dims))
+        keys = [self.__values__(field, unique[index]) for field, unique, index in zip(fields, uniques, numpy.unravel_index(groups, dims))]
+        return keys, inverse
+
+    def __values__(self, field, values):
+        if field in self.vocabularies:
+            return self.vocabularies[field][values]
+        return values
+
+    def __aggregate__(self, fields, values):
+        keys, inverse = self.group_by(*fields)
+        totals = numpy.bincount(inverse, weights=values, minlength=len(keys[0]) if keys else 1)
+        if not fields:
+            return totals[0].item() if len(totals) else 0
+        if len(fields) == 1:
+            return dict(zip(keys[0].tolist(), totals.tolist()))
+        return dict(zip(zip(*[key.tolist() for key in keys]), totals.tolist()))
+
+    def count(self, *fields):
+        """
+            Number of rows by values of `fields`, e.g. `count('environment', 'status')`
+            returns {(environment id, status): count}. Keys are plain values when
+            grouping by a single field
+        """
+
+        counts = self.__aggregate__(fields, None)
+        if isinstance(counts, dict):
+            return {key: int(count) for key, count in counts.items()}
+        return int(counts)
+
+    def sum(self, field, *by):
+        """
+            Sum of `field` by values of `by`, NaNs are ignored
+        """
+
+        values = self.columns[field].astype(numpy.float64)
+        return self.__aggregate__(by, numpy.nan_to_num(values, nan=0.0))
+
+    def mean(self, field, *by):
+        """
+            Mean of `field` by values of `by`, NaNs are ignored
+        """
+
+        values = self.columns[field].astype(numpy.float64)
+        present = ~numpy.isnan(values)
+        sums = self.__aggregate__(by, numpy.where(present, values, 0.0))
+        counts = self.__aggregate__(by, present.astype(numpy.float64))
+        if not isinstance(sums, dict):
+            return sums / counts if counts else math.nan
+        return {key: sums[key] / counts[key] if counts[key] else math.nan for key in sums}
+
+
+class TestsTable(Table):
+    fields = ('id', 'name', 'status', 'environment', 'suite', 'test_run')
+    relations = ('environment', 'suite', 'test_run')
+    categories = {'status': ('pass', 'fail', 'xfail', 'skip'), 'name': ()}
+
+
+class MetricsTable(Table):
+    fields = ('id', 'name', 'result', 'environment', 'suite', 'test_run')
+    relations = ('environment', 'suite', 'test_run')
+    floats = ('result',)
+    categories = {'name': ()}
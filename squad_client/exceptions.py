@@ -16,3 +16,11 @@ class InvalidReportTemplate(Exception):
 
 class InvalidSquadLookup(Exception):
     pass
+
+
+class InvalidMirror(Exception):
+    pass
+
+
+class SquadObjectException(Exception):
+    pass
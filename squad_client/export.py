@@ -0,0 +1,149 @@
+"""
+    Streaming export of build tests or metrics to CSV, Arrow IPC and Parquet files
+
+    Results are written in batches as pages come in, so exporting a whole build
+    holds at most one batch in memory. Each batch is one record batch in Arrow
+    files and one row group in Parquet files. Arrow and Parquet need pyarrow,
+    install it with `pip install pyarrow`
+"""
+
+import abc
+import csv
+from itertools import islice
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from squad_client.core.compact import get_id
+
+
+# Columns of exported files of tests and metrics, environments and suites are exported as their slugs
+COLUMNS = {
+    'tests': ('id', 'build', 'environment', 'suite', 'name', 'status', 'test_run'),
+    'metrics': ('id', 'build', 'environment', 'suite', 'name', 'result', 'test_run'),
+}
+
+
+def batches(results, size):
+    results = iter(results)
+    while True:
+        batch = list(islice(results, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Columns:
+    """
+        Turns batches of raw `results` ("tests" or "metrics") into columns, resolving
+        related urls to ids and slugs through lookups built once per export
+    """
+
+    def __init__(self, build, environments, suites, results='tests'):
+        self.value = 'status' if results == 'tests' else 'result'
+        self.version = build.version
+        self.environments = {env.id: env.slug for env in environments.values()}
+        self.suites = {suite.id: suite.slug for suite in suites.values()}
+
+    def __call__(self, batch):
+        environments = self.environments
+        suites = self.suites
+        value = self.value
+        return {
+            'id': [result['id'] for result in batch],
+            'build': [self.version] * len(batch),
+            'environment': [environments.get(get_id(result.get('environment'))) for result in batch],
+            'suite': [suites.get(get_id(result.get('suite'))) for result in batch],
+            'name': [result.get('name') for result in batch],
+            value: [result.get(value) for result in batch],
+            'test_run': [get_id(result.get('test_run')) for result in batch],
+        }
+
+
+class Exporter(abc.ABC):
+    extension = None
+
+    def __init__(self, filename, results='tests'):
+        self.filename = filename
+        self.columns = COLUMNS[results]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @abc.abstractmethod
+    def write(self, columns):
+        pass
+
+    @abc.abstractmethod
+    def close(self):
+        pass
+
+
+class CsvExporter(Exporter):
+    extension = 'csv'
+
+    def __init__(self, filename, results='tests'):
+        super().__init__(filename, results)
+        self.fp = open(filename, 'w', newline='')
+        self.writer = csv.writer(self.fp)
+        self.writer.writerow(self.columns)
+
+    def write(self, columns):
+        self.writer.writerows(zip(*[columns[column] for column in self.columns]))
+
+    def close(self):
+        self.fp.close()
+
+
+class ArrowExporter(Exporter):
+    extension = 'arrow'
+
+    def __init__(self, filename, results='tests'):
+        if pyarrow is None:
+            raise ImportError('Exporting to %s needs pyarrow, install it with `pip install pyarrow`' % self.extension)
+
+        super().__init__(filename, results)
+        # Strings repeated across rows are dictionary encoded by Parquet on its own
+        self.schema = pyarrow.schema([
+            ('id', pyarrow.int64()),
+            ('build', pyarrow.string()),
+            ('environment', pyarrow.string()),
+            ('suite', pyarrow.string()),
+            ('name', pyarrow.string()),
+            ('status', pyarrow.string()) if results == 'tests' else ('result', pyarrow.float64()),
+            ('test_run', pyarrow.int64()),
+        ])
+        self.writer = self.open()
+
+    def open(self):
+        return pyarrow.ipc.new_file(self.filename, self.schema)
+
+    def batch(self, columns):
+        return pyarrow.record_batch([columns[column] for column in self.columns], schema=self.schema)
+
+    def write(self, columns):
+        self.writer.write_batch(self.batch(columns))
+
+    def close(self):
+        self.writer.close()
+
+
+class ParquetExporter(ArrowExporter):
+    extension = 'parquet'
+
+    def open(self):
+        return pyarrow.parquet.ParquetWriter(self.filename, self.schema, compression='zstd')
+
+    def write(self, columns):
+        batch = self.batch(columns)
+        self.writer.write_batch(batch, row_group_size=len(batch))
+
+
+EXPORTERS = {exporter.extension: exporter for exporter in [CsvExporter, ArrowExporter, ParquetExporter]}
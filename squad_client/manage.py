@@ -6,6 +6,7 @@ import sys
 
 
 from squad_client import logging
+from squad_client import settings
 from squad_client.core.api import SquadApi, ApiException
 from squad_client.core.command import SquadClientCommand
 from squad_client.commands import *  # noqa
@@ -20,6 +21,15 @@ def main():
     parser.add_argument('--squad-host', help='SQUAD host, example: https://qa-reports.linaro.org')
     parser.add_argument('--squad-token', help='SQUAD authentication token')
     parser.add_argument('--cache', default=0, help='Cache API results for N number of seconds. Disabled by default.')
+    parser.add_argument('--cache-path', help='Where to keep cached API results, ".sqlite" is appended to it by the sqlite backend. Defaults to "%s"' % settings.CACHE_PATH)
+    parser.add_argument('--cache-backend', choices=['sqlite', 'directory'], default=settings.CACHE_BACKEND,
+                        help='"sqlite" (WAL) can be shared by processes in the same host, "directory" by hosts sharing a volume. Defaults to "%s"' % settings.CACHE_BACKEND)
+    parser.add_argument('--cache-max-size', type=int, help='Drop least recently used API results once the cache holds more than N megabytes')
+    offline_group = parser.add_mutually_exclusive_group()
+    offline_group.add_argument('--offline', action='store_true', help='Answer requests from the cache only, failing on anything that is not cached')
+    offline_group.add_argument('--prefer-cache', action='store_true', help='Answer requests from the cache, even expired, and only go to SQUAD on cache misses')
+    parser.add_argument('--store', action='store_true', help='Keep results of finished builds on disk and read them from there on later runs')
+    parser.add_argument('--store-path', help='Where to keep results of finished builds, implies --store. Defaults to "%s"' % settings.STORE_PATH)
     parser.add_argument('--version', action='store_true', help='Display versions of squad-client and server')
     subparser = parser.add_subparsers(help='available subcommands', dest='command')
 
@@ -34,15 +44,19 @@ def main():
     if args.debug:
         logging.setLevel(logging.DEBUG)
 
-    if args.command not in ['test']:
+    command = SquadClientCommand.klasses.get(args.command)
+    if args.command not in ['test'] and not (command and command.local(args)):
         squad_host = args.squad_host or os.getenv('SQUAD_HOST')
         squad_token = args.squad_token or os.getenv('SQUAD_TOKEN')
         if squad_host is None:
             logger.error('Either --squad-host or SQUAD_HOST env variable are required')
             return -1
 
+        cache_max_size = args.cache_max_size * 1024 * 1024 if args.cache_max_size else None
         try:
-            SquadApi.configure(squad_host, token=squad_token, cache=args.cache)
+            SquadApi.configure(squad_host, token=squad_token, cache=args.cache, cache_path=args.cache_path,
+                               cache_backend=args.cache_backend, cache_max_size=cache_max_size,
+                               store=args.store_path or args.store, offline=args.offline, prefer_cache=args.prefer_cache)
         except ApiException as e:
             logger.error('Failed to configure squad api: %s' % e)
             return -1
@@ -1,3 +1,5 @@
+import os
+
 # Maximum number of objects to fetch from a unique endpoint
 # this will avoid infinite loop
 MAX_NUM_OF_OBJECTS = 10e6
@@ -7,3 +9,57 @@ DEFAULT_NUM_OF_OBJECTS = 50
 
 # Maximum number of objects loaded per page in SQUAD
 SQUAD_MAX_PAGE_LIMIT = 1000
+
+# Default number of threads fetching pages of a endpoint concurrently
+DEFAULT_NUM_OF_WORKERS = 1
+
+# Maximum length of the ids of a single "id__in" filter, keeping urls well under
+# the 8KB most servers and proxies accept, see Squad.get_many
+MAX_IDS_LENGTH = 4000
+
+# Default number of threads fetching chunks of ids concurrently, see Squad.get_many
+GET_MANY_WORKERS = 4
+
+# Bytes read at a time from streamed responses, which are decoded incrementally
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Rows written at a time by exports, i.e. rows per Parquet row group
+EXPORT_BATCH_SIZE = 100000
+
+# Default path of the cache, when enabled. The "sqlite" backend appends ".sqlite" to it,
+# the "directory" one keeps a file per response in there
+CACHE_PATH = 'squad_client_cache'
+
+# Default cache backend, see squad_client.core.cache
+CACHE_BACKEND = 'sqlite'
+
+# Reads of cached responses whose access times are recorded at once, see squad_client.core.cache
+CACHE_ACCESS_BATCH_SIZE = 100
+
+# Writes to the cache between counts of its actual size, when it has a maximum size
+CACHE_SIZE_CHECK_INTERVAL = 100
+
+# Cache expiration (in seconds) used by --offline and --prefer-cache when --cache is not given
+OFFLINE_CACHE_EXPIRATION = 24 * 60 * 60
+
+# Cache expiration (in seconds) per endpoint pattern, first match wins.
+# Endpoints not matching any pattern expire after the time given to `--cache`
+CACHE_RULES = {
+    '*/api/version/*': 6 * 60 * 60,
+    '*/api/groups/*': 6 * 60 * 60,
+    '*/api/projects/*/builds/*': 30,
+    '*/api/projects/*': 6 * 60 * 60,
+    '*/api/environments/*': 6 * 60 * 60,
+    '*/api/suites/*/tests/*': 30,
+    '*/api/suites/*': 6 * 60 * 60,
+    '*/api/builds/*': 30,
+}
+
+# Default location of the store of finished builds' results
+STORE_PATH = os.path.join(os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'squad_client', 'builds')
+
+# Default location of the SQLite mirror kept by `squad-client mirror`
+MIRROR_PATH = os.path.join(os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'squad_client', 'mirror.sqlite3')
+
+# Number of ids bound to a single query, older SQLite versions allow up to 999 variables
+MIRROR_BATCH_SIZE = 500
@@ -3,15 +3,17 @@ import re
 from collections import defaultdict
 
 from .core.models import ALL, Squad, Group, Project, Build, Environment, Test, Metric, MetricThreshold, TestRun, TestJob, Backend, SquadObjectException
-from .utils import split_build_url, first, split_group_project_slug, getid
+from .utils import split_build_url, first, split_group_project_slug, getid, format_fields
+from .export import EXPORTERS, Columns, batches
+from .settings import EXPORT_BATCH_SIZE
 
 
 squad = Squad()
 logger = logging.getLogger(__name__)
 
 
-def compare_builds(baseline_id, build_id, by="tests", force=False):
-    return Project.compare_builds(baseline_id, build_id, by, force)
+def compare_builds(baseline_id, build_id, by="tests", force=False, client=None):
+    return Project(client=client).compare_builds(baseline_id, build_id, by, force)
 
 
 def retrieve_latest_builds(project_full_name, count=10):
@@ -22,8 +24,6 @@ def retrieve_build_results(build_url):
     group_slug, project_slug, build_version = split_build_url(build_url)
     group = squad.group(group_slug)
     project = group.project(project_slug)
-    environments = project.environments(count=ALL)
-    suites = project.suites(count=ALL)
     build = project.build(build_version)
 
     if not build:
@@ -31,22 +31,24 @@ def retrieve_build_results(build_url):
 
     results = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(dict))))
 
-    tests = build.tests(fields='id,short_name,status,suite,environment').values()
-    for test in tests:
-        env = environments[getid(test.environment)]
-        suite = suites[getid(test.suite)]
-        results[env]['tests'][suite][test.short_name] = test.status
+    # Environments and suites are fetched once, whatever number of tests refer to them
+    tests = build.tests(fields=Test.projection('short_name', 'status', 'suite', 'environment')).prefetch_related('environment', 'suite')
+    for test in tests.values():
+        results[test.related('environment')]['tests'][test.related('suite')][test.short_name] = test.status
 
-    metrics = build.metrics(fields='id,short_name,result,suite,environment').values()
-    for metric in metrics:
-        env = environments[getid(metric.environment)]
-        suite = suites[getid(metric.suite)]
-        results[env]['metrics'][suite][metric.short_name] = metric.result
+    metrics = build.metrics(fields=Metric.projection('short_name', 'result', 'suite', 'environment')).prefetch_related('environment', 'suite')
+    for metric in metrics.values():
+        results[metric.related('environment')]['metrics'][metric.related('suite')][metric.short_name] = metric.result
 
     return results
 
 
 def submit_results(group_project_slug=None, build_version=None, env_slug=None, tests={}, metrics={}, log=None, metadata={}, attachments=None):
+    testrun = build_testrun(group_project_slug, build_version, env_slug, tests, metrics, log, metadata, attachments)
+    return testrun.submit_results()
+
+
+def build_testrun(group_project_slug=None, build_version=None, env_slug=None, tests={}, metrics={}, log=None, metadata={}, attachments=None):
     group_slug, project_slug = split_group_project_slug(group_project_slug)
 
     # TODO: validate input
@@ -88,7 +90,7 @@ def submit_results(group_project_slug=None, build_version=None, env_slug=None, t
         metric.result = metrics[metric_name]
         testrun.add_metric(metric)
 
-    return testrun.submit_results()
+    return testrun
 
 
 def submit_job(group_project_slug=None, build_version=None, env_slug=None, backend_name=None, definition=None):
@@ -333,14 +335,33 @@ def download_attachments(testrun, filenames=None):
     return True
 
 
+def tests_projection(format_string):
+    """
+        Paths of test attributes used in `format_string` (None if the test is formatted
+        as a whole) and the value of `fields=` requesting just those
+    """
+
+    paths = format_fields(format_string, 'test')
+    if paths is None:
+        return None, Test.projection(profile='list')
+    return paths, Test.projection(*[path.split('.')[0] for path in paths])
+
+
+def uses(paths, attribute):
+    return paths is None or any(path == attribute or path.startswith(attribute + '.') for path in paths)
+
+
 def download_tests(project, build, filter_envs=None, filter_suites=None, format_string=None, output_filename=None):
-    all_environments = project.environments(count=ALL)
-    all_suites = project.suites(count=ALL)
-    all_testruns = build.testruns(count=ALL, prefetch_metadata=True)
+    if format_string is None:
+        format_string = '{test.environment.slug}/{test.name} {test.status}'
+
+    # Only fields and relations used in format_string are fetched
+    paths, fields = tests_projection(format_string)
+    all_testruns = build.testruns(count=ALL, prefetch_metadata=uses(paths, 'test_run.metadata'))
 
     filters = {
         'count': ALL,
-        'fields': 'id,name,status,environment,suite,test_run,build',
+        'fields': fields,
     }
 
     envs = None
@@ -356,16 +377,15 @@ def download_tests(project, build, filter_envs=None, filter_suites=None, format_
     filename = output_filename or f'{build.version}.txt'
     logger.info(f'Downloading test results for {project.slug}/{build.version}/{envs or "(all envs)"}/{suites or "(all suites)"} to {filename}')
 
-    if format_string is None:
-        format_string = '{test.environment.slug}/{test.name} {test.status}'
-
-    tests = build.tests(**filters)
+    relations = [name for name in ['environment', 'suite'] if uses(paths, name)]
+    tests = build.tests(**filters).prefetch_related(*relations)
     output = []
     for test in tests.values():
         test.build = build
-        test.environment = all_environments[getid(test.environment)]
-        test.suite = all_suites[getid(test.suite)]
-        test.test_run = all_testruns[getid(test.test_run)]
+        for name in relations:
+            setattr(test, name, test.related(name))
+        if uses(paths, 'test_run'):
+            test.test_run = all_testruns[getid(test.test_run)]
         output.append(format_string.format(test=test))
 
     output.sort()
@@ -377,6 +397,46 @@ def download_tests(project, build, filter_envs=None, filter_suites=None, format_
     return True
 
 
+def export_tests(project, build, output_format='csv', filter_envs=None, filter_suites=None, output_filename=None, batch_size=None):
+    """
+        Stream tests of `build` into a csv, arrow or parquet file, `batch_size` rows at a time
+    """
+
+    return export_results(project, build, 'tests', output_format, filter_envs, filter_suites, output_filename, batch_size)
+
+
+def export_metrics(project, build, output_format='csv', filter_envs=None, filter_suites=None, output_filename=None, batch_size=None):
+    """
+        Stream metrics of `build` into a csv, arrow or parquet file, `batch_size` rows at a time
+    """
+
+    return export_results(project, build, 'metrics', output_format, filter_envs, filter_suites, output_filename, batch_size)
+
+
+def export_results(project, build, results, output_format='csv', filter_envs=None, filter_suites=None, output_filename=None, batch_size=None):
+    exporter_class = EXPORTERS[output_format]
+    columns = Columns(build, project.environments(count=ALL), project.suites(count=ALL), results)
+
+    filters = {
+        'fields': 'id,name,%s,environment,suite,test_run' % ('status' if results == 'tests' else 'result'),
+    }
+
+    if filter_envs:
+        filters['environment__id__in'] = ','.join([str(e.id) for e in filter_envs])
+
+    if filter_suites:
+        filters['suite__id__in'] = ','.join([str(s.id) for s in filter_suites])
+
+    filename = output_filename or f'{build.version}.{exporter_class.extension}'
+    logger.info(f'Exporting {results} results for {project.slug}/{build.version} to {filename}')
+
+    with exporter_class(filename, results) as exporter:
+        for batch in batches(build.results(results, **filters), batch_size or EXPORT_BATCH_SIZE):
+            exporter.write(columns(batch))
+
+    return True
+
+
 def register_callback(group_slug=None, project_slug=None, build_version=None, url=None, record_response=False):
 
     errors = []
@@ -1,5 +1,7 @@
-import json
 import re
+import string
+
+from squad_client import codec
 
 
 def first(_dict):
@@ -8,6 +10,45 @@ def first(_dict):
     return next(iter(_dict.values()))
 
 
+def format_fields(format_string, name):
+    """
+        Attributes of `name` used in `format_string`, e.g. "{test.environment.slug} {test.status}"
+        uses ["environment.slug", "status"] of "test". None if `name` is formatted as a whole
+    """
+
+    paths = []
+    for _, field, _, _ in string.Formatter().parse(format_string):
+        matches = re.match(r'^(\w+)((?:\.\w+)*)', field or '')
+        if matches is None or matches.group(1) != name:
+            continue
+        if not matches.group(2):
+            return None
+        paths.append(matches.group(2)[1:])
+    return paths
+
+
+def chunk_ids(ids, max_length, max_count):
+    """
+        Split `ids` into comma separated strings of at most `max_length` characters
+        and `max_count` ids each, i.e. values of "id__in" filters
+    """
+
+    chunks = []
+    chunk = []
+    length = 0
+    for _id in ids:
+        _id = str(_id)
+        if chunk and (length + len(_id) > max_length or len(chunk) == max_count):
+            chunks.append(','.join(chunk))
+            chunk = []
+            length = 0
+        chunk.append(_id)
+        length += len(_id) + 1
+    if chunk:
+        chunks.append(','.join(chunk))
+    return chunks
+
+
 def parse_test_name(name):
     suite_name, test_name = name.split('/', 1)
     return (suite_name, test_name)
@@ -28,7 +69,7 @@ def split_build_url(build_slug):
 
 
 def to_json(thing):
-    return json.dumps(thing)
+    return codec.dumps(thing)
 
 
 def get_class_name(obj):
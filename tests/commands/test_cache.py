@@ -0,0 +1,96 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+import subprocess as sp
+
+
+from tests import settings
+
+
+class CacheCommandTest(TestCase):
+    def setUp(self):
+        self.testing_server = 'http://localhost:%s' % settings.DEFAULT_SQUAD_PORT
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmpdir.name, 'cache')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def manage_cache(self, *args, cache=3600, backend='sqlite', server=None):
+        argv = ['./manage.py', '--squad-host', server or self.testing_server, '--cache-path', self.cache_path, '--cache-backend', backend]
+        if cache:
+            argv += ['--cache', str(cache)]
+        argv += ['cache'] + list(args)
+
+        env = os.environ.copy()
+        env['LOG_LEVEL'] = 'INFO'
+        proc = sp.Popen(argv, stdout=sp.PIPE, stderr=sp.PIPE, env=env)
+        out, err = proc.communicate(timeout=60)
+        proc.ok = (proc.returncode == 0)
+        proc.out = out.decode('utf-8')
+        proc.err = err.decode('utf-8')
+        return proc
+
+    def test_cache_disabled(self):
+        proc = self.manage_cache('stats', cache=None)
+        self.assertFalse(proc.ok)
+        self.assertIn('Cache is disabled', proc.err)
+
+    def test_missing_operation(self):
+        proc = self.manage_cache()
+        self.assertFalse(proc.ok)
+
+    def test_warm_and_stats(self):
+        for backend in ['sqlite', 'directory']:
+            self.cache_path = os.path.join(self.tmpdir.name, backend)
+
+            proc = self.manage_cache('warm', '--group', 'my_group', '--project', 'my_project', '--builds', 'latest-2', backend=backend)
+            self.assertTrue(proc.ok, proc.err)
+            self.assertIn('Cached results of 2 builds of 1 projects', proc.err)
+
+            proc = self.manage_cache('stats', backend=backend)
+            self.assertTrue(proc.ok, proc.err)
+            self.assertIn('/api/builds/*/tests/: 2', proc.out)
+            self.assertIn('/api/builds/*/metadata/: 2', proc.out)
+            self.assertIn('/api/projects/: 1', proc.out)
+
+    def test_server_down(self):
+        self.assertTrue(self.manage_cache('warm', '--group', 'my_group').ok)
+
+        # Nothing listens on port 1
+        proc = self.manage_cache('stats', server='http://localhost:1')
+        self.assertTrue(proc.ok, proc.err)
+        self.assertIn('/api/projects/: 1', proc.out)
+
+        proc = self.manage_cache('prune', '--max-size', '0', server='http://localhost:1')
+        self.assertTrue(proc.ok, proc.err)
+
+    def test_warm_unknown_group(self):
+        proc = self.manage_cache('warm', '--group', 'no_such_group')
+        self.assertFalse(proc.ok)
+        self.assertIn('Group "no_such_group" not found', proc.err)
+
+    def test_prune(self):
+        for backend in ['sqlite', 'directory']:
+            self.cache_path = os.path.join(self.tmpdir.name, backend)
+            self.assertTrue(self.manage_cache('warm', '--group', 'my_group', backend=backend).ok)
+
+            proc = self.manage_cache('prune', '--older-than', '1d', backend=backend)
+            self.assertTrue(proc.ok, proc.err)
+            self.assertIn('Dropped 0 responses', proc.err)
+
+            time.sleep(1)
+            proc = self.manage_cache('prune', '--older-than', '1s', backend=backend)
+            self.assertTrue(proc.ok, proc.err)
+            self.assertIn(', 0 left', proc.err)
+
+            self.assertTrue(self.manage_cache('warm', '--group', 'my_group', backend=backend).ok)
+            proc = self.manage_cache('prune', '--max-size', '0', backend=backend)
+            self.assertTrue(proc.ok, proc.err)
+            self.assertIn(', 0 left', proc.err)
+
+    def test_invalid_durations(self):
+        proc = self.manage_cache('prune', '--older-than', 'yesterday')
+        self.assertFalse(proc.ok)
+        self.assertIn('invalid duration value', proc.err)
@@ -0,0 +1,61 @@
+import os
+import tempfile
+from unittest import TestCase
+import subprocess as sp
+
+
+from tests import settings
+
+
+class MirrorCommandTest(TestCase):
+    def setUp(self):
+        self.testing_server = 'http://localhost:%s' % settings.DEFAULT_SQUAD_PORT
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmpdir.name, 'mirror.sqlite3')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def mirror(self, *args, server=None):
+        server = server or self.testing_server
+        argv = ['./manage.py', '--squad-host', server, 'mirror', '--database', self.database] + list(args)
+        env = os.environ.copy()
+        env['LOG_LEVEL'] = 'INFO'
+        proc = sp.Popen(argv, stdout=sp.PIPE, stderr=sp.PIPE, env=env)
+        out, err = proc.communicate(timeout=60)
+        proc.ok = (proc.returncode == 0)
+        proc.out = out.decode('utf-8')
+        proc.err = err.decode('utf-8')
+        return proc
+
+    def test_missing_operation(self):
+        proc = self.mirror()
+        self.assertFalse(proc.ok)
+        self.assertIn('Missing mirror operation', proc.err)
+
+    def test_sync_and_sql(self):
+        proc = self.mirror('sync', '--group', 'my_group', '--project', 'my_project', '--builds', 'latest-2')
+        self.assertTrue(proc.ok, proc.err)
+        self.assertIn('Mirrored results of 2 builds of 1 projects', proc.err)
+
+        proc = self.mirror('sql', 'SELECT slug FROM projects')
+        self.assertTrue(proc.ok, proc.err)
+        self.assertEqual(['slug', 'my_project'], proc.out.splitlines())
+
+    def test_sql_without_server(self):
+        proc = self.mirror('sync', '--group', 'my_group', '--project', 'my_project', '--builds', 'latest-1')
+        self.assertTrue(proc.ok, proc.err)
+
+        proc = self.mirror('sql', 'SELECT slug FROM projects', server='http://localhost:1')
+        self.assertTrue(proc.ok, proc.err)
+        self.assertEqual(['slug', 'my_project'], proc.out.splitlines())
+
+    def test_invalid_query(self):
+        proc = self.mirror('sql', 'SELECT * FROM nothing')
+        self.assertFalse(proc.ok)
+        self.assertIn('Query failed', proc.err)
+
+    def test_group_not_found(self):
+        proc = self.mirror('sync', '--group', 'does-not-exist')
+        self.assertFalse(proc.ok)
+        self.assertIn('Group "does-not-exist" not found', proc.err)
@@ -0,0 +1,38 @@
+import os
+import tempfile
+from unittest import TestCase
+import subprocess as sp
+
+
+from tests import settings
+
+
+class SnapshotCommandTest(TestCase):
+    def setUp(self):
+        self.testing_server = 'http://localhost:%s' % settings.DEFAULT_SQUAD_PORT
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def snapshot(self, *args):
+        argv = ['./manage.py', '--squad-host', self.testing_server, '--store-path', self.tmpdir.name, 'snapshot'] + list(args)
+        env = os.environ.copy()
+        env['LOG_LEVEL'] = 'INFO'
+        proc = sp.Popen(argv, stdout=sp.PIPE, stderr=sp.PIPE, env=env)
+        out, err = proc.communicate(timeout=60)
+        proc.ok = (proc.returncode == 0)
+        proc.err = err.decode('utf-8')
+        return proc
+
+    def test_unfinished_build(self):
+        # Results of builds which are not finished may still change
+        for args in [[], ['--output', os.path.join(self.tmpdir.name, 'my_build.bin')]]:
+            proc = self.snapshot('my_group/my_project/my_build', *args)
+            self.assertFalse(proc.ok)
+            self.assertIn('is not finished', proc.err)
+        self.assertEqual([], os.listdir(self.tmpdir.name))
+
+    def test_invalid_build(self):
+        self.assertFalse(self.snapshot('my_group/my_project').ok)
+        self.assertFalse(self.snapshot('my_group/my_project/does-not-exist').ok)
@@ -0,0 +1,14 @@
+def result(_id, name, status, environment, value=None, test_run=None):
+    """
+        Raw test/metric result, as SQUAD returns them, of suite 1
+    """
+
+    return {
+        'id': _id,
+        'name': name,
+        'status': status,
+        'result': value,
+        'environment': 'https://squad.example.com/api/environments/%d/' % environment,
+        'suite': 'https://squad.example.com/api/suites/1/',
+        'test_run': None if test_run is None else 'https://squad.example.com/api/testruns/%d/' % test_run,
+    }
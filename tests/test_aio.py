@@ -0,0 +1,166 @@
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+from . import settings
+from squad_client.core.api import ApiException
+from squad_client.core.models import SquadObjectException
+from squad_client.core.queryset import QuerySet
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+if aiohttp:
+    from squad_client.aio import AsyncSquadApi, ALL, Squad, Build
+    from squad_client.aio.shortcuts import retrieve_build_results, download_tests, submit_results
+
+
+def run(coroutine):
+    async def wrapper():
+        try:
+            return await coroutine
+        finally:
+            await AsyncSquadApi.close()
+    return asyncio.run(wrapper())
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp not available')
+class AsyncSquadApiTest(unittest.TestCase):
+
+    def setUp(self):
+        run(AsyncSquadApi.configure(url='http://localhost:%s' % settings.DEFAULT_SQUAD_PORT))
+
+    def test_malformed_url(self):
+        with self.assertRaises(ApiException):
+            run(AsyncSquadApi.configure('http:/malformed/url'))
+
+    def test_out_of_domain_object_url(self):
+        with self.assertRaises(ApiException):
+            run(AsyncSquadApi.get('http://some.other.url'))
+
+    def test_get(self):
+        response = run(AsyncSquadApi.get('/api/groups/', {'slug': 'my_group'}))
+        self.assertTrue(response.ok)
+        self.assertEqual(1, response.json()['count'])
+
+    @patch('squad_client.aio.api.asyncio.sleep')
+    def test_retry_idempotent_methods_only(self, sleep):
+        requests = []
+
+        class Unavailable:
+            status = 503
+            headers = {}
+            url = 'http://localhost/api/'
+
+            async def read(self):
+                return b''
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                pass
+
+        class Session:
+            def request(self, method, url, **kwargs):
+                requests.append(method)
+                return Unavailable()
+
+        with patch.object(AsyncSquadApi, 'get_session', return_value=Session()):
+            self.assertEqual(503, run(AsyncSquadApi.post('/api/submit/')).status_code)
+            self.assertEqual(['POST'], requests)
+
+            self.assertEqual(503, run(AsyncSquadApi.get('/api/groups/')).status_code)
+            self.assertEqual(['POST'] + ['GET'] * (AsyncSquadApi.retries + 1), requests)
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp not available')
+class AsyncModelsTest(unittest.TestCase):
+
+    def setUp(self):
+        run(AsyncSquadApi.configure(url='http://localhost:%s' % settings.DEFAULT_SQUAD_PORT))
+        self.squad = Squad()
+
+    def test_no_fetch_on_construction(self):
+        with self.assertRaises(SquadObjectException):
+            Build(1)
+
+    def test_groups(self):
+        groups = run(self.squad.groups(count=ALL))
+        self.assertIn('my_group', [g.slug for g in groups.values()])
+
+    def test_concurrent_lookups(self):
+        async def lookup():
+            group = await self.squad.group('my_group')
+            project = await group.project('my_project')
+            return await asyncio.gather(*[project.build('my_build%s' % n) for n in ['', '2', '3']])
+
+        builds = run(lookup())
+        self.assertEqual(['my_build', 'my_build2', 'my_build3'], [b.version for b in builds])
+
+    def test_build_tests(self):
+        async def tests():
+            build = await Build().get(1)
+            return await build.tests(), [t async for t in build.iter_tests()]
+
+        tests, iterated_tests = run(tests())
+        self.assertEqual(4, len(tests))
+        self.assertEqual(list(tests.keys()), [t.id for t in iterated_tests])
+
+    def test_accessors_are_awaitable(self):
+        async def fetch():
+            project = await (await self.squad.group('my_group')).project('my_project')
+            build = await project.build('my_build')
+            return await self.squad.backends(), await self.squad.statuses(count=1), await project.thresholds(), await build.testjobs()
+
+        backends, statuses, thresholds, testjobs = run(fetch())
+        self.assertEqual(['my-threshold'], [t.name for t in thresholds.values()])
+        self.assertEqual(1, len(statuses))
+        self.assertIsInstance(backends, dict)
+        self.assertIsInstance(testjobs, dict)
+
+        with self.assertRaises(TypeError):
+            QuerySet(self.squad, Build)
+
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_builds_concurrently(self):
+        builds = run(self.squad.builds(count=ALL))
+        concurrent_builds = run(self.squad.builds(count=ALL, workers=3))
+        self.assertEqual(list(builds.keys()), list(concurrent_builds.keys()))
+
+
+@unittest.skipIf(aiohttp is None, 'aiohttp not available')
+class AsyncShortcutsTest(unittest.TestCase):
+
+    def setUp(self):
+        run(AsyncSquadApi.configure(url='http://localhost:%s' % settings.DEFAULT_SQUAD_PORT, token='193cd8bb41ab9217714515954e8724f651ef8601'))
+
+    def test_retrieve_build_results(self):
+        results = run(retrieve_build_results('my_group/my_project/build/my_build'))
+        self.assertIsNotNone(results)
+        self.assertEqual(1, len(results))
+
+    def test_download_tests(self):
+        async def download():
+            project = await (await Squad().group('my_group')).project('my_project')
+            build = await project.build('my_build')
+            return await download_tests(project, build, output_filename='aio_build.txt')
+
+        self.assertTrue(run(download()))
+        with open('aio_build.txt') as fp:
+            self.assertEqual(4, len(fp.readlines()))
+        os.remove('aio_build.txt')
+
+    def test_submit_results(self):
+        success, _ = run(submit_results(
+            group_project_slug='my_group/my_private_project',
+            build_version='my_aio_build',
+            env_slug='my_env',
+            tests={'aio-suite/aio-test': 'pass'},
+            metrics={'aio-suite/aio-metric': 42},
+            metadata={'job_id': 'aio-job'},
+        ))
+        self.assertTrue(success)
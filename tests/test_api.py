@@ -1,9 +1,21 @@
+import os
+import requests
+import requests_cache
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from http.client import HTTPMessage
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from requests.adapters import HTTPAdapter
+from threading import Barrier, Thread
 from unittest import TestCase
 from unittest.mock import ANY, Mock, patch, call
 
 from . import settings
-from squad_client.core.api import SquadApi, ApiException
+from squad_client.core.api import SquadApi, SquadClient, ApiException
+from squad_client.core.models import Squad
+from squad_client.utils import first
 
 
 class SquadApiTest(TestCase):
@@ -50,3 +62,289 @@ class SquadApiTest(TestCase):
             call("GET", "/testme/", body=None, headers=ANY),
             call("GET", "/testme/", body=None, headers=ANY),
         ])
+
+
+class SquadClientTest(TestCase):
+
+    def setUp(self):
+        self.url = 'http://localhost:%s' % settings.DEFAULT_SQUAD_PORT
+        self.client = SquadClient(self.url)
+        self.admin_client = SquadClient(self.url, token='193cd8bb41ab9217714515954e8724f651ef8601')
+
+    def test_malformed_url(self):
+        with self.assertRaises(ApiException):
+            SquadClient('http:/malformed/url')
+
+    def test_independent_clients(self):
+        with self.assertRaises(ApiException):
+            self.client.get('/my_group/my_private_project')
+
+        response = self.admin_client.get('/my_group/my_private_project')
+        self.assertTrue(response.ok)
+
+    def test_pool_maxsize(self):
+        client = SquadClient(self.url, pool_maxsize=32)
+        adapter = client.get_session().get_adapter(self.url)
+        self.assertEqual(32, adapter._pool_maxsize)
+
+    def test_models_bound_to_client(self):
+        with patch.object(SquadApi, 'client', None):
+            with self.assertRaises(ApiException):
+                Squad().group('my_group')
+
+            group = Squad(client=self.admin_client).group('my_group')
+            project = group.project('my_private_project')
+            self.assertIs(self.admin_client, project.__client__)
+            self.assertEqual('my_private_project', project.slug)
+
+    def test_clients_in_threads(self):
+        def project_count(client):
+            return len(Squad(client=client).projects(group__slug='my_group'))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            counts = list(executor.map(project_count, [self.client, self.admin_client] * 4))
+
+        self.assertEqual([counts[0], counts[1]] * 4, counts)
+        self.assertTrue(counts[0] < counts[1])
+
+    def test_coalesce_identical_gets(self):
+        session = self.client.get_session()
+        barrier = Barrier(4)
+
+        def get(params):
+            barrier.wait()
+            return self.client.get('/api/groups/', params)
+
+        send = session.request
+
+        def slow_request(*args, **kwargs):
+            time.sleep(0.2)
+            return send(*args, **kwargs)
+
+        with patch.object(session, 'request', side_effect=slow_request) as request:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                responses = list(executor.map(get, [{'slug': 'my_group'}] * 4))
+
+        self.assertEqual(1, request.call_count)
+        self.assertEqual(1, len(set(id(r) for r in responses)))
+        self.assertEqual({}, self.client.inflight)
+
+    def test_coalesce_shares_errors(self):
+        session = self.client.get_session()
+        barrier = Barrier(2)
+
+        def slow_failure(*args, **kwargs):
+            time.sleep(0.2)
+            raise requests.exceptions.ConnectionError('boom')
+
+        def get(_):
+            barrier.wait()
+            with self.assertRaises(ApiException):
+                self.client.get('/api/groups/')
+
+        with patch.object(session, 'request', side_effect=slow_failure) as request:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(get, range(2)))
+
+        self.assertEqual(1, request.call_count)
+        self.assertEqual({}, self.client.inflight)
+
+    def test_no_coalesce(self):
+        client = SquadClient(self.url, coalesce=False)
+        session = client.get_session()
+        with patch.object(session, 'request', wraps=session.request) as request:
+            client.get('/api/groups/')
+            client.get('/api/groups/')
+        self.assertEqual(2, request.call_count)
+
+
+class ValidatorsHandler(BaseHTTPRequestHandler):
+    """
+        Serves the same body with ETag (/etag/) or Last-Modified (/modified/)
+        and answers 304 to matching conditional requests
+    """
+
+    body = b'{"finished": true}'
+    last_modified = 'Wed, 21 Oct 2015 07:28:00 GMT'
+    conditional_headers = []
+
+    def do_GET(self):
+        if_none_match = self.headers.get('If-None-Match')
+        if_modified_since = self.headers.get('If-Modified-Since')
+        self.conditional_headers.append(if_none_match or if_modified_since)
+
+        if if_none_match == '"v1"' or if_modified_since == self.last_modified:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        if self.path.startswith('/etag/'):
+            self.send_header('ETag', '"v1"')
+        elif self.path.startswith('/modified/'):
+            self.send_header('Last-Modified', self.last_modified)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SquadClientRevalidationTest(TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('localhost', 0), ValidatorsHandler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://localhost:%d' % self.server.server_port
+        ValidatorsHandler.conditional_headers = []
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_etag(self):
+        client = SquadClient(self.url, revalidate=True)
+        responses = [client.get('/etag/') for _ in range(3)]
+
+        self.assertEqual([None, '"v1"', '"v1"'], ValidatorsHandler.conditional_headers)
+        self.assertEqual([{'finished': True}] * 3, [r.json() for r in responses])
+        self.assertEqual([False, True, True], [r.from_cache for r in responses])
+
+    def test_last_modified(self):
+        client = SquadClient(self.url, revalidate=True)
+        responses = [client.get('/modified/') for _ in range(2)]
+
+        self.assertEqual([None, ValidatorsHandler.last_modified], ValidatorsHandler.conditional_headers)
+        self.assertEqual([{'finished': True}] * 2, [r.json() for r in responses])
+
+    def test_no_validators(self):
+        client = SquadClient(self.url, revalidate=True)
+        client.get('/plain/')
+        client.get('/plain/')
+        self.assertEqual([None, None], ValidatorsHandler.conditional_headers)
+
+    def test_revalidate_disabled(self):
+        client = SquadClient(self.url)
+        self.assertNotIsInstance(client.get_session(), requests_cache.CachedSession)
+        client.get('/etag/')
+        client.get('/etag/')
+        self.assertEqual([None, None], ValidatorsHandler.conditional_headers)
+
+
+class SquadClientCacheTest(TestCase):
+
+    def setUp(self):
+        self.url = 'http://localhost:%s' % settings.DEFAULT_SQUAD_PORT
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmpdir.name, 'cache')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def cached(self, client, path):
+        for response in client.get_session().cache.responses.values():
+            if response.url.startswith(self.url + path):
+                yield response
+
+    def test_cache_path(self):
+        client = SquadClient(self.url, cache=60, cache_path=self.cache_path)
+        self.assertFalse(client.get('/api/groups/').from_cache)
+        self.assertTrue(client.get('/api/groups/').from_cache)
+        self.assertTrue(os.path.exists(self.cache_path + '.sqlite'))
+
+    def test_per_endpoint_expiration(self):
+        client = SquadClient(self.url, cache=60, cache_path=self.cache_path)
+        now = datetime.now(timezone.utc)
+        expiration = {path: client.get(path).expires - now for path in ['/api/groups/', '/api/builds/', '/api/tests/']}
+
+        self.assertAlmostEqual(timedelta(hours=6), expiration['/api/groups/'], delta=timedelta(seconds=5))
+        self.assertAlmostEqual(timedelta(seconds=30), expiration['/api/builds/'], delta=timedelta(seconds=5))
+        self.assertAlmostEqual(timedelta(seconds=60), expiration['/api/tests/'], delta=timedelta(seconds=5))
+
+        # Tests of a suite keep growing as builds come in
+        suite = first(Squad(client=client).suites(count=1))
+        expiration = client.get('/api/suites/%d/tests/' % suite.id).expires - datetime.now(timezone.utc)
+        self.assertAlmostEqual(timedelta(seconds=30), expiration, delta=timedelta(seconds=5))
+
+    def test_custom_rules(self):
+        client = SquadClient(self.url, cache=60, cache_path=self.cache_path, cache_rules={'*/api/groups/*': 5})
+        expiration = client.get('/api/groups/').expires - datetime.now(timezone.utc)
+        self.assertAlmostEqual(timedelta(seconds=5), expiration, delta=timedelta(seconds=2))
+
+    def test_finished_build_never_expires(self):
+        client = SquadClient(self.url, cache=60, cache_path=self.cache_path)
+        build = Squad(client=client).builds(count=1, version='my_build')
+        build = list(build.values())[0]
+
+        build.finished = False
+        len(build.tests())
+        self.assertIsNotNone(list(self.cached(client, '/api/builds/%d/tests/' % build.id))[0].expires)
+
+        build.finished = True
+        len(build.metrics())
+        self.assertIsNone(list(self.cached(client, '/api/builds/%d/metrics/' % build.id))[0].expires)
+
+    def test_tokens_do_not_share_entries(self):
+        admin_client = SquadClient(self.url, token='193cd8bb41ab9217714515954e8724f651ef8601', cache=60, cache_path=self.cache_path)
+        self.assertTrue(admin_client.get('/my_group/my_private_project').ok)
+
+        client = SquadClient(self.url, cache=60, cache_path=self.cache_path)
+        with self.assertRaises(ApiException):
+            client.get('/my_group/my_private_project')
+
+
+class SquadClientOfflineTest(TestCase):
+
+    def setUp(self):
+        self.url = 'http://localhost:%s' % settings.DEFAULT_SQUAD_PORT
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmpdir.name, 'cache')
+
+        # Responses to /api/tests/ expire after `cache` seconds
+        client = SquadClient(self.url, cache=1, cache_path=self.cache_path)
+        client.get('/api/groups/')
+        client.get('/api/tests/')
+        time.sleep(1.1)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def unreachable(self):
+        return patch.object(HTTPAdapter, 'send', side_effect=requests.exceptions.ConnectionError('unreachable'))
+
+    def test_offline(self):
+        client = SquadClient(self.url, cache_path=self.cache_path, offline=True)
+        with self.unreachable() as send:
+            self.assertTrue(client.get('/api/groups/').from_cache)
+            self.assertTrue(client.get('/api/tests/').is_expired)
+
+            with self.assertRaisesRegex(ApiException, '^"%s/api/builds/" is not cached' % self.url):
+                client.get('/api/builds/')
+            with self.assertRaisesRegex(ApiException, 'while offline'):
+                client.post('/api/groups/', data={'slug': 'offline'})
+
+        send.assert_not_called()
+
+    def test_prefer_cache(self):
+        client = SquadClient(self.url, cache_path=self.cache_path, prefer_cache=True)
+        with self.unreachable() as send:
+            self.assertTrue(client.get('/api/tests/').is_expired)
+        send.assert_not_called()
+
+        response = client.get('/api/builds/')
+        self.assertFalse(response.from_cache)
+        self.assertTrue(client.get('/api/builds/').from_cache)
+
+    def test_configure_offline(self):
+        self.addCleanup(SquadApi.configure, self.url)
+        SquadApi.configure(self.url, cache=60, cache_path=self.cache_path)
+        SquadApi.get('/api/groups/')
+
+        with self.unreachable() as send:
+            SquadApi.configure(self.url, cache_path=self.cache_path, offline=True)
+            self.assertTrue(SquadApi.get('/api/groups/').ok)
+
+        send.assert_not_called()
+        self.assertIsNone(SquadApi.version)
@@ -0,0 +1,169 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from . import settings
+from squad_client.core.api import SquadClient, ApiException
+from squad_client.core.cache import FileLock, LRUSQLiteDict, DirectoryCache, SQLiteLRUCache
+
+
+# Forking while other threads hold locks (e.g. logging's) may deadlock children
+context = multiprocessing.get_context('spawn')
+
+ENDPOINTS = ['/api/groups/', '/api/projects/', '/api/builds/', '/api/suites/', '/api/environments/']
+
+
+def hold_lock(path, seconds):
+    with FileLock(path):
+        time.sleep(seconds)
+
+
+def read_once(path, key):
+    # Kept alive until exit, like the cache of a client stored in a global
+    read_once.responses = LRUSQLiteDict(path, table_name='responses')
+    read_once.responses[key]
+
+
+def fetch_all(args):
+    url, backend, path = args
+    client = SquadClient(url, cache=60, cache_backend=backend, cache_path=path)
+    return [client.get(endpoint).json()['count'] for endpoint in ENDPOINTS]
+
+
+class FileLockTest(TestCase):
+
+    def test_excludes_other_processes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'lock')
+            process = context.Process(target=hold_lock, args=(path, 1))
+            process.start()
+            while not os.path.exists(path):
+                time.sleep(0.01)
+            time.sleep(0.1)
+
+            start = time.time()
+            with FileLock(path):
+                waited = time.time() - start
+            process.join()
+
+            self.assertTrue(waited > 0.5)
+
+    def test_reentrant(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            lock = FileLock(os.path.join(tmpdir, 'lock'))
+            with lock:
+                with lock:
+                    self.assertEqual(2, lock.depth)
+            self.assertEqual(0, lock.depth)
+            self.assertIsNone(lock.fd)
+
+
+class LRUSQLiteDictTest(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            responses = LRUSQLiteDict(os.path.join(tmpdir, 'cache.sqlite'), table_name='responses', max_size=3500)
+            for key in ['a', 'b', 'c']:
+                responses[key] = b'x' * 1000
+            responses['a']
+            responses['d'] = b'x' * 1000
+
+            self.assertEqual(['a', 'c', 'd'], sorted(responses.keys()))
+
+    def test_batches_access_times(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            responses = LRUSQLiteDict(os.path.join(tmpdir, 'cache.sqlite'), table_name='responses', max_size=10 ** 6)
+
+            def accessed():
+                with responses.connection() as con:
+                    return dict(con.execute('SELECT key, accessed FROM responses'))
+
+            with patch.object(responses, 'evict') as evict:
+                for key in ['a', 'b', 'c']:
+                    responses[key] = b'x' * 1000
+                evict.assert_not_called()
+
+            written = accessed()
+            responses['a']
+            self.assertEqual(written, accessed())
+
+            responses.flush()
+            self.assertTrue(accessed()['a'] > written['a'])
+            self.assertEqual(written['b'], accessed()['b'])
+
+    def test_records_access_times_at_exit(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'cache.sqlite')
+            responses = LRUSQLiteDict(path, table_name='responses')
+            responses['a'] = b'x'
+
+            def accessed():
+                with responses.connection() as con:
+                    return con.execute('SELECT accessed FROM responses').fetchone()[0]
+
+            written = accessed()
+            process = context.Process(target=read_once, args=(path, 'a'))
+            process.start()
+            process.join()
+
+            self.assertEqual(0, process.exitcode)
+            self.assertTrue(accessed() > written)
+
+
+class SharedCacheTest(TestCase):
+
+    def setUp(self):
+        self.url = 'http://localhost:%s' % settings.DEFAULT_SQUAD_PORT
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cache')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ApiException):
+            SquadClient(self.url, cache=60, cache_backend='redis')
+
+    def test_sqlite(self):
+        client = SquadClient(self.url, cache=60, cache_path=self.path)
+        self.assertIsInstance(client.get_session().cache, SQLiteLRUCache)
+        self.assertFalse(client.get('/api/groups/').from_cache)
+
+        other_client = SquadClient(self.url, cache=60, cache_path=self.path)
+        self.assertTrue(other_client.get('/api/groups/').from_cache)
+        self.assertTrue(os.path.exists(self.path + '.sqlite-wal'))
+
+    def test_directory(self):
+        client = SquadClient(self.url, cache=60, cache_backend='directory', cache_path=self.path)
+        self.assertIsInstance(client.get_session().cache, DirectoryCache)
+        self.assertFalse(client.get('/api/groups/').from_cache)
+
+        other_client = SquadClient(self.url, cache=60, cache_backend='directory', cache_path=self.path)
+        self.assertTrue(other_client.get('/api/groups/').from_cache)
+        self.assertEqual(1, len([f for f in os.listdir(self.path) if f.endswith('.json')]))
+        self.assertEqual([], [f for f in os.listdir(self.path) if f.endswith('.tmp')])
+        self.assertEqual([], [f for f in os.listdir(self.path) if f.endswith('-wal')])
+
+    def test_max_size(self):
+        for backend in ['sqlite', 'directory']:
+            path = os.path.join(self.tmpdir.name, backend)
+            client = SquadClient(self.url, cache=60, cache_backend=backend, cache_path=path, cache_max_size=4096)
+            for endpoint in ENDPOINTS:
+                client.get(endpoint)
+
+            responses = client.get_session().cache.responses
+            self.assertTrue(0 < len(responses) < len(ENDPOINTS), backend)
+            self.assertTrue(client.get(ENDPOINTS[-1]).from_cache, backend)
+
+    def test_concurrent_processes(self):
+        for backend in ['sqlite', 'directory']:
+            path = os.path.join(self.tmpdir.name, backend)
+            with context.Pool(4) as pool:
+                counts = pool.map(fetch_all, [(self.url, backend, path)] * 8)
+
+            self.assertEqual([counts[0]] * 8, counts, backend)
+            client = SquadClient(self.url, cache=60, cache_backend=backend, cache_path=path)
+            self.assertTrue(all(client.get(endpoint).from_cache for endpoint in ENDPOINTS), backend)
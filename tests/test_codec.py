@@ -0,0 +1,84 @@
+import json
+import math
+import uuid
+from unittest import TestCase
+from unittest.mock import patch
+
+from squad_client import codec
+from squad_client.core.models import SquadObjectJSONEncoder, TestRunMetadata
+
+
+class CodecTest(TestCase):
+
+    payload = {'count': 2, 'next': None, 'results': [{'id': 1, 'status': 'pass', 'result': True}, {'id': 2, 'name': 'ação/ü'}]}
+
+    def test_roundtrip(self):
+        encoded = codec.dumps(self.payload)
+        self.assertIsInstance(encoded, str)
+        self.assertEqual(self.payload, json.loads(encoded))
+        self.assertEqual(self.payload, codec.loads(encoded))
+        self.assertEqual(self.payload, codec.loads(encoded.encode('utf-8')))
+
+    def test_non_string_keys(self):
+        self.assertEqual({'1': 'pass'}, codec.loads(codec.dumps({1: 'pass'})))
+
+    def test_not_strict_json(self):
+        self.assertEqual([1, 2 ** 70], codec.loads(codec.dumps([1, 2 ** 70])))
+        self.assertTrue(codec.loads(b'[NaN]')[0] != codec.loads(b'[NaN]')[0])
+
+    def test_non_finite_floats(self):
+        payload = {'metrics': {'a': float('nan'), 'b': [float('inf'), -float('inf'), None, 1.5]}}
+        decoded = codec.loads(codec.dumps(payload))
+        self.assertTrue(math.isnan(decoded['metrics']['a']))
+        self.assertEqual([float('inf'), -float('inf'), None, 1.5], decoded['metrics']['b'])
+        self.assertEqual('{"a":null}', codec.dumps({'a': None}))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            codec.loads(b'[{"id"')
+
+    def test_default(self):
+        metadata = TestRunMetadata()
+        metadata.job_id = '123'
+        encoded = codec.dumps({'uuid': uuid.UUID(int=1), 'metadata': metadata}, default=SquadObjectJSONEncoder().default)
+        self.assertEqual({'uuid': str(uuid.UUID(int=1)), 'metadata': {'job_id': '123'}}, json.loads(encoded))
+
+        with self.assertRaises(TypeError):
+            codec.dumps({'object': object()}, default=SquadObjectJSONEncoder().default)
+
+    def test_without_orjson(self):
+        with patch.object(codec, 'orjson', None):
+            self.assertEqual(self.payload, codec.loads(codec.dumps(self.payload).encode('utf-8')))
+            self.assertEqual('{"id":1}', codec.dumps({'id': 1}))
+
+
+class IterloadTest(TestCase):
+
+    page = {'count': 3, 'next': None, 'results': [{'id': 1, 'log': 'ação ' * 100}, {'id': 2, 'value': 1234.5}, {'id': 3}], 'previous': None}
+
+    def chunks(self, obj, size):
+        content = json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+        return [content[i:i + size] for i in range(0, len(content), size)]
+
+    def test_results(self):
+        for size in [1, 3, 64, 4096]:
+            envelope = {}
+            results = list(codec.iterload(self.chunks(self.page, size), key='results', envelope=envelope))
+            self.assertEqual(self.page['results'], results, size)
+            self.assertEqual({'count': 3, 'next': None, 'previous': None}, envelope, size)
+
+    def test_one_at_a_time(self):
+        chunks = iter(self.chunks(self.page, 16))
+        results = codec.iterload(chunks, key='results')
+        self.assertEqual(1, next(results)['id'])
+        self.assertTrue(len(list(chunks)) > 0)
+
+    def test_top_level_members(self):
+        self.assertEqual([1, 234, 5], list(codec.iterload([b'[1, 23', b'4, 5]'])))
+        self.assertEqual([('1', {'foo': 'bar'}), ('2', {})], list(codec.iterload(self.chunks({'1': {'foo': 'bar'}, '2': {}}, 5))))
+        self.assertEqual([], list(codec.iterload([b' [ ] '])))
+
+    def test_invalid(self):
+        for content in [b'', b'None', b'[1, 2', b'[1 2]', b'{"a" 1}', b'{1: 2}', b'[1] 2']:
+            with self.assertRaises(ValueError, msg=content):
+                list(codec.iterload([content]))
@@ -0,0 +1,85 @@
+import unittest
+
+from . import settings
+from squad_client.core.api import SquadApi
+from squad_client.core.compact import compact_class
+from squad_client.core.models import Squad, Test, BuildMetadata, SquadObjectException
+from squad_client.utils import first
+
+
+SquadApi.configure(url='http://localhost:%s' % settings.DEFAULT_SQUAD_PORT)
+
+
+class CompactClassTest(unittest.TestCase):
+
+    result = {
+        'url': 'https://squad.example.com/api/tests/10/',
+        'id': 10,
+        'name': 'suite/test',
+        'short_name': 'test',
+        'status': 'pass',
+        'test_run': 'https://squad.example.com/api/testruns/2000/',
+        'suite': 'https://squad.example.com/api/suites/3/',
+        'known_issues': ['https://squad.example.com/api/knownissues/4/'],
+        'metadata': None,
+    }
+
+    def test_build(self):
+        test = compact_class(Test).__hydrator__().build(self.result)
+        self.assertFalse(hasattr(test, '__dict__'))
+        self.assertEqual((10, 'suite/test', 'pass'), (test.id, test.name, test.status))
+        self.assertEqual(self.result['url'], test.url)
+        self.assertEqual((2000, self.result['test_run']), (test.test_run_id, test.test_run))
+        self.assertEqual(((4,), self.result['known_issues']), (test.known_issues_ids, test.known_issues))
+        self.assertIsNone(test.metadata)
+        self.assertFalse(hasattr(test, 'build'))
+        self.assertEqual('test', repr(test))
+
+    def test_shared_values(self):
+        hydrator = compact_class(Test).__hydrator__()
+        test = hydrator.build(self.result)
+        other = hydrator.build(dict(self.result, status=''.join(['pa', 'ss']), test_run=''.join(self.result['test_run'])))
+        self.assertIs(test.status, other.status)
+        self.assertEqual(test.test_run_id, other.test_run_id)
+
+    def test_url_left_out(self):
+        test = compact_class(Test).__hydrator__().build({'id': 10, 'status': 'pass'})
+        self.assertIsNone(test.url)
+
+    def test_readonly(self):
+        test = compact_class(Test, readonly=True).__hydrator__().build(self.result)
+        self.assertIsInstance(test, compact_class(Test))
+        with self.assertRaises(AttributeError):
+            test.status = 'fail'
+
+        writable = compact_class(Test).__hydrator__().build(self.result)
+        writable.status = 'fail'
+        self.assertEqual('fail', writable.status)
+
+
+class CompactModelsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.squad = Squad()
+        self.build = first(self.squad.builds(version='my_build'))
+
+    def test_tests(self):
+        tests = self.build.tests()
+        compact_tests = self.build.tests(compact=True)
+        self.assertEqual(list(tests.keys()), list(compact_tests.keys()))
+        for _id, test in tests.items():
+            compact_test = compact_tests[_id]
+            for attr in ['url', 'name', 'status', 'test_run', 'suite', 'build', 'environment', 'known_issues']:
+                self.assertEqual(getattr(test, attr), getattr(compact_test, attr), attr)
+
+    def test_iter_metrics_and_testruns(self):
+        metrics = [m.url for m in self.build.iter_metrics()]
+        self.assertEqual(metrics, [m.url for m in self.build.iter_metrics(compact=True, readonly=True)])
+
+        testruns = self.build.testruns()
+        compact_testruns = self.build.testruns(compact=True)
+        self.assertEqual([t.environment for t in testruns.values()], [t.environment for t in compact_testruns.values()])
+
+    def test_no_compact_version(self):
+        with self.assertRaises(SquadObjectException):
+            len(self.squad.fetch(BuildMetadata, compact=True))
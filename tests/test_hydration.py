@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from squad_client.core.api import SquadClient
+from squad_client.core.hydration import Hydrator
+from squad_client.core.models import SquadObject, Test, TestRun, TestRunMetadata, TestRunAttachment
+
+
+class HydratorTest(TestCase):
+
+    def test_build(self):
+        client = SquadClient('http://squad.example.com')
+        test = Test.__hydrator__().build({'id': 1, 'status': 'pass', 'unknown': 'ignored'}, client)
+        self.assertIsInstance(test, Test)
+        self.assertEqual((1, 'pass'), (test.id, test.status))
+        self.assertIs(client, test.__client__)
+        self.assertFalse(hasattr(test, 'unknown'))
+        self.assertFalse(hasattr(test, 'name'))
+
+    def test_cached_per_class(self):
+        self.assertIs(Test.__hydrator__(), Test.__hydrator__())
+        self.assertIsNot(Test.__hydrator__(), TestRun.__hydrator__())
+        self.assertFalse(Test.__hydrator__().initialize)
+        self.assertTrue(TestRun.__hydrator__().initialize)
+
+    def test_initialized(self):
+        testrun = TestRun.__hydrator__().build({'id': 1, 'attachments': [{'filename': 'log.txt'}]})
+        self.assertEqual(None, testrun.__metadata__)
+        self.assertIsInstance(testrun.attachments[0], TestRunAttachment)
+        self.assertEqual('log.txt', testrun.attachments[0].filename)
+
+    def test_any_attribute(self):
+        metadata = TestRunMetadata.__hydrator__().build({'job id': 1, 'boot-time/arm64': 2})
+        self.assertEqual((1, 2), (metadata.job_id, metadata.boot_time_arm64))
+
+    def test_fill(self):
+        test = Test()
+        SquadObject().__fill_object__({'id': 2, 'status': 'fail'}, test)
+        self.assertEqual((2, 'fail'), (test.id, test.status))
+
+    def test_uninitialized(self):
+        hydrator = Hydrator(type('Dynamic', (SquadObject,), {}), initialize=False)
+        obj = hydrator.build({'status-code': 'pass'})
+        self.assertEqual('pass', obj.status_code)
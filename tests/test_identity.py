@@ -0,0 +1,92 @@
+import unittest
+from unittest.mock import patch
+
+from . import settings
+from squad_client.core.api import SquadClient
+from squad_client.core.identity import IdentityMap
+from squad_client.core.models import Squad, ALL, Build, Environment, Project, Suite, SquadObjectException
+
+
+class IdentityMapTest(unittest.TestCase):
+
+    def test_put(self):
+        identity = IdentityMap()
+        environment = Environment()
+        environment.id = 1
+        identity.put(environment)
+        identity.put(Environment())
+
+        self.assertIs(environment, identity.get(Environment, 1))
+        self.assertIsNone(identity.get(Suite, 1))
+        self.assertEqual([2], identity.missing(Environment, [1, 2]))
+        self.assertEqual(1, len(identity))
+
+
+class RelatedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SquadClient('http://localhost:%s' % settings.DEFAULT_SQUAD_PORT)
+        self.squad = Squad(client=self.client)
+        self.build = self.squad.builds(version='my_build').first()
+
+    def get(self):
+        return patch.object(self.client, 'get', wraps=self.client.get)
+
+    def test_related(self):
+        test = self.build.tests().first()
+        with self.get() as get:
+            environment = test.related('environment')
+            self.assertEqual(1, get.call_count)
+            self.assertEqual('my_env', environment.slug)
+
+            self.assertIs(environment, test.related('environment'))
+            self.assertEqual(1, get.call_count)
+
+    def test_fetched_objects_are_mapped(self):
+        project = self.build.related('project')
+        environments = project.environments(count=ALL)
+        self.assertEqual(2, len(environments))
+        self.assertIs(project, self.client.identity.get(Project, project.id))
+
+        test = self.build.tests().first()
+        with self.get() as get:
+            self.assertIs(environments[test.related('environment').id], test.related('environment'))
+            get.assert_not_called()
+
+    def test_partial_objects_are_not_mapped(self):
+        self.squad.builds(count=ALL).only('version').values()
+        self.assertEqual(0, len(self.client.identity.missing(Build, [self.build.id])))
+
+        self.client.identity.clear()
+        self.squad.builds(count=ALL).only('version').values()
+        self.assertEqual([self.build.id], self.client.identity.missing(Build, [self.build.id]))
+
+    def test_iterated_objects_are_not_mapped(self):
+        self.client.identity.clear()
+        builds = list(self.squad.iter(Build))
+        self.assertTrue(len(builds) > 1)
+        self.assertEqual(0, len(self.client.identity))
+
+    def test_prefetch_related(self):
+        tests = self.build.tests(count=ALL).prefetch_related('environment', 'suite')
+        with self.get() as get:
+            self.assertTrue(len(tests) > 1)
+            # A page of tests, then environments and suites they refer to
+            self.assertEqual(3, get.call_count)
+            self.assertIn('id__in', get.call_args[0][1])
+
+            for test in tests.values():
+                self.assertIsNotNone(test.related('environment'))
+                self.assertIsNotNone(test.related('suite'))
+            self.assertEqual(3, get.call_count)
+
+    def test_clients_have_their_own_maps(self):
+        other = SquadClient('http://localhost:%s' % settings.DEFAULT_SQUAD_PORT)
+        build = Squad(client=other).builds(version='my_build').first()
+        self.assertIsNot(build.related('project'), self.build.related('project'))
+        self.assertEqual(build.related('project').id, self.build.related('project').id)
+
+    def test_not_a_mapped_relation(self):
+        test = self.build.tests().first()
+        with self.assertRaises(SquadObjectException):
+            test.related('test_run')
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from . import settings
+from squad_client.core.api import SquadApi
+from squad_client.core.mirror import Mirror
+from squad_client.core.models import Squad, Build
+from squad_client.exceptions import InvalidMirror
+
+
+SquadApi.configure(url='http://localhost:%s' % settings.DEFAULT_SQUAD_PORT)
+
+
+class MirrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.mirror = Mirror(os.path.join(self.tmpdir.name, 'mirror.sqlite3'))
+        self.squad = Squad()
+        self.group = self.squad.group('my_group')
+        self.project = self.group.project('my_project')
+
+    def tearDown(self):
+        self.mirror.close()
+        self.tmpdir.cleanup()
+
+    def count(self, table, **where):
+        conditions = ' AND '.join('%s = ?' % column for column in where) or '1'
+        return self.mirror.query('SELECT count(*) FROM %s WHERE %s' % (table, conditions), tuple(where.values())).fetchone()[0]
+
+    def test_sync(self):
+        num_builds = len(self.project.builds(count=-1))
+        self.assertEqual(num_builds, self.mirror.sync(self.project))
+        self.assertEqual(num_builds, self.count('builds', project_id=self.project.id))
+
+        build = self.project.build('my_build')
+        self.assertEqual(len(build.tests()), self.count('tests', build_id=build.id))
+        self.assertEqual(len(build.metrics()), self.count('metrics', build_id=build.id))
+        self.assertEqual(len(build.testruns()), self.count('testruns', build_id=build.id))
+
+        failures = self.mirror.query('''
+            SELECT t.name FROM tests t
+            JOIN builds b ON b.id = t.build_id
+            JOIN environments e ON e.id = t.environment_id
+            WHERE b.version = 'my_build' AND e.slug = 'my_env' AND t.status = 'fail'
+        ''').fetchall()
+        environment = self.project.environment('my_env')
+        expected = [t.name for t in build.tests().values() if t.status == 'fail' and t.environment == environment.url]
+        self.assertEqual(sorted(expected), sorted(name for name, in failures))
+        self.assertTrue(len(failures) > 0)
+
+    def test_incremental(self):
+        self.assertEqual(2, self.mirror.sync(self.project, count=2))
+
+        # Unfinished builds are mirrored again
+        self.assertEqual(2, self.mirror.sync(self.project, count=2))
+        num_tests = self.count('tests')
+
+        with patch.object(Build, 'immutable', True):
+            self.assertEqual(2, self.mirror.sync(self.project, count=2))
+            self.assertEqual(0, self.mirror.sync(self.project, count=2))
+            self.assertEqual(1, self.mirror.sync(self.project, count=3))
+        self.assertEqual(3, self.count('builds', synced=1))
+        self.assertTrue(self.count('tests') >= num_tests)
+
+    def test_resume_unfinished_builds(self):
+        self.mirror.sync(self.project)
+        num_tests = self.count('tests')
+        num_metrics = self.count('metrics')
+
+        with patch.object(SquadApi, 'get', wraps=SquadApi.get) as get:
+            self.mirror.sync(self.project)
+            endpoints = [c[0][0] for c in get.call_args_list]
+            self.assertEqual([], [e for e in endpoints if e.endswith('/tests/') or e.endswith('/metrics/')])
+
+        testrun, = self.mirror.query('SELECT max(id) FROM testruns').fetchone()
+        self.mirror.query('UPDATE testruns SET completed = 0 WHERE id = ?', (testrun,))
+        with patch.object(SquadApi, 'get', wraps=SquadApi.get) as get:
+            self.mirror.sync(self.project)
+            filters = [c[0][1] for c in get.call_args_list if c[0][0].endswith('/tests/')]
+            self.assertEqual([str(testrun)], [f['test_run__id__in'] for f in filters])
+
+        self.assertEqual(num_tests, self.count('tests'))
+        self.assertEqual(num_metrics, self.count('metrics'))
+        self.assertEqual(0, self.count('testruns', completed=0))
+
+    def test_other_server(self):
+        self.mirror.check_server('http://squad.example.com/')
+        with self.assertRaises(InvalidMirror):
+            self.mirror.sync(self.project, count=1)
@@ -1,8 +1,12 @@
+import types
 import unittest
+from collections import OrderedDict
 
 from . import settings
-from squad_client.core.api import SquadApi
-from squad_client.core.models import Squad, ALL, Project, TestJob
+from squad_client import codec
+from squad_client.core.api import SquadApi, SquadClient
+from squad_client.core.models import Squad, ALL, Build, Project, Test, Metric, TestJob, TestRunStatus, SquadObjectException
+from squad_client.exceptions import InvalidSquadLookup
 from squad_client.utils import first
 from unittest.mock import patch
 
@@ -46,6 +50,34 @@ class SquadTest(unittest.TestCase):
         builds = self.squad.builds()
         self.assertTrue(True, len(builds))
 
+    def test_get_many(self):
+        builds = self.squad.builds(count=ALL)
+        ids = sorted(builds, reverse=True) + [999999]
+        with patch.object(SquadApi, 'get', wraps=SquadApi.get) as get:
+            fetched = self.squad.get_many(Build, [str(_id) for _id in ids] + ids[:2])
+            self.assertEqual(1, get.call_count)
+
+        self.assertEqual(ids[:-1], list(fetched))
+        self.assertEqual([builds[_id].version for _id in ids[:-1]], [build.version for build in fetched.values()])
+
+    def test_get_many_chunks(self):
+        ids = sorted(self.squad.builds(count=ALL))
+        with patch.object(SquadApi, 'get', wraps=SquadApi.get) as get, patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2):
+            fetched = self.squad.get_many(Build, ids, workers=2, fields='id,version')
+            self.assertEqual((len(ids) + 1) // 2, get.call_count)
+
+        self.assertEqual(ids, list(fetched))
+        self.assertFalse(hasattr(fetched[ids[0]], 'created_at'))
+
+    def test_get_many_without_id_filter(self):
+        with self.assertRaises(SquadObjectException):
+            self.squad.get_many(Test, [1, 2])
+
+    def test_get_many_ignored_id_filter(self):
+        # There's no id filter of tests, so the API returns whatever tests come first
+        with patch.object(Test, 'id_lookup', 'id__in'), self.assertRaises(SquadObjectException):
+            self.squad.get_many(Test, [999999])
+
     def test_testjobs(self):
         testjobs = self.squad.testjobs()
         self.assertTrue(True, len(testjobs))
@@ -94,6 +126,82 @@ class SquadTest(unittest.TestCase):
         reports = self.squad.reports()
         self.assertTrue(True, len(reports))
 
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_builds_concurrently(self):
+        builds = self.squad.builds(count=ALL)
+        concurrent_builds = self.squad.builds(count=ALL, workers=3)
+        self.assertEqual(list(builds.keys()), list(concurrent_builds.keys()))
+
+        builds = self.squad.builds(count=3, offset=1)
+        concurrent_builds = self.squad.builds(count=3, offset=1, workers=3)
+        self.assertEqual(list(builds.keys()), list(concurrent_builds.keys()))
+
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_tests_concurrently_without_count(self):
+        tests = self.squad.tests(count=ALL)
+        concurrent_tests = self.squad.tests(count=ALL, workers=3)
+        self.assertEqual(list(tests.keys()), list(concurrent_tests.keys()))
+
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_iter(self):
+        builds = self.squad.fetch(Build)
+        iterated_builds = self.squad.iter(Build)
+        self.assertTrue(isinstance(iterated_builds, types.GeneratorType))
+        self.assertEqual(list(builds.keys()), [b.id for b in iterated_builds])
+
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_iter_concurrently(self):
+        builds = self.squad.fetch(Build)
+        iterated_builds = self.squad.iter(Build, workers=3)
+        self.assertEqual(list(builds.keys()), [b.id for b in iterated_builds])
+
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_keyset(self):
+        builds = self.squad.builds(count=ALL)
+        keyset_builds = self.squad.builds(count=ALL, keyset=True)
+        self.assertEqual(sorted(builds.keys()), list(keyset_builds.keys()))
+
+        tests = self.squad.tests(count=ALL, fields='id,status')
+        keyset_tests = self.squad.tests(count=ALL, fields='status', keyset=True)
+        self.assertEqual(sorted(tests.keys()), list(keyset_tests.keys()))
+
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_keyset_offset(self):
+        builds = sorted(self.squad.builds(count=ALL).keys())
+        keyset_builds = self.squad.builds(count=ALL, keyset=True, offset=1)
+        self.assertEqual(builds[1:], list(keyset_builds.keys()))
+
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 1)
+    def test_keyset_not_supported(self):
+        with self.assertRaises(SquadObjectException):
+            len(self.squad.groups(count=ALL, keyset=True))
+
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_stream(self):
+        builds = self.squad.builds(count=ALL)
+        streamed_builds = self.squad.builds(count=ALL, stream=True)
+        self.assertEqual(list(builds.keys()), list(streamed_builds.keys()))
+
+        keyset_builds = self.squad.iter(Build, keyset=True)
+        self.assertEqual(sorted(builds.keys()), [b.id for b in keyset_builds])
+
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_stream_closed_on_early_exit(self):
+        with patch('requests.Response.close', autospec=True) as close:
+            for build in self.squad.iter(Build):
+                break
+            self.assertEqual(1, close.call_count)
+
+            for testrun_id, metadata in first(self.squad.builds(version='my_build')).__metadata_by_testrun__():
+                break
+            self.assertEqual(2, close.call_count)
+
+    def test_iter_stops_on_first_page(self):
+        with patch('squad_client.core.api.SquadApi.get', wraps=SquadApi.get) as squad_api_get:
+            build = next(self.squad.iter(Build))
+            self.assertTrue(build.id is not None)
+            self.assertEqual(1, squad_api_get.call_count)
+
 
 class BuildTest(unittest.TestCase):
 
@@ -161,6 +269,24 @@ class BuildTest(unittest.TestCase):
         metrics = self.build2.metrics(environment__slug='my_env').values()
         self.assertEqual(0, len(metrics))
 
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_build_tests_keyset(self):
+        tests = self.build.tests(keyset=True)
+        self.assertEqual([1, 2, 3, 4], list(tests.keys()))
+
+    def test_build_iter_tests(self):
+        tests = self.build.tests()
+        iterated_tests = self.build.iter_tests()
+        self.assertEqual(list(tests.keys()), [t.id for t in iterated_tests])
+
+    def test_build_iter_metrics(self):
+        metrics = [m for m in self.build.iter_metrics(environment__slug='my_env')]
+        self.assertEqual(1, len(metrics))
+
+    def test_build_iter_testruns(self):
+        testruns = [t for t in self.build.iter_testruns()]
+        self.assertEqual(3, len(testruns))
+
     def test_build_testrun(self):
         testruns = self.build.testruns(prefetch_metadata=True)
         self.assertEqual(3, len(testruns))
@@ -194,6 +320,7 @@ class TestRunTest(unittest.TestCase):
     def test_testrun_status(self):
         status = self.testrun.summary()
         self.assertEqual(1, status.tests_fail)
+        self.assertEqual('/api/statuses/', TestRunStatus.endpoint)
 
     def test_testrun_attachment(self):
         """Test that created attachment entries can be retrieved from the TestRun."""
@@ -222,6 +349,17 @@ class ProjectTest(unittest.TestCase):
     def test_basic(self):
         self.assertTrue(self.project is not None)
 
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_project_builds_keyset(self):
+        builds = self.project.builds(count=ALL)
+        keyset_builds = self.project.builds(count=ALL, keyset=True)
+        self.assertEqual(sorted(builds.keys()), list(keyset_builds.keys()))
+
+    def test_project_iter_builds(self):
+        builds = self.project.builds(count=ALL)
+        iterated_builds = self.project.iter_builds()
+        self.assertEqual(list(builds.keys()), [b.id for b in iterated_builds])
+
     def test_project_environments(self):
         environments = self.project.environments()
         self.assertEqual(2, len(environments))
@@ -251,6 +389,22 @@ class ProjectTest(unittest.TestCase):
         comparison = self.project.compare_builds(self.build2.id, self.build.id, by="metrics")
         self.assertEqual('Cannot report regressions/fixes on non-finished builds', comparison[0])
 
+    def test_compare_builds_bound_client(self):
+        client = SquadClient('http://localhost:%s' % settings.DEFAULT_SQUAD_PORT)
+        project = Project(client=client)
+        with patch.object(client, 'get', wraps=client.get) as get, patch.object(SquadApi, 'get') as default_get:
+            comparison = project.compare_builds(self.build2.id, self.build.id)
+            self.assertEqual('Cannot report regressions/fixes on non-finished builds', comparison[0])
+            self.assertEqual(2, get.call_count)
+            default_get.assert_not_called()
+
+        comparison = Project.compare_builds(self.build2.id, self.build.id, force=True)
+        self.assertEqual({}, comparison['regressions'])
+
+    def test_compare_builds_not_found(self):
+        with self.assertRaises(InvalidSquadLookup):
+            self.project.compare_builds(self.build.id, 999999)
+
     def test_compare_builds_from_same_project_force(self):
         comparison = self.project.compare_builds(self.build2.id, self.build.id, force=True)
         self.assertEqual({}, comparison['regressions'])
@@ -281,6 +435,19 @@ class ProjectTest(unittest.TestCase):
         project = first(Squad().projects(slug=self.project.slug))
         self.assertTrue(project is not None)
 
+    def test_save_fills_project_settings_back(self):
+        saved = {'id': self.project.id, 'slug': self.project.slug, 'project_settings': 'SETTING: saved'}
+        response = types.SimpleNamespace(status_code=200, content=codec.dumps(saved).encode())
+
+        project = first(Squad().projects(slug=self.project.slug))
+        project.project_settings = 'SETTING: value'
+        with patch.object(SquadApi, 'patch', return_value=response) as request:
+            project.save()
+
+        self.assertEqual('SETTING: value', request.call_args[1]['data']['project_settings'])
+        self.assertEqual('SETTING: saved', project.project_settings)
+        self.assertNotIn('project_settings', Project.attrs)
+
     def test_project_basic_settings(self):
         self.assertTrue(hasattr(self.project, "basic_settings"))
         self.assertTrue(self.project.basic_settings is not None)
@@ -337,3 +504,102 @@ class TestJobTest(unittest.TestCase):
     def test_cancel(self):
         testjob = first(Squad().testjobs())
         self.assertTrue(testjob.cancel())
+
+
+class ProjectionTest(unittest.TestCase):
+
+    def test_projection(self):
+        self.assertEqual('id,status', Test.projection('status'))
+        self.assertEqual('id,name', Test.projection('name', 'not_an_attribute'))
+        self.assertNotIn('log', Test.projection(profile='list').split(','))
+        self.assertNotIn('measurement_list', Metric.projection(profile='list').split(','))
+
+    def test_profile(self):
+        build = Squad().builds(version='my_build').first()
+        tests = build.tests().profile('list')
+        self.assertEqual(Test.projection(profile='list'), tests.filters['fields'])
+        test = first(tests)
+        self.assertTrue(hasattr(test, 'status'))
+        self.assertNotIn('log', test.__dict__)
+
+
+class DeferredTest(unittest.TestCase):
+
+    def setUp(self):
+        self.build = Squad().builds(version='my_build').first()
+
+    def test_deferred_loaded_for_the_whole_page(self):
+        expected = {test.id: test.log for test in self.build.tests(count=ALL).values()}
+        tests = self.build.tests(count=ALL).profile()
+        self.assertTrue(len(tests) > 1)
+
+        with patch.object(SquadApi, 'get', wraps=SquadApi.get) as get:
+            logs = {test.id: test.log for test in tests.values()}
+            self.assertEqual(1, get.call_count)
+            self.assertEqual('id,log', get.call_args[0][1]['fields'])
+
+        self.assertEqual(expected, logs)
+
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_deferred_requests_the_page_again(self):
+        get = SquadApi.get
+        pages = []
+
+        def recording_get(*args, **kwargs):
+            response = get(*args, **kwargs)
+            pages.append([result['id'] for result in codec.loads(response.content)['results']])
+            return response
+
+        for iterate in [False, True]:
+            tests = self.build.tests(count=ALL).profile()
+            tests = list(tests.iterator() if iterate else tests.values())
+            batches = OrderedDict((id(test.__batch__), test.__batch__) for test in tests)
+            self.assertTrue(len(batches) > 1)
+
+            pages.clear()
+            with patch.object(SquadApi, 'get', side_effect=recording_get):
+                for batch in batches.values():
+                    batch.objects[0].log
+                    self.assertEqual([test.id for test in batch.objects], pages[-1])
+                    batch.objects[-1].log
+                self.assertEqual(len(batches), len(pages))
+
+    def test_deferred_iterator(self):
+        expected = {test.id: test.log for test in self.build.tests(count=ALL).values()}
+        tests = list(self.build.tests(count=ALL).profile().iterator())
+
+        with patch.object(SquadApi, 'get', wraps=SquadApi.get) as get:
+            self.assertEqual(expected, {test.id: test.log for test in tests})
+            self.assertEqual(1, get.call_count)
+
+    def test_deferred_without_relations(self):
+        tests = list(self.build.tests(count=ALL).only('name').values())
+        expected = {test.id: test.log for test in self.build.tests(count=ALL).values()}
+
+        with patch.object(SquadApi, 'get', wraps=SquadApi.get) as get:
+            self.assertEqual(expected, {test.id: test.log for test in tests})
+            self.assertEqual(1, get.call_count)
+
+    def test_deferred_by_id(self):
+        expected = {job.id: job.definition for job in Squad().testjobs(count=ALL).values()}
+        testjobs = list(Squad().testjobs(count=ALL).only('name').values())
+
+        with patch.object(SquadApi, 'get', wraps=SquadApi.get) as get:
+            self.assertEqual(expected, {job.id: job.definition for job in testjobs})
+            self.assertEqual(1, get.call_count)
+            self.assertEqual('id,definition', get.call_args[0][1]['fields'])
+
+    def test_deferred_metrics(self):
+        expected = {metric.id: metric.measurement_list for metric in self.build.metrics(count=ALL).values()}
+        metrics = self.build.metrics(count=ALL).profile()
+        self.assertEqual(expected, {metric.id: metric.measurement_list for metric in metrics.values()})
+
+    def test_not_deferred(self):
+        tests = self.build.tests(count=ALL).only('name')
+        test = first(tests)
+        with patch.object(SquadApi, 'get', wraps=SquadApi.get) as get:
+            self.assertFalse(hasattr(test, 'status'))
+            self.assertIn('name', str(test))
+            self.assertEqual(0, get.call_count)
+
+        self.assertFalse(hasattr(Test(), 'log'))
@@ -0,0 +1,57 @@
+import unittest
+
+from squad_client.core.pagination import Pagination
+from squad_client.exceptions import SquadObjectException
+
+
+def page(ids, next_url=None, count=None):
+    result = {'next': next_url, 'results': [{'id': _id} for _id in ids]}
+    if count is not None:
+        result['count'] = count
+    return Pagination.envelope(result)
+
+
+class PaginationTest(unittest.TestCase):
+
+    def test_options_are_not_parameters(self):
+        filters = {'workers': 2, 'stream': True, 'immutable': True, 'status': 'fail'}
+        pagination = Pagination('/api/tests/', filters, 10)
+        self.assertEqual(('/api/tests/', {'status': 'fail', 'limit': 10}), pagination.request())
+        self.assertEqual((2, True, True), (pagination.workers, pagination.stream, pagination.immutable))
+
+    def test_follow_next(self):
+        pagination = Pagination('/api/tests/', {}, -1)
+        pagination.advance(page([1, 2], next_url='/api/tests/?cursor=abc'))
+        self.assertEqual('/api/tests/?cursor=abc', pagination.request()[0])
+        pagination.advance(page([3]))
+        self.assertIsNone(pagination.request())
+
+    def test_count(self):
+        pagination = Pagination('/api/tests/', {}, 2)
+        pagination.advance(page([1, 2], next_url='/api/tests/?offset=2', count=5))
+        self.assertIsNone(pagination.request())
+
+    def test_concurrent_offsets(self):
+        pagination = Pagination('/api/builds/', {'workers': 3}, -1)
+        pagination.filters['limit'] = 2
+        pagination.advance(page([1, 2], next_url='/api/builds/?offset=2', count=7))
+        self.assertIsNone(pagination.request())
+        self.assertEqual([2, 4, 6], list(pagination.offsets))
+        self.assertEqual(('/api/builds/', {'limit': 2, 'offset': 4}), pagination.page(4))
+
+    def test_keyset(self):
+        pagination = Pagination('/api/builds/', {'keyset': True, 'fields': 'version'}, -1)
+        self.assertEqual({'ordering': 'id', 'fields': 'version,id', 'limit': 1000}, pagination.request()[1])
+
+        pagination.advance(page([1, 2], next_url='/api/builds/?offset=2', count=5))
+        self.assertEqual(2, pagination.request()[1]['id__gt'])
+
+        with self.assertRaises(SquadObjectException):
+            pagination.advance(page([2], next_url='/api/builds/?offset=3', count=5))
+
+    def test_keyset_offset(self):
+        pagination = Pagination('/api/builds/', {'keyset': True, 'offset': 10}, -1)
+        self.assertEqual(10, pagination.request()[1]['offset'])
+
+        pagination.advance(page([11, 12], next_url='/api/builds/?offset=12', count=20))
+        self.assertNotIn('offset', pagination.request()[1])
@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import patch
+
+from . import settings
+from squad_client.core.api import SquadClient
+from squad_client.core.models import Squad, ALL, Build
+from squad_client.core.queryset import QuerySet
+
+
+class QuerySetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = SquadClient('http://localhost:%s' % settings.DEFAULT_SQUAD_PORT)
+        self.squad = Squad(client=self.client)
+
+    def get(self):
+        return patch.object(self.client, 'get', wraps=self.client.get)
+
+    def test_lazy(self):
+        with self.get() as get:
+            builds = self.squad.builds(count=ALL).filter(version='my_build').only('version').order_by('-id')
+            self.assertIsInstance(builds, QuerySet)
+            get.assert_not_called()
+
+            self.assertEqual(1, len(builds))
+            self.assertEqual(['my_build'], [b.version for b in builds.values()])
+            params = get.call_args[0][1]
+            self.assertEqual(('my_build', 'version,id', '-id'), (params['version'], params['fields'], params['ordering']))
+
+            # Results are fetched once
+            list(builds.items())
+            self.assertEqual(1, get.call_count)
+
+    def test_mapping(self):
+        builds = self.squad.builds(count=ALL)
+        fetched = self.squad.__fetch__(Build, {}, ALL)
+        self.assertEqual(fetched.keys(), builds.keys())
+        self.assertEqual(dict(builds.items()), builds)
+        build = builds[list(fetched)[0]]
+        self.assertEqual(fetched[build.id].version, build.version)
+
+    def test_count_and_exists(self):
+        with self.get() as get:
+            self.assertEqual(len(self.squad.builds(count=ALL)), self.squad.builds(count=ALL).count())
+            get.reset_mock()
+
+            self.assertEqual(2, self.squad.builds(count=2).count())
+            self.assertTrue(self.squad.builds().filter(version='my_build').exists())
+            self.assertFalse(self.squad.builds().filter(version='no-such-build').exists())
+            self.assertEqual([1, 1, 1], [call[0][1]['limit'] for call in get.call_args_list])
+
+    def test_count_cursor_pagination(self):
+        # Cursor paginated listings don't tell the number of objects, there's no point asking
+        with self.get() as get:
+            tests = self.squad.tests(count=ALL)
+            self.assertEqual(len(tests), tests.count())
+            self.assertTrue(tests.exists())
+            self.assertEqual(1, get.call_count)
+
+    def test_first(self):
+        with self.get() as get:
+            build = self.squad.builds(count=ALL).filter(version='my_build').first()
+            self.assertEqual('my_build', build.version)
+            self.assertEqual(1, get.call_args[0][1]['limit'])
+        self.assertIsNone(self.squad.builds().filter(version='no-such-build').first())
+
+    def test_iterator(self):
+        builds = self.squad.builds(count=ALL)
+        self.assertEqual(list(builds.keys()), [b.id for b in builds.iterator()])
+        self.assertEqual(list(self.squad.builds(count=ALL).keys()), [b.id for b in self.squad.builds(count=ALL).iterator()])
+
+    def test_build_accessors(self):
+        build = self.squad.builds(version='my_build').first()
+        tests = build.tests()
+        self.assertIsInstance(tests, QuerySet)
+        self.assertEqual(len(tests), tests.count())
+        self.assertEqual(sorted(tests.keys()), sorted(t.id for t in tests.filter().iterator()))
+
+        testruns = build.testruns(bucket_suites=True)
+        self.assertTrue(all(t.test_suites is not None for t in testruns.values()))
@@ -1,13 +1,18 @@
+import csv
 import logging
 import os
-from unittest import TestCase
+import tempfile
+from unittest import TestCase, skipIf
+from unittest.mock import patch
 
 
 from . import settings
-from squad_client.core.api import SquadApi
-from squad_client.core.models import Squad
+from squad_client import export
+from squad_client.core.api import SquadApi, SquadClient
+from squad_client.core.models import Squad, Build
 from squad_client.utils import first
 from squad_client.shortcuts import (
+    compare_builds,
     retrieve_latest_builds,
     retrieve_build_results,
     submit_results,
@@ -16,6 +21,8 @@ from squad_client.shortcuts import (
     watchjob,
     download_attachments,
     download_tests,
+    export_tests,
+    export_metrics,
     register_callback,
 )
 
@@ -33,6 +40,15 @@ class ShortcutsTest(TestCase):
         results = retrieve_build_results("my_group/my_project/build/my_build")
         self.assertIsNotNone(results)
 
+    def test_compare_builds_bound_client(self):
+        client = SquadClient("http://localhost:%s" % settings.DEFAULT_SQUAD_PORT)
+        builds = sorted(self.squad.builds(project__full_name="my_group/my_project", count=2))
+        with patch.object(client, "get", wraps=client.get) as get, patch.object(SquadApi, "get") as default_get:
+            comparison = compare_builds(builds[0], builds[1], force=True, client=client)
+            self.assertEqual({}, comparison["regressions"])
+            self.assertEqual(2, get.call_count)
+            default_get.assert_not_called()
+
 
 class SubmitResultsShortcutTest(TestCase):
     def setUp(self):
@@ -410,6 +426,109 @@ class DownloadTestsShortcutTest(TestCase):
         ])
 
 
+class DownloadTestsProjectionTest(TestCase):
+    def setUp(self):
+        SquadApi.configure(url="http://localhost:%s" % settings.DEFAULT_SQUAD_PORT)
+        self.project = Squad().group("my_group").project("my_project")
+        self.build = self.project.build("my_build")
+        self.filename = "/tmp/test-download-tests-projection.txt"
+
+    def download(self, format_string):
+        with patch.object(Build, 'tests', wraps=self.build.tests) as tests:
+            self.assertTrue(download_tests(self.project, self.build, format_string=format_string, output_filename=self.filename))
+        with open(self.filename) as fp:
+            return tests.call_args[1]['fields'], fp.read().splitlines()
+
+    def test_projection(self):
+        fields, lines = self.download('{test.name} {test.status}')
+        self.assertEqual('id,name,status', fields)
+        self.assertIn('my_suite/my_failed_test fail', lines)
+
+        fields, lines = self.download('{test.short_name} {test.test_run.job_id} {test.suite.slug}')
+        self.assertEqual('id,short_name,test_run,suite', fields)
+        self.assertIn('my_failed_test None my_suite', lines)
+
+    def test_whole_test(self):
+        fields, lines = self.download('{test}')
+        self.assertNotIn('log', fields.split(','))
+        self.assertEqual(4, len(lines))
+
+
+class ExportTestsShortcutTest(TestCase):
+    def setUp(self):
+        self.squad = Squad()
+        SquadApi.configure(url="http://localhost:%s" % settings.DEFAULT_SQUAD_PORT)
+        self.project = self.squad.group("my_group").project("my_project")
+        self.build = self.project.build("my_build")
+        self.environment = self.project.environment("my_env")
+        self.suite = self.project.suite("my_suite")
+        self.expected = [
+            ('my_env', 'my_suite', 'my_suite/my_failed_test', 'fail'),
+            ('my_env', 'my_suite', 'my_suite/my_passed_test', 'pass'),
+            ('my_env', 'my_suite', 'my_suite/my_skipped_test', 'skip'),
+            ('my_env', 'my_suite', 'my_suite/my_xfailed_test', 'pass'),
+        ]
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def export_to(self, output_format, function=export_tests):
+        filename = os.path.join(self.tmpdir.name, "export.%s" % output_format)
+        success = function(
+            self.project,
+            self.build,
+            output_format=output_format,
+            filter_envs=[self.environment],
+            filter_suites=[self.suite],
+            output_filename=filename,
+            batch_size=3,
+        )
+        self.assertTrue(success)
+        return filename
+
+    def test_csv(self):
+        with open(self.export_to('csv'), newline='') as fp:
+            rows = list(csv.DictReader(fp))
+
+        self.assertEqual(list(export.COLUMNS['tests']), list(rows[0].keys()))
+        self.assertEqual({'my_build'}, {row['build'] for row in rows})
+        self.assertEqual(self.expected, sorted((row['environment'], row['suite'], row['name'], row['status']) for row in rows))
+
+    @skipIf(export.pyarrow is None, "pyarrow is not installed")
+    def test_arrow_and_parquet(self):
+        with export.pyarrow.memory_map(self.export_to('arrow')) as source:
+            table = export.pyarrow.ipc.open_file(source).read_all()
+        self.assertEqual(self.expected, sorted(zip(*[table.column(c).to_pylist() for c in ['environment', 'suite', 'name', 'status']])))
+
+        parquet = export.pyarrow.parquet.ParquetFile(self.export_to('parquet'))
+        self.assertEqual(2, parquet.metadata.num_row_groups)
+        table = parquet.read()
+        self.assertEqual(self.expected, sorted(zip(*[table.column(c).to_pylist() for c in ['environment', 'suite', 'name', 'status']])))
+
+    def test_metrics(self):
+        with open(self.export_to('csv', export_metrics), newline='') as fp:
+            rows = list(csv.DictReader(fp))
+
+        self.assertEqual(list(export.COLUMNS['metrics']), list(rows[0].keys()))
+        self.assertEqual([('my_env', 'my_suite', 'my_suite/my_metric', 1.0)],
+                         [(row['environment'], row['suite'], row['name'], float(row['result'])) for row in rows])
+
+    @skipIf(export.pyarrow is None, "pyarrow is not installed")
+    def test_metrics_parquet(self):
+        table = export.pyarrow.parquet.read_table(self.export_to('parquet', export_metrics))
+        self.assertEqual([1.0], table.column('result').to_pylist())
+
+    def test_abstract_exporter(self):
+        with self.assertRaises(TypeError):
+            export.Exporter(os.path.join(self.tmpdir.name, 'export'))
+
+    def test_without_pyarrow(self):
+        with patch.object(export, 'pyarrow', None):
+            with self.assertRaises(ImportError):
+                self.export_to('parquet')
+
+
 class RegisterCallbackShortcutTest(TestCase):
     def setUp(self):
         self.squad = Squad()
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from . import settings
+from .helpers import result
+from squad_client.core.api import SquadApi
+from squad_client.core.models import Squad, SquadObjectException
+from squad_client.core.snapshot import Snapshot, StringTable
+from squad_client.core.table import TestsTable, MetricsTable
+from squad_client.utils import first
+
+
+SquadApi.configure(url='http://localhost:%s' % settings.DEFAULT_SQUAD_PORT)
+
+
+class SnapshotTest(unittest.TestCase):
+
+    results = [
+        result(1, 'ação/a', 'pass', 1, 1.5, test_run=1000),
+        result(2, 'b', 'fail', 1, None, test_run=2000),
+        result(3, 'ação/a', None, 2, 2.5, test_run=3000),
+    ]
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, 'builds', 'snapshot.bin')
+        self.build = SimpleNamespace(id=10, version='v1', url='https://squad.example.com/api/builds/10/', finished=True)
+        self.environments = {1: SimpleNamespace(id=1, slug='x86'), 2: SimpleNamespace(id=2, slug='arm64')}
+        self.suites = {1: SimpleNamespace(id=1, slug='ltp')}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, results):
+        Snapshot.write(self.filename, self.build, TestsTable.from_results(results), MetricsTable.from_results(results), self.environments, self.suites)
+        return Snapshot(self.filename)
+
+    def test_roundtrip(self):
+        snapshot = self.write(self.results)
+        self.assertEqual('v1', snapshot.build['version'])
+        self.assertEqual({1: 'x86', 2: 'arm64'}, snapshot.environments)
+        self.assertEqual({1: 'ltp'}, snapshot.suites)
+
+        tests = snapshot.tests
+        self.assertEqual([1, 2, 3], tests['id'].tolist())
+        self.assertEqual(['ação/a', 'b', 'ação/a'], tests['name'].tolist())
+        self.assertEqual(['pass', 'fail', None], tests['status'].tolist())
+        self.assertEqual([1000, 2000, 3000], tests['test_run'].tolist())
+        self.assertEqual({(1, 'pass'): 1, (1, 'fail'): 1, (2, None): 1}, tests.count('environment', 'status'))
+        self.assertEqual([2], tests.where(status='fail')['id'].tolist())
+
+        metrics = snapshot.metrics
+        self.assertEqual({'ação/a': 2.0, 'b': None}, {k: None if v != v else v for k, v in metrics.mean('result', 'name').items()})
+
+    def test_zero_copy(self):
+        tests = self.write(self.results).tests
+        self.assertFalse(tests.columns['id'].flags.owndata)
+        self.assertFalse(tests.columns['id'].flags.writeable)
+
+    def test_empty(self):
+        snapshot = self.write([])
+        self.assertEqual(0, len(snapshot.tests))
+        self.assertEqual(0, snapshot.metrics.count())
+
+    def test_not_a_snapshot(self):
+        filename = os.path.join(self.tmpdir.name, 'tests.json')
+        with open(filename, 'wb') as fp:
+            fp.write(b'{"count": 0}')
+        with self.assertRaises(ValueError):
+            Snapshot(filename)
+
+    def test_string_table(self):
+        strings = StringTable(*StringTable.encode(['a', None, 'ü']))
+        self.assertEqual(3, len(strings))
+        self.assertEqual(['a', None, 'ü'], [strings[i] for i in range(3)])
+        self.assertEqual(['ü', 'a'], strings[[2, 0]].tolist())
+
+
+class BuildSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, 'snapshot.bin')
+        self.build = first(Squad().builds(version='my_build'))
+        self.build.finished = True
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_save_and_open(self):
+        self.assertIsNone(self.build.snapshot(self.filename))
+        self.assertEqual(self.filename, self.build.save_snapshot(self.filename))
+
+        snapshot = self.build.snapshot(self.filename)
+        self.assertEqual(self.build.id, snapshot.build['id'])
+        self.assertEqual(self.build.tests_table().count('status'), snapshot.tests.count('status'))
+        self.assertEqual(len(self.build.metrics()), len(snapshot.metrics))
+        self.assertIn('my_env', snapshot.environments.values())
+
+    def test_default_path(self):
+        # Where snapshots are saved and looked for when no store is configured
+        with patch('squad_client.settings.STORE_PATH', self.tmpdir.name):
+            filename = self.build.save_snapshot()
+            self.assertTrue(filename.startswith(self.tmpdir.name))
+            self.assertEqual(self.build.id, self.build.snapshot().build['id'])
+            self.assertEqual(self.build.tests_table().count('status'), self.build.snapshot().tests.count('status'))
+
+    def test_unfinished_build(self):
+        self.build.save_snapshot(self.filename)
+        self.build.finished = False
+        self.assertIsNone(self.build.snapshot(self.filename))
+        with self.assertRaises(SquadObjectException):
+            self.build.save_snapshot(self.filename)
@@ -0,0 +1,122 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from . import settings
+from squad_client.core.api import SquadClient
+from squad_client.core.models import Squad
+from squad_client.core.store import BuildStore
+from squad_client.utils import first
+
+
+class BuildStoreTest(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = BuildStore('http://squad.example.com/', path=self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_get_put(self):
+        self.assertIsNone(self.store.get(1, 'tests'))
+        self.store.put(1, 'tests', [{'id': 1, 'status': 'pass'}])
+        self.assertEqual([{'id': 1, 'status': 'pass'}], self.store.get(1, 'tests'))
+        self.assertIsNone(self.store.get(2, 'tests'))
+        self.assertEqual([], [f for f in os.listdir(os.path.join(self.store.root, '1')) if f.endswith('.tmp')])
+
+    def test_keyed_by_server_and_token(self):
+        self.store.put(1, 'tests', [])
+        other_server = BuildStore('http://other.example.com', path=self.tmpdir.name)
+        with_token = BuildStore('http://squad.example.com', token='secret', path=self.tmpdir.name)
+        self.assertIsNone(other_server.get(1, 'tests'))
+        self.assertIsNone(with_token.get(1, 'tests'))
+
+    def test_corrupted_entry(self):
+        self.store.put(1, 'tests', [])
+        with open(os.path.join(self.store.root, '1', 'tests.json'), 'w') as fp:
+            fp.write('[{"id"')
+        self.assertIsNone(self.store.get(1, 'tests'))
+
+    def test_key(self):
+        self.assertEqual('tests', BuildStore.key('tests', {}))
+        self.assertEqual(BuildStore.key('tests', {'a': 1, 'b': 2}), BuildStore.key('tests', {'b': 2, 'a': 1}))
+        self.assertNotEqual(BuildStore.key('tests', {'a': 1}), BuildStore.key('tests', {'a': 2}))
+
+
+class StoredBuildTest(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.url = 'http://localhost:%s' % settings.DEFAULT_SQUAD_PORT
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def build(self, finished):
+        client = SquadClient(self.url, store=self.tmpdir.name)
+        build = first(Squad(client=client).builds(version='my_build'))
+        build.finished = finished
+        return build
+
+    def test_finished_build(self):
+        build = self.build(finished=True)
+        tests = build.tests()
+        metrics = build.metrics()
+        testruns = build.testruns(prefetch_metadata=True)
+        metadata = build.metadata
+
+        build = self.build(finished=True)
+        with patch.object(build.__client__, 'get') as get:
+            self.assertEqual(tests.keys(), build.tests().keys())
+            self.assertEqual([t.status for t in tests.values()], [t.status for t in build.tests().values()])
+            self.assertEqual(metrics.keys(), build.metrics().keys())
+            self.assertEqual(testruns.keys(), build.testruns(prefetch_metadata=True).keys())
+            self.assertEqual((metadata.foo, metadata.job_id), (build.metadata.foo, build.metadata.job_id))
+            get.assert_not_called()
+
+        self.assertIs(build.__client__, first(build.tests()).__client__)
+
+    def test_stored_iterator_and_count(self):
+        build = self.build(finished=True)
+        ids = list(build.tests().keys())
+
+        build = self.build(finished=True)
+        with patch.object(build.__client__, 'get') as get:
+            self.assertEqual(ids, [t.id for t in build.tests().iterator()])
+            self.assertEqual(len(ids), build.tests().count())
+            self.assertTrue(build.tests().exists())
+            get.assert_not_called()
+
+    @patch('squad_client.settings.SQUAD_MAX_PAGE_LIMIT', 2)
+    def test_stored_iterator_batches(self):
+        build = self.build(finished=True)
+        logs = {t.id: t.log for t in build.tests().values()}
+
+        build = self.build(finished=True)
+        tests = list(build.tests().profile().iterator())
+        batches = {id(t.__batch__) for t in tests}
+        self.assertEqual((len(tests) + 1) // 2, len(batches))
+        self.assertEqual(logs, {t.id: t.log for t in tests})
+
+    def test_filters_are_stored_apart(self):
+        build = self.build(finished=True)
+        len(build.tests())
+        len(build.tests(fields='id,status'))
+
+        build = self.build(finished=True)
+        with patch.object(build.__client__, 'get') as get:
+            self.assertTrue(hasattr(first(build.tests()), 'name'))
+            self.assertFalse(hasattr(first(build.tests(fields='id,status')), 'name'))
+            get.assert_not_called()
+
+    def test_unfinished_build(self):
+        build = self.build(finished=False)
+        len(build.tests())
+
+        build = self.build(finished=False)
+        with patch.object(build.__client__, 'get', wraps=build.__client__.get) as get:
+            len(build.tests())
+            get.assert_called()
+        self.assertEqual([], os.listdir(self.tmpdir.name))
@@ -0,0 +1,92 @@
+import math
+import unittest
+from unittest.mock import patch
+
+from . import settings
+from .helpers import result
+from squad_client.core import table
+from squad_client.core.api import SquadApi
+from squad_client.core.models import Squad
+from squad_client.core.table import TestsTable, MetricsTable
+from squad_client.utils import first
+
+
+SquadApi.configure(url='http://localhost:%s' % settings.DEFAULT_SQUAD_PORT)
+
+
+class TableTest(unittest.TestCase):
+
+    results = [
+        result(1, 'a', 'pass', 1, 1.0),
+        result(2, 'b', 'fail', 1, 3.0),
+        result(3, 'a', 'pass', 2, None),
+        result(4, 'b', 'pass', 2, 5.0),
+        result(5, 'c', 'skip', 2, 4.0),
+    ]
+
+    def test_columns(self):
+        tests = TestsTable.from_results(iter(self.results))
+        self.assertEqual(5, len(tests))
+        self.assertEqual([1, 2, 3, 4, 5], tests['id'].tolist())
+        self.assertEqual(['a', 'b', 'a', 'b', 'c'], tests['name'].tolist())
+        self.assertEqual([1, 1, 2, 2, 2], tests['environment'].tolist())
+        self.assertEqual([-1] * 5, tests['test_run'].tolist())
+        self.assertEqual(1, tests.columns['status'].itemsize)
+
+    def test_batches(self):
+        with patch.object(table, 'BATCH_SIZE', 2):
+            tests = TestsTable.from_results(self.results)
+        self.assertEqual(['pass', 'fail', 'pass', 'pass', 'skip'], tests['status'].tolist())
+
+    def test_count(self):
+        tests = TestsTable.from_results(self.results)
+        self.assertEqual(5, tests.count())
+        self.assertEqual({'pass': 3, 'fail': 1, 'skip': 1}, tests.count('status'))
+        self.assertEqual({(1, 'pass'): 1, (1, 'fail'): 1, (2, 'pass'): 2, (2, 'skip'): 1}, tests.count('environment', 'status'))
+
+    def test_where(self):
+        tests = TestsTable.from_results(self.results)
+        self.assertEqual([3, 4], tests.where(status='pass', environment=2)['id'].tolist())
+        self.assertEqual([2, 5], tests.where(status=['fail', 'skip'])['id'].tolist())
+        self.assertEqual(0, len(tests.where(status='xfail')))
+        self.assertEqual(0, len(tests.where(name='unknown')))
+
+    def test_mean(self):
+        metrics = MetricsTable.from_results(self.results)
+        self.assertEqual(13.0, metrics.sum('result'))
+        self.assertEqual(3.25, metrics.mean('result'))
+        self.assertEqual({1: 2.0, 2: 4.5}, metrics.mean('result', 'environment'))
+        self.assertTrue(math.isnan(metrics.where(name='a', environment=2).mean('result')))
+
+    def test_empty(self):
+        tests = TestsTable.from_results([])
+        self.assertEqual(0, len(tests))
+        self.assertEqual(0, tests.count())
+        self.assertEqual({}, tests.count('environment', 'status'))
+
+    def test_without_numpy(self):
+        with patch.object(table, 'numpy', None):
+            with self.assertRaises(ImportError):
+                TestsTable.from_results(self.results)
+
+
+class BuildTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.build = first(Squad().builds(version='my_build'))
+
+    def test_tests_table(self):
+        tests = self.build.tests()
+        tests_table = self.build.tests_table()
+        self.assertEqual(sorted(tests.keys()), sorted(tests_table['id'].tolist()))
+
+        counts = {}
+        for test in tests.values():
+            counts[test.status] = counts.get(test.status, 0) + 1
+        self.assertEqual(counts, tests_table.count('status'))
+
+    def test_metrics_table(self):
+        metrics = self.build.metrics()
+        metrics_table = self.build.metrics_table()
+        self.assertEqual(len(metrics), len(metrics_table))
+        self.assertEqual(sorted(m.result for m in metrics.values()), sorted(metrics_table['result'].tolist()))
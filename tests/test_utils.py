@@ -1,5 +1,5 @@
 from unittest import TestCase
-from squad_client.utils import getid
+from squad_client.utils import chunk_ids, getid, format_fields
 
 
 class UtilsTest(TestCase):
@@ -14,3 +14,16 @@ class UtilsTest(TestCase):
     def test_getid_not_an_integer(self):
         url = 'https://some-squad-url.com/api/objects/not-an-integer/'
         self.assertEqual(-1, getid(url))
+
+    def test_format_fields(self):
+        self.assertEqual(['environment.slug', 'name', 'status'], format_fields('{test.environment.slug}/{test.name} {test.status}', 'test'))
+        self.assertEqual(['log'], format_fields('{tests.name} {test.log[:10]!r:>20}', 'test'))
+        self.assertEqual([], format_fields('no fields at all', 'test'))
+        self.assertIsNone(format_fields('{test} {test.status}', 'test'))
+
+    def test_chunk_ids(self):
+        self.assertEqual(['1,22,333'], chunk_ids([1, 22, 333], 100, 10))
+        self.assertEqual(['1,22', '333'], chunk_ids([1, 22, 333], 5, 10))
+        self.assertEqual(['1', '22', '333'], chunk_ids([1, 22, 333], 100, 1))
+        self.assertEqual(['123456'], chunk_ids([123456], 3, 10))
+        self.assertEqual([], chunk_ids([], 100, 10))